@@ -0,0 +1,145 @@
+import numpy as np
+
+from typing import Dict, Tuple, TYPE_CHECKING
+
+from line import Line
+from typeEnums import TrainType
+
+if TYPE_CHECKING:
+    from minimetro import MiniMetro
+
+# Design constants
+INITIAL_STATION_CAPACITY: int = 128
+INITIAL_LINE_CAPACITY: int    = 16
+
+TRAIN_TYPE_COUNT: int = len(TrainType)
+
+
+class ActionMasks:
+    """Legal-action masks for the direct action API, kept up to date as the network changes.
+
+    Masks are indexed by station index (stations are never removed, so a station's id is its index in
+    MiniMetro.stations) and line index (position in MiniMetro.lines). Each change to the game touches one
+    row, column or cell, so reading the masks never scans the network.
+    """
+
+    def __init__(self):
+        self.station_count: int = 0
+        self.line_count: int = 0
+        self.line_rows: Dict[int, int] = {}     # Line id -> line index
+
+        # connect[i, j]: no line has i and j as its end stations
+        self.connect: np.ndarray = np.zeros((INITIAL_STATION_CAPACITY, INITIAL_STATION_CAPACITY), dtype=np.bool_)
+        # extend[l, j]: line l is open and j is not on it
+        self.extend: np.ndarray = np.zeros((INITIAL_LINE_CAPACITY, INITIAL_STATION_CAPACITY), dtype=np.bool_)
+        self.open: np.ndarray = np.zeros(INITIAL_LINE_CAPACITY, dtype=np.bool_)
+        self.close_loop: np.ndarray = np.zeros(INITIAL_LINE_CAPACITY, dtype=np.bool_)
+        self.train_counts: np.ndarray = np.zeros((INITIAL_LINE_CAPACITY, TRAIN_TYPE_COUNT), dtype=np.int64)
+        self.has_train: np.ndarray = np.zeros((INITIAL_LINE_CAPACITY, TRAIN_TYPE_COUNT), dtype=np.bool_)
+        self.lines: np.ndarray = np.ones(INITIAL_LINE_CAPACITY, dtype=np.bool_)
+
+        self.no_connect: np.ndarray = np.zeros_like(self.connect)
+
+    def _grow_stations(self) -> None:
+        size = len(self.connect) * 2
+        connect = np.zeros((size, size), dtype=np.bool_)
+        connect[:self.station_count, :self.station_count] = self.connect[:self.station_count, :self.station_count]
+        self.connect = connect
+        self.no_connect = np.zeros_like(connect)
+        extend = np.zeros((len(self.extend), size), dtype=np.bool_)
+        extend[:, :self.station_count] = self.extend[:, :self.station_count]
+        self.extend = extend
+
+    def _grow_lines(self) -> None:
+        for name in ("extend", "open", "close_loop", "train_counts", "has_train"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.lines = np.ones(len(self.open), dtype=np.bool_)
+
+    def add_station(self) -> None:
+        """A station was appended to MiniMetro.stations."""
+        if self.station_count == self.connect.shape[0]:
+            self._grow_stations()
+        index = self.station_count
+        self.station_count += 1
+        self.connect[index, :index] = True
+        self.connect[:index, index] = True
+        self.extend[:self.line_count, index] = self.open[:self.line_count]
+
+    def set_endpoints(self, endpoints: Tuple[int, int], free: bool) -> None:
+        """A line between two end stations was indexed (free=False) or the last such line was unindexed (free=True)."""
+        i, j = endpoints
+        if i < self.station_count and j < self.station_count:
+            self.connect[i, j] = free
+            self.connect[j, i] = free
+
+    def update_line(self, line: Line) -> None:
+        """A line was created, extended or closed into a loop; new lines go after the existing ones."""
+        row = self.line_rows.get(line.id)
+        if row is None:
+            if self.line_count == len(self.open):
+                self._grow_lines()
+            row = self.line_rows[line.id] = self.line_count
+            self.line_count += 1
+
+        is_open = not line.circular
+        self.open[row] = is_open
+        self.close_loop[row] = is_open and len(line.stations) > 2
+        extend = self.extend[row]
+        extend[:self.station_count] = is_open
+        extend[self.station_count:] = False
+        if is_open:
+            extend[[station.id for station in line.stations]] = False
+
+    def remove_line(self, line: Line) -> None:
+        """A line was deleted; the lines after it move up one index, as in MiniMetro.lines."""
+        row = self.line_rows.pop(line.id, None)
+        if row is None:
+            return
+        last = self.line_count - 1
+        for name in ("extend", "open", "close_loop", "train_counts", "has_train"):
+            array = getattr(self, name)
+            array[row:last] = array[row + 1:last + 1]
+            array[last] = 0
+        for line_id, other in self.line_rows.items():
+            if other > row:
+                self.line_rows[line_id] = other - 1
+        self.line_count = last
+
+    def train_added(self, line: Line, type: TrainType) -> None:
+        row = self.line_rows[line.id]
+        self.train_counts[row, type.value] += 1
+        self.has_train[row, type.value] = True
+
+    def train_removed(self, line: Line, type: TrainType) -> None:
+        row = self.line_rows.get(line.id)
+        if row is not None:
+            self.train_counts[row, type.value] -= 1
+            self.has_train[row, type.value] = self.train_counts[row, type.value] > 0
+
+    def rebuild(self, metro: "MiniMetro") -> None:
+        """Recompute every mask from a game, e.g. after restoring a snapshot."""
+        self.__init__()
+        for _ in metro.stations:
+            self.add_station()
+        for endpoints in metro.endpoint_counts:
+            self.set_endpoints(endpoints, False)
+        for line in metro.lines:
+            self.update_line(line)
+        for train in metro.trains:
+            self.train_added(train.line, train.type)
+
+    def masks(self, can_create_line: bool, can_add_train: bool) -> Dict[str, np.ndarray]:
+        """Get the legal-action masks for the current game.
+
+        These are views of the live arrays: they change with the game and must not be written to.
+        """
+        stations, lines = self.station_count, self.line_count
+        return {
+            "connect":      (self.connect if can_create_line else self.no_connect)[:stations, :stations],
+            "extend":       self.extend[:lines, :stations],
+            "close_loop":   self.close_loop[:lines],
+            "remove_line":  self.lines[:lines],
+            "add_train":    np.broadcast_to(np.bool_(can_add_train), (lines, TRAIN_TYPE_COUNT)),
+            "remove_train": self.has_train[:lines],
+        }
@@ -0,0 +1,214 @@
+import argparse
+import copy
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Any
+
+from minimetro import MiniMetro, MAX_LINES
+from networkBuilder import build_network
+from eventLog import logger
+
+# Design constants
+NETWORK_STATIONS: int       = 100
+LOADED_TICKS: int           = 1200      # Let riders build up before measuring
+MEASURE_TICKS: int          = 3000
+MEMORY_TICKS: int           = 600
+RENDER_FRAMES: int          = 300
+FORK_REPEATS: int           = 50
+TIMING_REPEATS: int         = 3         # Tick rates are the best of this many runs, as timeit does
+REGRESSION_TOLERANCE: float = 0.20      # Fail when a rate drops (or a time grows) by more than this
+BASELINE_PATH: Path         = Path(__file__).with_name("benchmark_baseline.json")    # Machine-specific, not committed
+
+STATION_SWEEP: List[int]    = [10, 25, 50, 100]
+TRAIN_SWEEP: List[int]      = [1, 2, 4, 8]
+
+
+@dataclass
+class Scenario:
+    """A scripted network: stations on a grid, lines snaking through them, trains per line."""
+    name: str
+    stations: int
+    lines: int
+    trains_per_line: int
+    loaded_ticks: int = LOADED_TICKS
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("small", stations=10, lines=2, trains_per_line=1),
+    Scenario("medium", stations=50, lines=5, trains_per_line=2),
+    Scenario("large", stations=100, lines=MAX_LINES, trains_per_line=4),
+    # Few lines and a long build-up: every station queue full, riders giving up constantly
+    Scenario("saturated", stations=100, lines=1, trains_per_line=1, loaded_ticks=6000),
+]
+
+
+def build_scenario(scenario: Scenario, seed: int = 0) -> MiniMetro:
+    return build_network(scenario.stations, scenario.lines, scenario.trains_per_line, seed, scenario.loaded_ticks)
+
+
+def time_per_call(function: Callable[[], object], repeats: int) -> float:
+    """Average wall time of a call in seconds."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def _timed(target: Any, name: str, totals: Dict[str, float], key: str) -> None:
+    """Shadow a method on one object with a version that adds its wall time to totals[key]."""
+    method = getattr(target, name)
+    
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        totals[key] += time.perf_counter() - start
+        return result
+    setattr(target, name, wrapper)
+
+
+def measure_ticks(metro: MiniMetro, ticks: int = MEASURE_TICKS, repeats: int = TIMING_REPEATS) -> Dict[str, float]:
+    """Ticks per second over forks of the game, and the share of tick time spent in each subsystem."""
+    elapsed = math.inf
+    for _ in range(repeats):
+        run = metro.fork()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            run.step()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    
+    # Extra pass with per-subsystem timers; the wrappers add overhead, so only the shares are reported
+    metro = metro.fork()
+    totals = {"stations": 0.0, "trains": 0.0, "tracker": 0.0}
+    for station in metro.stations:
+        _timed(station, "update", totals, "stations")
+    _timed(metro.train_engine, "update", totals, "trains")
+    _timed(metro.tracker, "sample", totals, "tracker")
+    start = time.perf_counter()
+    for _ in range(ticks):
+        metro.step()
+    instrumented = time.perf_counter() - start
+    
+    results = {"ticks_per_second": ticks / elapsed}
+    for key, seconds in totals.items():
+        results[f"{key}_share"] = seconds / instrumented
+    return results
+
+
+def measure_memory(metro: MiniMetro, ticks: int = MEMORY_TICKS) -> Dict[str, float]:
+    """Peak traced memory and allocations made while stepping a fork of the game."""
+    metro = metro.fork()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(ticks):
+        metro.step()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    differences = after.compare_to(before, "filename")
+    return {
+        "peak_kib": peak / 1024,
+        "allocated_blocks_per_tick": sum(max(stat.count_diff, 0) for stat in differences) / ticks,
+        "retained_kib": sum(stat.size_diff for stat in differences) / 1024,
+    }
+
+
+def measure_render(metro: MiniMetro, frames: int = RENDER_FRAMES) -> Dict[str, float]:
+    """Frame time of render() for the game restored into a windowed MiniMetro (dummy video driver when unset)."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    windowed = MiniMetro()
+    windowed.restore(metro.snapshot())
+    start = time.perf_counter()
+    for _ in range(frames):
+        windowed.step()
+        windowed.render()
+    elapsed = time.perf_counter() - start
+    return {"frame_ms": elapsed / frames * 1000}
+
+
+def benchmark_fork(metro: MiniMetro, repeats: int = FORK_REPEATS) -> Dict[str, float]:
+    """Time snapshot, restore and fork against copy.deepcopy of the same game."""
+    snapshot = metro.snapshot()
+    target = MiniMetro(headless=True)
+    return {
+        "snapshot_ms":  time_per_call(metro.snapshot, repeats) * 1000,
+        "restore_ms":   time_per_call(lambda: target.restore(snapshot), repeats) * 1000,
+        "fork_ms":      time_per_call(metro.fork, repeats) * 1000,
+        "deepcopy_ms":  time_per_call(lambda: copy.deepcopy(metro), repeats) * 1000,
+    }
+
+
+def run_suite(render: bool = False, sweeps: bool = True, ticks: int = MEASURE_TICKS) -> Dict[str, Dict[str, float]]:
+    """Run every scenario (and optionally the scaling sweeps) and return results keyed by benchmark name."""
+    results: Dict[str, Dict[str, float]] = {}
+    for scenario in SCENARIOS:
+        metro = build_scenario(scenario)
+        result = measure_ticks(metro, ticks)
+        result.update(measure_memory(metro))
+        if render:
+            result.update(measure_render(metro))
+        results[f"scenario/{scenario.name}"] = result
+        print(f"{scenario.name:>10}: {result['ticks_per_second']:9.0f} ticks/s  {result['peak_kib']:8.0f} KiB peak", flush=True)
+    
+    results["fork/large"] = benchmark_fork(build_network(NETWORK_STATIONS, trains_per_line=2, loaded_ticks=LOADED_TICKS))
+    
+    if sweeps:
+        for stations in STATION_SWEEP:
+            results[f"sweep/stations={stations}"] = measure_ticks(build_network(stations, trains_per_line=1, loaded_ticks=LOADED_TICKS), ticks)
+        for trains in TRAIN_SWEEP:
+            results[f"sweep/trains_per_line={trains}"] = measure_ticks(build_network(NETWORK_STATIONS, trains_per_line=trains, loaded_ticks=LOADED_TICKS), ticks)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """List regressions against a baseline: rates that fell or times that grew by more than the tolerance."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if not expected or metric.endswith("_share"):
+                continue
+            if metric.endswith("_per_second"):
+                worse = value < expected * (1 - tolerance)
+            elif metric.endswith(("_ms", "_kib", "_per_tick")):
+                worse = value > expected * (1 + tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append(f"{name} {metric}: {value:.3f} (baseline {expected:.3f})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless MiniMetro benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="skip the scaling sweeps")
+    parser.add_argument("--render", action="store_true", help="also time render() with the dummy video driver")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store the results as this machine's baseline ({BASELINE_PATH.name})")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if anything regressed against this machine's baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+    
+    logger.configure(console=False)
+    results = run_suite(render=args.render, sweeps=not args.quick)
+    print(json.dumps(results, indent=2))
+    
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2))
+        print(f"Saved baseline to {BASELINE_PATH}")
+    if args.check:
+        if not BASELINE_PATH.exists():
+            sys.exit(f"No baseline at {BASELINE_PATH}; run with --save-baseline first")
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,210 @@
+import multiprocessing
+
+import numpy as np
+
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import List, Tuple, Dict, Optional, Any, Union
+
+from minimetro import MiniMetro, FPS
+from gameRandom import Seed
+from observation import ObservationEncoder
+from replay import ReplayRecorder
+from typeEnums import PlayerAction
+
+# Design constants
+START_STATIONS: int         = 3
+EPISODE_SECONDS: float      = 600.0
+TICKS_PER_STEP: int         = FPS
+
+Action = Optional[Tuple[int, int, int]]    # (PlayerAction, a, b), see MiniMetro.perform
+Observation = Dict[str, Any]      # Fixed-shape arrays from ObservationEncoder, plus "legal" masks
+StepResult = Tuple[Observation, float, bool, Dict[str, Any]]
+
+
+class MiniMetroEnv:
+    """Reset/step environment around a headless MiniMetro game for agent training.
+
+    With record_dir set, every episode is saved there as a replay for later analysis, named after the
+    episode's seed spawn key so environments of a VectorEnv can share the directory. raster_size adds a
+    low-resolution map of that size to the observation.
+    """
+
+    def __init__(self, episode_seconds: float = EPISODE_SECONDS, ticks_per_step: int = TICKS_PER_STEP, start_stations: int = START_STATIONS, seed: Seed = None, record_dir: Optional[Union[str, Path]] = None, raster_size: Optional[int] = None):
+        self.episode_seconds: float = episode_seconds
+        self.ticks_per_step: int = ticks_per_step
+        self.start_stations: int = start_stations
+        self.metro: Optional[MiniMetro] = None
+        # Each episode gets its own child seed, so a seeded environment replays the same sequence of games
+        self.seeds: np.random.SeedSequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.record_dir: Optional[Path] = Path(record_dir) if record_dir is not None else None
+        self.recorder: Optional[ReplayRecorder] = None
+        self.raster_size: Optional[int] = raster_size
+        self.encoder: Optional[ObservationEncoder] = None
+
+        self._last_arrived: int = 0
+        self._last_lost: int = 0
+
+    def reset(self) -> Observation:
+        """Start a new game and return its first observation."""
+        seed = self.seeds.spawn(1)[0]
+        self.metro = MiniMetro(headless=True, seed=seed)
+        self.encoder = ObservationEncoder(self.metro, raster_size=self.raster_size)
+        self.close()
+        if self.record_dir is not None:
+            self.record_dir.mkdir(parents=True, exist_ok=True)
+            self.recorder = ReplayRecorder(self.metro, self.record_dir / f"episode-{'-'.join(map(str, seed.spawn_key))}.mmr")
+        for _ in range(self.start_stations):
+            self.metro.perform(PlayerAction.CreateStation)
+
+        self._last_arrived = 0
+        self._last_lost = 0
+        return self.observation()
+
+    def step(self, action: Action = None) -> StepResult:
+        """Apply an action and advance the game by ticks_per_step ticks.
+
+        Actions are (PlayerAction, a, b) triples, usually a move of the direct action API allowed by the
+        observation's "legal" masks, or None to do nothing. info["legal_action"] tells whether it was applied.
+        """
+        if self.metro is None:
+            raise RuntimeError("reset() must be called before step()")
+
+        legal = True
+        if action is not None:
+            kind, a, b = action
+            legal = self.metro.perform(PlayerAction(kind), a, b)
+        for _ in range(self.ticks_per_step):
+            self.metro.step()
+
+        reward = self.reward()
+        done = self.metro.get_elapsed_time() >= self.episode_seconds
+        info = {
+            "time": self.metro.get_elapsed_time(),
+            "arrived": self.metro.tracker.passengers_arrived,
+            "lost": self.metro.tracker.passengers_lost,
+            "legal_action": legal,
+        }
+        return self.observation(), reward, done, info
+
+    def close(self) -> None:
+        """Finish the replay of the current episode, if one is being recorded."""
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def reward(self) -> float:
+        """Passengers delivered minus passengers lost since the previous call."""
+        tracker = self.metro.tracker
+        reward = (tracker.passengers_arrived - self._last_arrived) - (tracker.passengers_lost - self._last_lost)
+        self._last_arrived = tracker.passengers_arrived
+        self._last_lost = tracker.passengers_lost
+        return float(reward)
+
+    def observation(self) -> Observation:
+        """Get copies of the encoder's arrays and of its padded legal-action masks."""
+        observation: Observation = {name: array.copy() for name, array in self.encoder.update().items()}
+        observation["legal"] = {name: mask.copy() for name, mask in self.encoder.legal_actions().items()}
+        return observation
+
+
+def _worker(remote: Connection, seeds: List[np.random.SeedSequence], env_kwargs: Dict[str, Any]) -> None:
+    """Own a slice of environments in a child process and serve commands from the parent."""
+    envs = [MiniMetroEnv(seed=seed, **env_kwargs) for seed in seeds]
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "reset":
+                remote.send([env.reset() for env in envs])
+            elif command == "step":
+                remote.send([_step_with_reset(env, action) for env, action in zip(envs, data)])
+            elif command == "close":
+                for env in envs:
+                    env.close()
+                break
+    finally:
+        remote.close()
+
+
+def _step_with_reset(env: MiniMetroEnv, action: Action) -> StepResult:
+    """Step an environment, resetting it when the episode ends so the batch never stalls."""
+    observation, reward, done, info = env.step(action)
+    if done:
+        info["final_observation"] = observation
+        observation = env.reset()
+    return observation, reward, done, info
+
+
+class VectorEnv:
+    """Steps N independent MiniMetro games, either batched in this process or spread over worker processes.
+
+    Every environment gets an independent random stream spawned from seed, whichever process it runs in.
+    """
+
+    def __init__(self, num_envs: int, processes: int = 0, seed: Seed = None, **env_kwargs):
+        if num_envs < 1:
+            raise ValueError("VectorEnv needs at least 1 environment")
+
+        self.num_envs: int = num_envs
+        self.processes: int = min(processes, num_envs)
+        self.envs: List[MiniMetroEnv] = []
+        self.remotes: List[Connection] = []
+        self.workers: List[multiprocessing.Process] = []
+        self.slices: List[int] = []
+
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        seeds = root.spawn(num_envs)
+        if self.processes <= 0:
+            self.envs = [MiniMetroEnv(seed=env_seed, **env_kwargs) for env_seed in seeds]
+            return
+
+        # Spread environments as evenly as possible over the worker processes
+        base, extra = divmod(num_envs, self.processes)
+        self.slices = [base + (1 if i < extra else 0) for i in range(self.processes)]
+        start = 0
+        for size in self.slices:
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker, args=(child, seeds[start:start + size], env_kwargs), daemon=True)
+            start += size
+            worker.start()
+            child.close()
+            self.remotes.append(parent)
+            self.workers.append(worker)
+
+    def reset(self) -> List[Observation]:
+        """Reset every environment and return their observations."""
+        if not self.remotes:
+            return [env.reset() for env in self.envs]
+
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        return [observation for remote in self.remotes for observation in remote.recv()]
+
+    def step(self, actions: List[Action]) -> Tuple[List[Observation], List[float], List[bool], List[Dict[str, Any]]]:
+        """Step every environment with its action. Finished environments are reset automatically."""
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+
+        if not self.remotes:
+            results = [_step_with_reset(env, action) for env, action in zip(self.envs, actions)]
+        else:
+            start = 0
+            for remote, size in zip(self.remotes, self.slices):
+                remote.send(("step", actions[start:start + size]))
+                start += size
+            results = [result for remote in self.remotes for result in remote.recv()]
+
+        observations, rewards, dones, infos = (list(values) for values in zip(*results))
+        return observations, rewards, dones, infos
+
+    def close(self) -> None:
+        """Stop the worker processes and close every environment."""
+        for env in self.envs:
+            env.close()
+        for remote in self.remotes:
+            remote.send(("close", None))
+            remote.close()
+        for worker in self.workers:
+            worker.join()
+        self.remotes = []
+        self.workers = []
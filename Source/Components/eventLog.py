@@ -0,0 +1,143 @@
+import json
+import queue
+import threading
+import time
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+from typeEnums import LogLevel, LogEvent
+
+# Design constants
+DEFAULT_LEVEL: LogLevel = LogLevel.Info
+SINK_QUEUE_SIZE: int    = 65536
+
+# Level of every event kind; per-tick events are Debug so they cost a single comparison by default
+EVENT_LEVELS: Dict[LogEvent, LogLevel] = {
+    LogEvent.StationCreated:        LogLevel.Info,
+    LogEvent.MapSaturated:          LogLevel.Info,
+    LogEvent.RiderSpawned:          LogLevel.Debug,
+    LogEvent.RidersBoarded:         LogLevel.Debug,
+    LogEvent.TrainArrived:          LogLevel.Debug,
+    LogEvent.TrainCreated:          LogLevel.Info,
+    LogEvent.TrainDeleted:          LogLevel.Info,
+    LogEvent.NoTrainsAvailable:     LogLevel.Warning,
+    LogEvent.LineCreated:           LogLevel.Info,
+    LogEvent.LineExtended:          LogLevel.Info,
+    LogEvent.LineExtendFailed:      LogLevel.Warning,
+    LogEvent.LineCircular:          LogLevel.Info,
+    LogEvent.LineCycleRejected:     LogLevel.Warning,
+    LogEvent.LineSelected:          LogLevel.Info,
+    LogEvent.LineDeleted:           LogLevel.Info,
+    LogEvent.StationClicked:        LogLevel.Debug,
+    LogEvent.SpritesLoaded:         LogLevel.Info,
+    LogEvent.BackgroundLoaded:      LogLevel.Info,
+    LogEvent.ResourceError:         LogLevel.Error,
+    LogEvent.ExportError:           LogLevel.Error,
+}
+
+# Console messages, formatted with the event fields only when the line is actually printed
+EVENT_MESSAGES: Dict[LogEvent, str] = {
+    LogEvent.StationCreated:        "Created ({count}): {station_type} at ({x}, {y})",
+    LogEvent.MapSaturated:          "Map is saturated, no room for another station",
+    LogEvent.RiderSpawned:          "New rider at {station_type} at ({x}, {y}): wants {destination} ({waiting} waiting)",
+    LogEvent.RidersBoarded:         "{aboard} aboard train",
+    LogEvent.TrainArrived:          "Train arrived at {station_type} at ({x}, {y})",
+    LogEvent.TrainCreated:          "Created train on line (Total: {count})",
+    LogEvent.TrainDeleted:          "Deleted train {train}",
+    LogEvent.NoTrainsAvailable:     "No trains available",
+    LogEvent.LineCreated:           "Created line and train between {origin} and {destination}",
+    LogEvent.LineExtended:          "Extended line to {destination}",
+    LogEvent.LineExtendFailed:      "Cannot extend line here",
+    LogEvent.LineCircular:          "Line {line} is now circular",
+    LogEvent.LineCycleRejected:     "Cannot add station - would create cycle in middle of line",
+    LogEvent.LineSelected:          "Line selected: {line}",
+    LogEvent.LineDeleted:           "Deleted line {line}",
+    LogEvent.StationClicked:        "Station clicked: {station_type} at ({x}, {y})",
+    LogEvent.SpritesLoaded:         "Loaded {stations} station sprites, {trains} train sprites, {riders} rider sprites",
+    LogEvent.BackgroundLoaded:      "Loaded background: {filename}",
+    LogEvent.ResourceError:         "Error loading {resource}: {error}",
+    LogEvent.ExportError:           "Error writing {path}: {error}",
+}
+
+
+class JsonlSink:
+    """Appends events as JSON lines to a file from a background thread, so logging never blocks on disk I/O."""
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path: Path = Path(path)
+        self.records: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(SINK_QUEUE_SIZE)
+        self.dropped: int = 0
+        self.thread: threading.Thread = threading.Thread(target=self._run, name="event-log-sink", daemon=True)
+        self.thread.start()
+    
+    def write(self, record: Dict[str, Any]) -> None:
+        """Queue a record; records are dropped (and counted) rather than stalling the game if the writer falls behind."""
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+    
+    def close(self) -> None:
+        """Write out everything queued so far and stop the writer thread."""
+        self.records.put(None)
+        self.thread.join()
+    
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                record = self.records.get()
+                if record is None:
+                    break
+                file.write(json.dumps(record, default=str) + "\n")
+                # Flush once the backlog is drained rather than per record
+                if self.records.empty():
+                    file.flush()
+
+
+class EventLogger:
+    """Level-gated structured event log with an optional console echo and an optional JSONL file sink.
+    
+    Events below the level are discarded after one comparison, before any message or record is built.
+    Hot paths that would compute fields just for logging check enabled() first.
+    """
+    
+    def __init__(self, level: LogLevel = DEFAULT_LEVEL, console: bool = True):
+        self.level: LogLevel = level
+        self.console: bool = console
+        self.sink: Optional[JsonlSink] = None
+    
+    def configure(self, level: Optional[LogLevel] = None, console: Optional[bool] = None, path: Optional[Union[str, Path]] = None) -> None:
+        """Change the level, turn the console echo on or off, or start writing events to a JSONL file."""
+        if level is not None:
+            self.level = level
+        if console is not None:
+            self.console = console
+        if path is not None:
+            self.close()
+            self.sink = JsonlSink(path)
+    
+    def enabled(self, event: LogEvent) -> bool:
+        """Whether an event of this kind would be recorded anywhere."""
+        return EVENT_LEVELS[event] >= self.level and (self.console or self.sink is not None)
+    
+    def log(self, event: LogEvent, **fields: Any) -> None:
+        """Record an event with its fields."""
+        level = EVENT_LEVELS[event]
+        if level < self.level:
+            return
+        
+        if self.console:
+            print(EVENT_MESSAGES[event].format(**fields))
+        if self.sink is not None:
+            self.sink.write({"time": time.time(), "level": level.name, "event": event.name, **fields})
+    
+    def close(self) -> None:
+        """Flush and close the file sink, if any."""
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+
+# Global event logger instance
+logger = EventLogger()
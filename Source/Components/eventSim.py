@@ -0,0 +1,309 @@
+import heapq
+import math
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Set, Any, Callable, Optional
+
+from minimetro import MiniMetro, STATION_MAX, MAX_LINES, UPGRADE_INTERVAL
+from station import Station, RIDER_SPAWN_INTERVAL
+from train import Train
+from typeEnums import SimEvent
+
+
+@dataclass
+class Leg:
+    """A train's run from rest to the next station, in ticks, used to place it between events."""
+    start_tick: int
+    arrival_tick: int
+    start_distance: float
+    target_distance: float
+    target_index: int
+    direction: float
+    acceleration: float
+    max_speed: float
+
+
+def travel(ticks: int, acceleration: float, max_speed: float) -> Tuple[float, float]:
+    """Distance covered and speed reached after some ticks from rest, accelerating each tick up to max_speed."""
+    ramp = int(max_speed / acceleration)
+    if ticks <= ramp:
+        return acceleration * ticks * (ticks + 1) / 2, acceleration * ticks
+    return acceleration * ramp * (ramp + 1) / 2 + (ticks - ramp) * max_speed, max_speed
+
+
+def ticks_to_cover(distance: float, acceleration: float, max_speed: float) -> int:
+    """Ticks from rest until a train is within half a tick of travel of a station `distance` away.
+
+    This is the arrival rule of the fixed-tick engine, solved in closed form.
+    """
+    ramp = int(max_speed / acceleration)
+    # While accelerating: a * k * (k + 1) / 2 + a * k / 2 >= distance
+    ticks = math.ceil(-1 + math.sqrt(1 + 2 * distance / acceleration))
+    if ticks > ramp:
+        ramped, _ = travel(ramp, acceleration, max_speed)
+        ticks = max(ramp + math.ceil((distance - ramped - max_speed / 2) / max_speed), ramp + 1)
+    return max(ticks, 1)
+
+
+class EventSimulation:
+    """Discrete-event core that jumps a headless MiniMetro from one event to the next instead of ticking at FPS.
+
+    Rider spawns, rider give-ups, station spawns, line upgrades, train arrivals and dwell ends are kept in a
+    priority queue keyed by simulation tick, so quiet stretches of the game cost nothing. Moving trains are only
+    placed on their line when sync_trains() is called (e.g. before rendering or building an observation).
+    A rider spawning at a station where trains are dwelling brings their next exchange forward to the next
+    tick, so it can board as it would in the fixed-tick engine.
+
+    Results match the fixed-tick engine statistically, not game for game: events due on the same tick can run
+    in a different order and so draw different random numbers, and trains do not dwell twice at the ends of
+    open lines. Passenger totals over several seeded games agree within 5%.
+    The wrapped game must not also be advanced with MiniMetro.step() while an EventSimulation drives it.
+    """
+
+    def __init__(self, metro: MiniMetro):
+        self.metro: MiniMetro = metro
+        self.clock = metro.sim_clock
+        self.queue: List[Tuple[int, int, SimEvent, Any]] = []
+        self.sequence: int = 0
+        self.events_processed: int = 0
+
+        self.legs: Dict[int, Leg] = {}
+        self.known_trains: Set[int] = set()
+        self.known_stations: int = 0
+        self.expiry_checks: Dict[int, int] = {}
+        self.dwell_checks: Dict[int, int] = {}              # Train id -> tick of its one live DwellEnd event
+        self.parked: Dict[int, Dict[int, Train]] = {}       # Station id -> trains dwelling there, by id
+        self.parked_at: Dict[int, int] = {}                 # Train id -> station id
+        self.station_spawn_pending: bool = False
+        self.upgrade_pending: bool = False
+
+        self.handlers: Dict[SimEvent, Callable[[Any], None]] = {
+            SimEvent.StationSpawn:  self._on_station_spawn,
+            SimEvent.RiderSpawn:    self._on_rider_spawn,
+            SimEvent.RiderGiveUp:   self._on_rider_give_up,
+            SimEvent.TrainArrival:  self._on_train_arrival,
+            SimEvent.DwellEnd:      self._on_dwell_end,
+            SimEvent.LineUpgrade:   self._on_line_upgrade,
+        }
+
+    def schedule(self, tick: int, kind: SimEvent, payload: Any = None) -> None:
+        """Queue an event at a tick (never in the past)."""
+        self.sequence += 1
+        heapq.heappush(self.queue, (max(tick, self.clock.ticks), self.sequence, kind, payload))
+
+    def next_event_time(self) -> Optional[float]:
+        """Get the simulation time of the next queued event, if any."""
+        self._adopt()
+        return self.clock.time_of(self.queue[0][0]) if self.queue else None
+
+    def advance(self, seconds: float) -> int:
+        """Advance the game by some simulated seconds. Returns the number of events handled."""
+        return self.run_until(self.clock.ticks + round(seconds / self.clock.dt))
+
+    def run_until(self, ticks: int) -> int:
+        """Handle every event up to a tick and leave the clock there. Returns the number of events handled."""
+        # Pick up stations and trains the player (or agent) added since the last call
+        self._adopt()
+
+        processed = 0
+        while self.queue and self.queue[0][0] <= ticks:
+            tick, _, kind, payload = heapq.heappop(self.queue)
+            self.clock.jump(tick)
+            self.handlers[kind](payload)
+            processed += 1
+
+        self.clock.jump(max(ticks, self.clock.ticks))
+        self.metro.tracker.sample(self.clock.now())
+        if self.metro.grapher.exporter:
+            self.metro.grapher.exporter.update(self.clock.now())
+        self.events_processed += processed
+        return processed
+
+    def sync_trains(self) -> None:
+        """Place moving trains at their interpolated position for the current tick."""
+        for train in self.metro.trains:
+            leg = self.legs.get(train.id)
+            if leg is None:
+                continue
+            ticks = min(self.clock.ticks, leg.arrival_tick) - leg.start_tick
+            distance, speed = travel(ticks, leg.acceleration, leg.max_speed)
+            train.distance_traveled = leg.start_distance + leg.direction * min(distance, abs(leg.target_distance - leg.start_distance))
+            train.speed = speed
+
+    def _adopt(self) -> None:
+        """Schedule events for stations and trains that have not been seen yet and restart idle event chains."""
+        for station in self.metro.stations[self.known_stations:]:
+            self.schedule(self.clock.tick_at(station.last_spawn_time + RIDER_SPAWN_INTERVAL), SimEvent.RiderSpawn, station)
+            self._schedule_expiry(station)
+        self.known_stations = len(self.metro.stations)
+
+        current_trains = set()
+        for train in self.metro.trains:
+            current_trains.add(train.id)
+            if train.id in self.known_trains:
+                continue
+            if train.at_station:
+                self._park(train, train.station_parked)
+                self._schedule_dwell(train, self.clock.ticks)
+            else:
+                # Trains caught between stations restart from rest where they are
+                self._start_leg(train)
+        self.known_trains = current_trains
+
+        self._schedule_station_spawn()
+        self._schedule_upgrade()
+
+    def _schedule_station_spawn(self) -> None:
+        metro = self.metro
+        if self.station_spawn_pending or len(metro.stations) >= STATION_MAX or metro.spawner.saturated:
+            return
+        self.station_spawn_pending = True
+        self.schedule(self.clock.tick_at(metro.last_spawn_time + metro.station_spawn_interval), SimEvent.StationSpawn)
+
+    def _schedule_upgrade(self) -> None:
+        metro = self.metro
+        if self.upgrade_pending or len(metro.lines_available) >= MAX_LINES:
+            return
+        self.upgrade_pending = True
+        self.schedule(self.clock.tick_at(metro.last_upgrade_time + UPGRADE_INTERVAL), SimEvent.LineUpgrade)
+
+    def _schedule_expiry(self, station: Station) -> None:
+        """Make sure a check is queued for when the most impatient rider at a station gives up."""
+        expiry = station.riders.next_expiry()
+        if expiry is None:
+            return
+        tick = self.clock.tick_after(expiry)
+        pending = self.expiry_checks.get(station.id)
+        if pending is None or tick < pending:
+            self.expiry_checks[station.id] = tick
+            self.schedule(tick, SimEvent.RiderGiveUp, station)
+
+    def _schedule_dwell(self, train: Train, tick: int) -> None:
+        """Queue a train's next dwell step, superseding any step queued before."""
+        tick = max(tick, self.clock.ticks)
+        self.dwell_checks[train.id] = tick
+        self.schedule(tick, SimEvent.DwellEnd, train)
+
+    def _park(self, train: Train, station: Station) -> None:
+        self.parked.setdefault(station.id, {})[train.id] = train
+        self.parked_at[train.id] = station.id
+
+    def _unpark(self, train: Train) -> None:
+        station_id = self.parked_at.pop(train.id, None)
+        if station_id is not None:
+            del self.parked[station_id][train.id]
+
+    def _wake_parked(self, station: Station) -> None:
+        """Bring the next dwell step of trains parked at a station forward to the next tick, as the fixed-tick engine exchanges every tick."""
+        for train in list(self.parked.get(station.id, {}).values()):
+            if train.slot < 0:
+                self._unpark(train)
+            elif self.dwell_checks.get(train.id, -1) > self.clock.ticks + 1:
+                self._schedule_dwell(train, self.clock.ticks + 1)
+
+    def _start_leg(self, train: Train) -> None:
+        """Send a train from rest towards the next station in its direction, reversing at the ends of open lines."""
+        self._unpark(train)
+        line = train.line
+        cumulative = line.cumulative
+        distance = train.distance_traveled
+        if line.circular and len(line.stations) > 2 and distance >= line.total_length:
+            distance = 0.0
+
+        target = -1
+        if train.forward:
+            target = bisect_right(cumulative, distance)
+            if target == len(cumulative):
+                train.forward = False
+        if not train.forward:
+            target = bisect_left(cumulative, distance) - 1
+            if target < 0:
+                train.forward = True
+                target = bisect_right(cumulative, distance)
+
+        train.at_station = False
+        train.speed = 0
+        train.distance_traveled = distance
+        start_tick = self.clock.ticks
+        arrival_tick = start_tick + ticks_to_cover(abs(cumulative[target] - distance), train.acceleration, train.max_speed)
+        self.legs[train.id] = Leg(
+            start_tick=start_tick,
+            arrival_tick=arrival_tick,
+            start_distance=distance,
+            target_distance=cumulative[target],
+            target_index=target,
+            direction=1.0 if train.forward else -1.0,
+            acceleration=train.acceleration,
+            max_speed=train.max_speed
+        )
+        self.schedule(arrival_tick, SimEvent.TrainArrival, train)
+
+    def _on_station_spawn(self, _: Any) -> None:
+        self.station_spawn_pending = False
+        metro = self.metro
+        if metro.should_auto_spawn() and len(metro.stations) < STATION_MAX and not metro.spawner.saturated:
+            metro.create_station()
+        self._adopt()
+
+    def _on_rider_spawn(self, station: Station) -> None:
+        station.last_spawn_time = self.clock.now()
+        if len(station.riders) < station.limit:
+            station.create_passenger()
+            self._schedule_expiry(station)
+            self._wake_parked(station)
+        self.schedule(self.clock.tick_at(station.last_spawn_time + RIDER_SPAWN_INTERVAL), SimEvent.RiderSpawn, station)
+
+    def _on_rider_give_up(self, station: Station) -> None:
+        # A check superseded by an earlier one has nothing left to do
+        if self.expiry_checks.get(station.id) != self.clock.ticks:
+            return
+        del self.expiry_checks[station.id]
+        station.expire_riders()
+        self._schedule_expiry(station)
+
+    def _on_train_arrival(self, train: Train) -> None:
+        leg = self.legs.pop(train.id, None)
+        if leg is None or train.slot < 0:
+            # The train was removed with its line while travelling
+            return
+
+        station_index = leg.target_index
+        distance = leg.target_distance
+        if station_index >= len(train.line.stations):
+            # Closing segment of a circular line: back to the start
+            station_index = 0
+            distance = 0.0
+
+        train.distance_traveled = distance
+        train.current_station_index = station_index
+        train.speed = 0
+        train._arrive_at_station(station_index)
+        self._park(train, train.station_parked)
+        # Riders are exchanged from the next tick on, as in the fixed-tick engine
+        self._schedule_dwell(train, self.clock.ticks + 1)
+
+    def _on_dwell_end(self, train: Train) -> None:
+        # A step superseded by an earlier one has nothing left to do
+        if self.dwell_checks.get(train.id) != self.clock.ticks:
+            return
+        del self.dwell_checks[train.id]
+        if train.slot < 0:
+            self._unpark(train)
+            return
+
+        if train.ready_to_depart(self.clock.now()):
+            self._start_leg(train)
+            return
+
+        train.exchange_riders()
+        # Transfers may have left riders at this station
+        self._schedule_expiry(train.station_parked)
+        self._schedule_dwell(train, max(self.clock.tick_at(train.departure_time()), self.clock.ticks + 1))
+
+    def _on_line_upgrade(self, _: Any) -> None:
+        self.upgrade_pending = False
+        metro = self.metro
+        if len(metro.lines_available) < MAX_LINES and self.clock.now() - metro.last_upgrade_time >= UPGRADE_INTERVAL:
+            metro._upgrade_lines()
+        self._schedule_upgrade()
@@ -0,0 +1,78 @@
+import numpy as np
+
+from typing import List, Sequence, Optional, Union, Any, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Design constants
+RANDOM_BATCH: int = 4096    # Uniform draws fetched from NumPy at a time
+
+Seed = Optional[Union[int, np.random.SeedSequence]]
+
+
+class GameRandom:
+    """Per-game random stream backed by a NumPy Generator.
+    
+    Uniform floats are drawn from NumPy in batches and handed out one at a time, so the many small draws the
+    game makes (station types, rider destinations, spawn sampling) stay cheap. spawn() derives independent
+    child streams, e.g. one per subsystem or per parallel environment, from the same seed.
+    """
+    
+    def __init__(self, seed: Seed = None):
+        self.seed_sequence: np.random.SeedSequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator: np.random.Generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.batch: List[float] = []
+        self.position: int = 0
+    
+    def spawn(self) -> "GameRandom":
+        """Get an independent child stream."""
+        return GameRandom(self.seed_sequence.spawn(1)[0])
+    
+    def random(self) -> float:
+        """Uniform float in [0, 1)."""
+        if self.position == len(self.batch):
+            self.batch = self.generator.random(RANDOM_BATCH).tolist()
+            self.position = 0
+        value = self.batch[self.position]
+        self.position += 1
+        return value
+    
+    def uniform(self, low: float, high: float) -> float:
+        """Uniform float in [low, high)."""
+        return low + (high - low) * self.random()
+    
+    def randrange(self, stop: int) -> int:
+        """Uniform int in [0, stop)."""
+        return int(self.random() * stop)
+    
+    def randint(self, low: int, high: int) -> int:
+        """Uniform int in [low, high], both ends included like random.randint."""
+        return low + int(self.random() * (high - low + 1))
+    
+    def choice(self, items: Sequence[T]) -> T:
+        """Uniformly chosen item of a non-empty sequence."""
+        return items[int(self.random() * len(items))]
+    
+    def shuffle(self, items: List[Any]) -> None:
+        """Shuffle a list in place (Fisher-Yates)."""
+        for i in range(len(items) - 1, 0, -1):
+            j = int(self.random() * (i + 1))
+            items[i], items[j] = items[j], items[i]
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Everything needed to continue this stream elsewhere."""
+        return {
+            "bit_generator": self.generator.bit_generator.state,
+            "batch": list(self.batch),
+            "position": self.position,
+        }
+    
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Continue from a state returned by get_state() (of this or another stream). Children spawned later are not affected."""
+        self.generator.bit_generator.state = state["bit_generator"]
+        self.batch = list(state["batch"])
+        self.position = state["position"]
+
+
+# Shared stream for objects created outside a game
+default_random = GameRandom()
@@ -0,0 +1,266 @@
+import numpy as np
+
+from dataclasses import dataclass, fields
+from typing import List, Tuple, Dict, Optional, Any, TYPE_CHECKING
+
+from station import Station
+from line import Line
+from train import Train
+from trainEngine import TrainEngine, TRAIN_FIELDS
+from router import Router
+from tracker import Tracker, MetricSeries, METRIC_COLUMNS
+from spatialGrid import Cell
+from typeEnums import StationType, TrainType
+
+if TYPE_CHECKING:
+    from minimetro import MiniMetro
+
+# Engine columns saved per train; the line slot is re-assigned when the train is re-added
+SAVED_TRAIN_FIELDS: List[str] = [name for name in TRAIN_FIELDS if name != "line_slot"]
+
+# Enum lookups by value, cheaper than calling the enum
+STATION_TYPES: Dict[int, StationType] = {type.value: type for type in StationType}
+TRAIN_TYPES: Dict[int, TrainType] = {type.value: type for type in TrainType}
+
+
+@dataclass
+class GameSnapshot:
+    """Compact copy of a game: objects are referred to by list index or id and per-object values are flat arrays.
+    
+    Snapshots never share mutable state with the game they came from, so one snapshot can be restored any number of times.
+    """
+    ticks: int
+    start_time: float
+    last_spawn_time: float
+    last_upgrade_time: float
+    station_spawn_interval: float
+    lines_available: List[Tuple[int, int, int]]
+    max_trains: int
+    train_quantity: int
+    selected_station: int               # Station index, or -1
+    selected_line: int                  # Line index, or -1
+    registry_sizes: Tuple[int, int, int]    # Ids handed out so far for stations, lines and trains
+    next_rider_id: int
+    
+    # Stations
+    station_ids: np.ndarray
+    station_xy: np.ndarray              # (n, 2) int
+    station_type: np.ndarray            # StationType values
+    station_spawn_time: np.ndarray
+    
+    # Riders, grouped by holder: every station in order, then every train in order
+    holder_counts: np.ndarray
+    rider_id: np.ndarray
+    rider_origin: np.ndarray            # Station id
+    rider_destination: np.ndarray       # StationType values
+    rider_spawn_time: np.ndarray
+    
+    # Lines, with their station indices concatenated
+    line_ids: np.ndarray
+    line_colors: List[Tuple[int, int, int]]
+    line_offsets: np.ndarray            # Start of each line in line_stations, plus the end
+    line_stations: np.ndarray
+    line_circular: np.ndarray
+    line_selected: np.ndarray
+    line_cells: List[List[List[Cell]]]  # Line grid cells of every segment, so restoring skips the geometry tests
+    
+    # Trains
+    train_ids: np.ndarray
+    train_line: np.ndarray              # Line index
+    train_type: np.ndarray              # TrainType values
+    train_state: Dict[str, np.ndarray]  # Engine columns
+    
+    tracker: Tracker
+    spawner_candidates: Optional[List[Tuple[int, int]]]
+    spawner_state: Any
+    random_state: Any
+
+
+def copy_tracker(tracker: Tracker, include_history: bool = False) -> Tracker:
+    """Copy a Tracker field by field; containers are copied one level down, which is all they nest."""
+    values = {}
+    for item in fields(Tracker):
+        value = getattr(tracker, item.name)
+        if isinstance(value, MetricSeries):
+            if include_history:
+                series = MetricSeries(value.columns, len(value.buffer))
+                series.buffer[:] = value.buffer
+                series.head, series.count = value.head, value.count
+                value = series
+            else:
+                value = MetricSeries(METRIC_COLUMNS)
+        elif isinstance(value, dict):
+            value = {key: set(inner) if isinstance(inner, set) else inner for key, inner in value.items()}
+        elif isinstance(value, set):
+            value = set(value)
+        values[item.name] = value
+    return Tracker(**values)
+
+
+def take_snapshot(metro: "MiniMetro", include_history: bool = False) -> GameSnapshot:
+    """Capture the state of a game. The metric history is left out unless include_history is set."""
+    station_index = {station.id: i for i, station in enumerate(metro.stations)}
+    line_index = {line.id: i for i, line in enumerate(metro.lines)}
+    
+    riders = [rider for station in metro.stations for rider in station.riders]
+    riders += [rider for train in metro.trains for rider in train.riders]
+    holder_counts = [len(station.riders) for station in metro.stations] + [len(train.riders) for train in metro.trains]
+    
+    line_stations = [station_index[station.id] for line in metro.lines for station in line.stations]
+    line_offsets = np.cumsum([0] + [len(line.stations) for line in metro.lines])
+    
+    engine = metro.train_engine
+    slots = np.array([train.slot for train in metro.trains], dtype=np.int64)
+    spawner = metro.spawner
+    
+    return GameSnapshot(
+        ticks=metro.sim_clock.ticks,
+        start_time=metro.start_time,
+        last_spawn_time=metro.last_spawn_time,
+        last_upgrade_time=metro.last_upgrade_time,
+        station_spawn_interval=metro.station_spawn_interval,
+        lines_available=list(metro.lines_available),
+        max_trains=metro.max_trains,
+        train_quantity=metro.train_quantity,
+        selected_station=station_index[metro.selected_station.id] if metro.selected_station else -1,
+        selected_line=line_index[metro.selected_line.id] if metro.selected_line else -1,
+        registry_sizes=(len(metro.station_registry), len(metro.line_registry), len(metro.train_registry)),
+        next_rider_id=metro.rider_pool.next_id,
+        
+        station_ids=np.array([station.id for station in metro.stations], dtype=np.int64),
+        station_xy=np.array([(station.x, station.y) for station in metro.stations], dtype=np.int64).reshape(-1, 2),
+        station_type=np.array([station.station_type.value for station in metro.stations], dtype=np.int8),
+        station_spawn_time=np.array([station.last_spawn_time for station in metro.stations]),
+        
+        holder_counts=np.array(holder_counts, dtype=np.int64),
+        rider_id=np.array([rider.id for rider in riders], dtype=np.int64),
+        rider_origin=np.array([rider.origin_id for rider in riders], dtype=np.int64),
+        rider_destination=np.array([rider.destination_type.value for rider in riders], dtype=np.int8),
+        rider_spawn_time=np.array([rider.spawn_time for rider in riders]),
+        
+        line_ids=np.array([line.id for line in metro.lines], dtype=np.int64),
+        line_colors=[line.color for line in metro.lines],
+        line_offsets=line_offsets,
+        line_stations=np.array(line_stations, dtype=np.int64),
+        line_circular=np.array([line.circular for line in metro.lines], dtype=np.bool_),
+        line_selected=np.array([line.selected for line in metro.lines], dtype=np.bool_),
+        line_cells=[[list(metro.line_grid.item_cells[(line.id, i)]) for i in range(len(line.segment_lengths))] for line in metro.lines],
+        
+        train_ids=np.array([train.id for train in metro.trains], dtype=np.int64),
+        train_line=np.array([line_index[train.line.id] for train in metro.trains], dtype=np.int64),
+        train_type=np.array([train.type.value for train in metro.trains], dtype=np.int8),
+        train_state={name: getattr(engine, name)[slots] for name in SAVED_TRAIN_FIELDS},
+        
+        tracker=copy_tracker(metro.tracker, include_history),
+        spawner_candidates=list(spawner._candidates) if spawner._candidates is not None else None,
+        spawner_state=spawner.rng.get_state(),
+        random_state=metro.rng.get_state(),
+    )
+
+
+def restore_snapshot(metro: "MiniMetro", snapshot: GameSnapshot, consume: bool = False) -> None:
+    """Replace the state of a game with a snapshot. Settings such as headless mode and the window are kept.
+    
+    With consume=True the game takes over the snapshot's containers instead of copying them, and the
+    snapshot must not be used again.
+    """
+    tracker = snapshot.tracker if consume else copy_tracker(snapshot.tracker, include_history=True)
+    metro.tracker = tracker
+    metro.grapher.tracker = tracker
+    metro.grapher.cached_version = -1
+    metro.grapher.shown_version = -1
+    
+    clock = metro.sim_clock
+    clock.jump(snapshot.ticks)
+    metro.start_time = snapshot.start_time
+    metro.last_spawn_time = snapshot.last_spawn_time
+    metro.last_upgrade_time = snapshot.last_upgrade_time
+    metro.station_spawn_interval = snapshot.station_spawn_interval
+    metro.lines_available = set(snapshot.lines_available)
+    metro.max_trains = snapshot.max_trains
+    metro.train_quantity = snapshot.train_quantity
+    
+    candidates = snapshot.spawner_candidates
+    metro.spawner.candidates = list(candidates) if candidates is not None and not consume else candidates
+    metro.spawner.rng.set_state(snapshot.spawner_state)
+    metro.rng.set_state(snapshot.random_state)
+    
+    station_count, line_count, train_count = snapshot.registry_sizes
+    metro.station_registry.reset(station_count)
+    metro.line_registry.reset(line_count)
+    metro.train_registry.reset(train_count)
+    
+    # Stations
+    stations = []
+    for station_id, (x, y), type, spawn_time in zip(snapshot.station_ids.tolist(), snapshot.station_xy.tolist(), snapshot.station_type.tolist(), snapshot.station_spawn_time.tolist()):
+        station = Station(x, y, STATION_TYPES[type], clock, metro.rider_pool, tracker, metro.rng)
+        metro.station_registry.insert(station, station_id)
+        station.last_spawn_time = spawn_time
+        stations.append(station)
+    
+    # Lines
+    lines = []
+    offsets = snapshot.line_offsets.tolist()
+    line_stations = snapshot.line_stations.tolist()
+    for i, (line_id, color) in enumerate(zip(snapshot.line_ids.tolist(), snapshot.line_colors)):
+        line = Line([stations[j] for j in line_stations[offsets[i]:offsets[i + 1]]], color)
+        metro.line_registry.insert(line, line_id)
+        line.selected = bool(snapshot.line_selected[i])
+        if snapshot.line_circular[i]:
+            line.circular = True
+            line._rebuild_geometry()
+        lines.append(line)
+    
+    # Trains, added without the tracker so capacities are not counted twice
+    metro.lines = lines
+    metro.router = Router(lines)
+    metro.train_engine = TrainEngine(clock, metro.router)
+    trains = []
+    for i, (train_id, line, type) in enumerate(zip(snapshot.train_ids.tolist(), snapshot.train_line.tolist(), snapshot.train_type.tolist())):
+        train = Train(lines[line], metro.train_engine, metro.rider_pool, TRAIN_TYPES[type])
+        metro.train_registry.insert(train, train_id)
+        train.tracker = tracker
+        for name in SAVED_TRAIN_FIELDS:
+            getattr(metro.train_engine, name)[train.slot] = snapshot.train_state[name][i]
+        trains.append(train)
+    
+    # Riders
+    holders = [station.riders.riders for station in stations] + [train.riders for train in trains]
+    rider = 0
+    rider_ids = snapshot.rider_id.tolist()
+    origins = snapshot.rider_origin.tolist()
+    destinations = snapshot.rider_destination.tolist()
+    spawn_times = snapshot.rider_spawn_time.tolist()
+    for holder, count in zip(holders, snapshot.holder_counts.tolist()):
+        for _ in range(count):
+            record = metro.rider_pool.acquire(origins[rider], STATION_TYPES[destinations[rider]], spawn_times[rider])
+            record.id = rider_ids[rider]
+            holder.append(record)
+            rider += 1
+    metro.rider_pool.next_id = snapshot.next_rider_id
+    for station in stations:
+        station.riders.recount()
+    
+    metro.stations = stations
+    metro.trains = trains
+    metro.selected_station = stations[snapshot.selected_station] if snapshot.selected_station >= 0 else None
+    metro.selected_line = lines[snapshot.selected_line] if snapshot.selected_line >= 0 else None
+    
+    # Spatial indexes
+    metro.station_grid.cells.clear()
+    metro.station_grid.item_cells.clear()
+    for station in stations:
+        metro.station_grid.insert_point(station.id, station, station.x, station.y)
+    metro.line_grid.cells.clear()
+    metro.line_grid.item_cells.clear()
+    metro.line_segment_counts.clear()
+    metro.line_endpoints.clear()
+    metro.endpoint_counts.clear()
+    for line, segment_cells in zip(lines, snapshot.line_cells):
+        for i, cells in enumerate(segment_cells):
+            metro.line_grid._add((line.id, i), (line, i), list(cells))
+        metro.line_segment_counts[line.id] = len(segment_cells)
+        metro._index_endpoints(line)
+    
+    metro.action_masks.rebuild(metro)
+    metro.static_key = None
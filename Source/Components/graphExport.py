@@ -0,0 +1,225 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from dataclasses import dataclass
+from html import escape
+from itertools import count
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Union, Iterable
+
+from tracker import Tracker
+from eventLog import logger
+from typeEnums import LogEvent
+
+# Design constants
+EXPORT_INTERVAL: float          = 10.0  # Simulation seconds between exports of a changed graph
+EXPORT_QUEUE_SIZE: int          = 64
+EXPORT_CLOSE_TIMEOUT: float     = 5.0   # Seconds close() waits for the worker before giving up on it
+EXPORT_FORMATS: Tuple[str, ...] = ("json", "dot", "graphml", "svg", "html")
+EXPORT_PREFIX: str               = "service_graph"
+
+# Visual constants, matching the Mermaid class definitions
+NODE_FILL: Dict[str, str] = {
+    "station":  "#E3F2FD",
+    "line":     "#F3E5F5",
+    "service":  "#E8F5E9",
+}
+NODE_STROKE: Dict[str, str] = {
+    "station":  "#1565C0",
+    "line":     "#6A1B9A",
+    "service":  "#2E7D32",
+}
+SVG_ROW_HEIGHT: int     = 36
+SVG_COLUMN_WIDTH: int   = 220
+SVG_NODE_WIDTH: int     = 150
+SVG_NODE_HEIGHT: int    = 24
+
+
+@dataclass
+class ServiceGraph:
+    """Plain-data copy of the service graph, safe to hand to another thread."""
+    version: int
+    time: float
+    services: List[str]
+    stations: List[Tuple[int, List[str]]]
+    lines: List[Tuple[int, List[str]]]
+    
+    @classmethod
+    def from_tracker(cls, tracker: Tracker, time: float) -> "ServiceGraph":
+        services = set()
+        for types in tracker.station_service_dict.values():
+            services |= types
+        for types in tracker.line_service_dict.values():
+            services |= types
+        
+        def names(types: Iterable) -> List[str]:
+            return [service.name for service in sorted(types, key=lambda service: service.value)]
+        
+        return cls(
+            version=tracker.version,
+            time=time,
+            services=names(services),
+            stations=[(station_id, names(types)) for station_id, types in tracker.station_service_dict.items()],
+            lines=[(line_id, names(types)) for line_id, types in tracker.line_service_dict.items()],
+        )
+    
+    def nodes(self) -> List[Tuple[str, str, str]]:
+        """Every node as (node id, label, kind)."""
+        nodes = [(f"service_{name}", name, "service") for name in self.services]
+        nodes += [(f"station_{node}", f"Station {node}", "station") for node, _ in self.stations]
+        nodes += [(f"line_{node}", f"Line {node}", "line") for node, _ in self.lines]
+        return nodes
+    
+    def edges(self) -> List[Tuple[str, str]]:
+        """Every station/line to service type edge as (source id, target id)."""
+        edges = [(f"station_{node}", f"service_{name}") for node, types in self.stations for name in types]
+        edges += [(f"line_{node}", f"service_{name}") for node, types in self.lines for name in types]
+        return edges
+    
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": self.version,
+            "time": self.time,
+            "services": self.services,
+            "stations": [{"id": node, "services": types} for node, types in self.stations],
+            "lines": [{"id": node, "services": types} for node, types in self.lines],
+        }, indent=2)
+    
+    def to_dot(self) -> str:
+        lines = ["digraph service_graph {", "  rankdir=LR;", "  node [shape=box, style=filled];"]
+        for node, label, kind in self.nodes():
+            lines.append(f'  "{node}" [label="{label}", fillcolor="{NODE_FILL[kind]}", color="{NODE_STROKE[kind]}"];')
+        for source, target in self.edges():
+            lines.append(f'  "{source}" -> "{target}";')
+        lines.append("}")
+        return "\n".join(lines)
+    
+    def to_graphml(self) -> str:
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+            '  <key id="label" for="node" attr.name="label" attr.type="string"/>',
+            '  <key id="kind" for="node" attr.name="kind" attr.type="string"/>',
+            '  <graph id="service_graph" edgedefault="directed">',
+        ]
+        for node, label, kind in self.nodes():
+            lines.append(f'    <node id="{escape(node)}"><data key="label">{escape(label)}</data><data key="kind">{kind}</data></node>')
+        for i, (source, target) in enumerate(self.edges()):
+            lines.append(f'    <edge id="e{i}" source="{escape(source)}" target="{escape(target)}"/>')
+        lines += ["  </graph>", "</graphml>"]
+        return "\n".join(lines)
+    
+    def to_svg(self) -> str:
+        """Three-column drawing (stations, service types, lines) that needs no layout engine or network access."""
+        columns = {
+            "station":  [(f"station_{node}", f"Station {node}") for node, _ in self.stations],
+            "service":  [(f"service_{name}", name) for name in self.services],
+            "line":     [(f"line_{node}", f"Line {node}") for node, _ in self.lines],
+        }
+        positions: Dict[str, Tuple[int, int]] = {}
+        for column, kind in enumerate(("station", "service", "line")):
+            for row, (node, _) in enumerate(columns[kind]):
+                positions[node] = (20 + column * SVG_COLUMN_WIDTH, 20 + row * SVG_ROW_HEIGHT)
+        
+        width = 40 + 2 * SVG_COLUMN_WIDTH + SVG_NODE_WIDTH
+        height = 40 + max([len(nodes) for nodes in columns.values()] + [1]) * SVG_ROW_HEIGHT
+        parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">']
+        for source, target in self.edges():
+            (x1, y1), (x2, y2) = positions[source], positions[target]
+            # Stations sit left of the service column and lines right of it
+            sx = x1 + SVG_NODE_WIDTH if x1 < x2 else x1
+            tx = x2 if x1 < x2 else x2 + SVG_NODE_WIDTH
+            parts.append(f'<line x1="{sx}" y1="{y1 + SVG_NODE_HEIGHT // 2}" x2="{tx}" y2="{y2 + SVG_NODE_HEIGHT // 2}" stroke="#999"/>')
+        for kind, nodes in columns.items():
+            for node, label in nodes:
+                x, y = positions[node]
+                parts.append(f'<rect x="{x}" y="{y}" width="{SVG_NODE_WIDTH}" height="{SVG_NODE_HEIGHT}" rx="4" fill="{NODE_FILL[kind]}" stroke="{NODE_STROKE[kind]}" stroke-width="2"/>')
+                parts.append(f'<text x="{x + 8}" y="{y + 16}">{escape(label)}</text>')
+        parts.append("</svg>")
+        return "\n".join(parts)
+    
+    def to_html(self) -> str:
+        return f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8" /><title>Metro Service Map v{self.version}</title></head>\n<body>\n{self.to_svg()}\n</body>\n</html>\n'
+
+
+# Numbers the exporters started in this process, for default file prefixes
+_exporter_numbers = count()
+
+
+class GraphExporter:
+    """Writes the service graph to local files from a background thread, at most once per interval.
+    
+    update() is meant to be called every tick: it only copies the graph (on the calling thread) when the
+    tracker version changed and the interval has passed, and the formatting and disk I/O happen on the worker.
+    
+    Without a prefix, file names start with the start time, process id and a per-process counter, so games
+    exporting to the same directory (VectorEnv workers, a restarted game) never overwrite each other's files.
+    A file that can not be written is logged and counted in failed; the worker carries on with the next one.
+    """
+    
+    def __init__(self, tracker: Tracker, directory: Union[str, Path], interval: float = EXPORT_INTERVAL, formats: Iterable[str] = EXPORT_FORMATS, prefix: Optional[str] = None):
+        self.tracker: Tracker = tracker
+        self.directory: Path = Path(directory)
+        self.interval: float = interval
+        self.formats: Tuple[str, ...] = tuple(formats)
+        self.prefix: str = prefix if prefix is not None else f"{EXPORT_PREFIX}_{int(time.time() * 1000)}_{os.getpid()}_{next(_exporter_numbers)}"
+        
+        unknown = set(self.formats) - set(EXPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export formats: {sorted(unknown)}")
+        
+        self.exported_version: int = -1
+        self.last_export_time: Optional[float] = None
+        self.exports: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pending: "queue.Queue[Optional[ServiceGraph]]" = queue.Queue(EXPORT_QUEUE_SIZE)
+        self.thread: threading.Thread = threading.Thread(target=self._run, name="graph-export", daemon=True)
+        self.thread.start()
+    
+    def update(self, now: float) -> None:
+        """Queue an export if the graph changed and the interval has passed."""
+        if self.tracker.version == self.exported_version:
+            return
+        if self.last_export_time is not None and now - self.last_export_time < self.interval:
+            return
+        self.export(now)
+    
+    def export(self, now: float) -> None:
+        """Queue an export of the current graph right away."""
+        self.exported_version = self.tracker.version
+        self.last_export_time = now
+        try:
+            self.pending.put_nowait(ServiceGraph.from_tracker(self.tracker, now))
+        except queue.Full:
+            self.dropped += 1
+    
+    def close(self) -> None:
+        """Finish writing queued exports and stop the worker, waiting at most EXPORT_CLOSE_TIMEOUT for each step."""
+        if not self.thread.is_alive():
+            return
+        try:
+            self.pending.put(None, timeout=EXPORT_CLOSE_TIMEOUT)
+        except queue.Full:
+            return
+        self.thread.join(EXPORT_CLOSE_TIMEOUT)
+    
+    def _run(self) -> None:
+        while True:
+            graph = self.pending.get()
+            if graph is None:
+                break
+            for extension in self.formats:
+                text = getattr(graph, f"to_{extension}")()
+                path = self.directory / f"{self.prefix}_{self.exports:05d}_v{graph.version}.{extension}"
+                try:
+                    path.write_text(text, encoding="utf-8")
+                except OSError as error:
+                    self.failed += 1
+                    logger.log(LogEvent.ExportError, path=str(path), error=error)
+            self.exports += 1
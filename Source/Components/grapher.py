@@ -1,8 +1,14 @@
-from tracker import Tracker
-import webbrowser
+import importlib.util
+import multiprocessing
+
+from multiprocessing.process import BaseProcess
 from pathlib import Path
-import time
-import webview
+from typing import Optional, List, Union, Iterable
+
+from tracker import Tracker
+from graphExport import GraphExporter, EXPORT_INTERVAL, EXPORT_FORMATS
+from eventLog import logger
+from typeEnums import LogEvent
 
 
 HTML_TEMPLATE = """<!DOCTYPE html>
@@ -22,12 +28,48 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
+def build_html(mermaid_code: str) -> str:
+	"""Wrap a diagram in the viewer page (the template's braces are JavaScript, so no str.format)."""
+	return HTML_TEMPLATE.replace("{diagram}", mermaid_code)
+
+def _viewer(updates: "multiprocessing.Queue") -> None:
+	"""Viewer process: show the diagram in a webview window and reload it whenever new text arrives."""
+	import webview
+
+	window = webview.create_window("Metro Service Map", html=build_html(updates.get()))
+
+	def poll() -> None:
+		while True:
+			mermaid_code = updates.get()
+			# Only the newest diagram matters
+			while not updates.empty():
+				mermaid_code = updates.get()
+			if mermaid_code is None:
+				window.destroy()
+				return
+			window.load_html(build_html(mermaid_code))
+
+	webview.start(poll)
+
 class Grapher:
+	"""Mermaid service graph of a Tracker, regenerated only when the tracker's version changes."""
     
 	def __init__(self, tracker: Tracker):
 		self.tracker = tracker
+		self.cached_version: int = -1
+		self.cached_text: str = ""
+
+		self.shown_version: int = -1
+		self.window_open: bool = False
+		self.viewer: Optional[BaseProcess] = None
+		self.updates: Optional["multiprocessing.Queue"] = None
+		self.viewer_available: Optional[bool] = None
+		self.exporter: Optional[GraphExporter] = None
 
 	def tracker_to_mermaid(self) -> str:
+		if self.cached_version == self.tracker.version:
+			return self.cached_text
+
 		lines = ["graph TD"]
 
 		# ---- Style definitions ----
@@ -37,36 +79,86 @@ class Grapher:
 
 		# ---- Service nodes ----
 		service_nodes = set()
-		for services in (
-			list(self.tracker.station_service_dict.values())
-			+ list(self.tracker.line_service_dict.values())
-		):
+		for services in self.tracker.station_service_dict.values():
+			service_nodes |= services
+		for services in self.tracker.line_service_dict.values():
 			service_nodes |= services
 
-		for service in service_nodes:
+		for service in sorted(service_nodes, key=lambda service: service.value):
 			lines.append(f"SERVICE_{service.name}[{service.name}]")
 			lines.append(f"class SERVICE_{service.name} service")
 
 		# ---- Station nodes ----
 		for station_id, services in self.tracker.station_service_dict.items():
-			sid = f"ST_{station_id.hex[:6]}"
-			lines.append(f"{sid}[Station {station_id.hex[:4]}]")
-			lines.append(f"class {sid} station")
-
-			for service in services:
-				lines.append(f"{sid} --> SERVICE_{service.name}")
+			lines.extend(self._node_lines(f"ST_{station_id}", f"Station {station_id}", "station", services))
 
 		# ---- Line nodes ----
 		for line_id, services in self.tracker.line_service_dict.items():
-			lid = f"LN_{line_id.hex[:6]}"
-			lines.append(f"{lid}[Line {line_id.hex[:4]}]")
-			lines.append(f"class {lid} line")
-
-			for service in services:
-				lines.append(f"{lid} --> SERVICE_{service.name}")
-
-		return "\n".join(lines)
-	def show_mermaid_app(mermaid_code: str):
-		html = HTML_TEMPLATE.format(diagram=mermaid_code)
-		webview.create_window("Metro Service Map", html=html)
-		webview.start()
+			lines.extend(self._node_lines(f"LN_{line_id}", f"Line {line_id}", "line", services))
+
+		self.cached_text = "\n".join(lines)
+		self.cached_version = self.tracker.version
+		return self.cached_text
+
+	def _node_lines(self, node_id: str, label: str, node_class: str, services) -> List[str]:
+		lines = [f"{node_id}[{label}]", f"class {node_id} {node_class}"]
+		for service in services:
+			lines.append(f"{node_id} --> SERVICE_{service.name}")
+		return lines
+
+	def open_window(self) -> None:
+		"""Ask for the viewer window; it is started by the next render_mermaid_window()."""
+		self.window_open = True
+		self.shown_version = -1
+
+	def toggle_window(self) -> None:
+		if self.window_open:
+			self._close_viewer()
+		else:
+			self.open_window()
+
+	def render_mermaid_window(self) -> None:
+		"""Send the diagram to the viewer window if it was opened and the graph changed. Cheap enough to call every tick.
+
+		The window runs in its own process (webview needs the main thread of whatever process owns it),
+		so the game loop never blocks on it. Without pywebview installed this does nothing.
+		"""
+		if not self.window_open or self.shown_version == self.tracker.version:
+			return
+		self.shown_version = self.tracker.version
+
+		if self.viewer_available is None:
+			self.viewer_available = importlib.util.find_spec("webview") is not None
+			if not self.viewer_available:
+				logger.log(LogEvent.ResourceError, resource="service map window", error="pywebview is not installed")
+		if not self.viewer_available:
+			return
+
+		if self.viewer is None:
+			context = multiprocessing.get_context("spawn")
+			self.updates = context.Queue()
+			self.viewer = context.Process(target=_viewer, args=(self.updates,), daemon=True)
+			self.viewer.start()
+		self.updates.put(self.tracker_to_mermaid())
+
+	def export_to(self, directory: Union[str, Path], interval: float = EXPORT_INTERVAL, formats: Iterable[str] = EXPORT_FORMATS, prefix: Optional[str] = None) -> GraphExporter:
+		"""Start writing the graph to local files (offline, no window) at most once per interval of simulation time."""
+		if self.exporter is not None:
+			self.exporter.close()
+		self.exporter = GraphExporter(self.tracker, directory, interval, formats, prefix)
+		return self.exporter
+
+	def close(self) -> None:
+		"""Close the viewer window and finish pending exports, if any."""
+		if self.exporter is not None:
+			self.exporter.close()
+			self.exporter = None
+		self._close_viewer()
+
+	def _close_viewer(self) -> None:
+		self.window_open = False
+		if self.viewer is not None:
+			self.updates.put(None)
+			self.viewer.join(timeout=1.0)
+			self.viewer = None
+			self.updates = None
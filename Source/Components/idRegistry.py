@@ -0,0 +1,49 @@
+from typing import List, Optional, Iterator, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class IdRegistry(Generic[T]):
+    """Hands out dense integer ids and maps them back to objects in O(1).
+    
+    Ids are list positions and are never reused within a game, so anything still keyed by the id of a
+    deleted object can not be mistaken for a newer one.
+    """
+    
+    def __init__(self):
+        self.objects: List[Optional[T]] = []
+    
+    def __len__(self) -> int:
+        """Number of ids handed out so far (including those of removed objects)."""
+        return len(self.objects)
+    
+    def __iter__(self) -> Iterator[T]:
+        return (item for item in self.objects if item is not None)
+    
+    def add(self, item: T) -> int:
+        """Give an object the next id (stored as item.id) and return it."""
+        item.id = len(self.objects)
+        self.objects.append(item)
+        return item.id
+    
+    def insert(self, item: T, id: int) -> None:
+        """Register an object under an id it already has, e.g. when restoring a snapshot."""
+        if id >= len(self.objects):
+            self.objects.extend([None] * (id + 1 - len(self.objects)))
+        item.id = id
+        self.objects[id] = item
+    
+    def get(self, id: int) -> Optional[T]:
+        """Get the live object with an id, or None."""
+        if 0 <= id < len(self.objects):
+            return self.objects[id]
+        return None
+    
+    def remove(self, id: int) -> None:
+        """Forget the object with an id; the id is not handed out again."""
+        if 0 <= id < len(self.objects):
+            self.objects[id] = None
+    
+    def reset(self, size: int = 0) -> None:
+        """Drop every object, continuing numbering at size."""
+        self.objects = [None] * size
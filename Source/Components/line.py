@@ -1,11 +1,14 @@
 import pygame
+import math
+
+from bisect import bisect_right
 
-from random import randint
 from typing import List, Tuple, Set, Optional
-from uuid import uuid1, UUID
 
-from typeEnums import StationType
+from typeEnums import StationType, LogEvent
 from station import Station
+from gameRandom import GameRandom, default_random
+from eventLog import logger
 
 # Visual constants
 LINE_COLORS: List[Tuple[int, int, int]] = [
@@ -21,16 +24,24 @@ LINE_WIDTH: int = 10
 class Line:
     """Represents a metro line connecting multiple stations."""
     
-    def __init__(self, stations: List[Station], color: Optional[Tuple[int, int, int]] = None):
+    def __init__(self, stations: List[Station], color: Optional[Tuple[int, int, int]] = None, rng: Optional[GameRandom] = None):
         if len(stations) < 2:
             raise ValueError("Line must connect at least 2 stations")
         
         self.stations: List[Station] = stations
-        self.color: Tuple[int, int, int] = color if color else LINE_COLORS[randint(0, len(LINE_COLORS) - 1)]
+        self.color: Tuple[int, int, int] = color if color else (rng if rng else default_random).choice(LINE_COLORS)
         self.width: int = LINE_WIDTH
-        self.id: UUID = uuid1()
+        self.id: int = -1    # Assigned by the game's line registry
         self.circular: bool = False
         self.selected: bool = False
+        
+        # Segment geometry, rebuilt only when the station list or circularity changes
+        self.version: int = 0
+        self.segment_lengths: List[float] = []
+        self.cumulative: List[float] = []
+        self.directions: List[Tuple[float, float]] = []
+        self.angles: List[float] = []
+        self._rebuild_geometry()
     
     @property
     def origin(self) -> Station:
@@ -42,6 +53,52 @@ class Line:
         """Get the last station on the line."""
         return self.stations[-1]
     
+    @property
+    def total_length(self) -> float:
+        """Get the length of the whole line, including the closing segment of circular lines."""
+        return self.cumulative[-1]
+    
+    def _rebuild_geometry(self) -> None:
+        """Recompute segment lengths, cumulative offsets, unit directions and angles, and bump the version."""
+        points = [(station.x, station.y) for station in self.stations]
+        if self.circular and len(self.stations) > 2:
+            points.append(points[0])
+        
+        self.segment_lengths = []
+        self.cumulative = [0.0]
+        self.directions = []
+        self.angles = []
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            dx = x2 - x1
+            dy = y2 - y1
+            length = math.sqrt(dx * dx + dy * dy)
+            self.segment_lengths.append(length)
+            self.cumulative.append(self.cumulative[-1] + length)
+            self.directions.append((dx / length, dy / length) if length else (0.0, 0.0))
+            self.angles.append(math.degrees(math.atan2(dy, dx)))
+        
+        self.version += 1
+    
+    def segment_at(self, distance: float) -> int:
+        """Get the index of the segment containing the given distance along the line (O(log n))."""
+        index = bisect_right(self.cumulative, distance) - 1
+        return max(0, min(index, len(self.segment_lengths) - 1))
+    
+    def position_at(self, distance: float) -> Tuple[int, int]:
+        """Get the screen position at the given distance along the line."""
+        if self.total_length == 0:
+            return (self.stations[0].x, self.stations[0].y)
+        
+        segment = self.segment_at(distance)
+        origin = self.stations[segment]
+        destination = self.stations[(segment + 1) % len(self.stations)]
+        segment_length = self.segment_lengths[segment]
+        if segment_length == 0:
+            return (origin.x, origin.y)
+        
+        t = (distance - self.cumulative[segment]) / segment_length
+        return (int(origin.x + t * (destination.x - origin.x)), int(origin.y + t * (destination.y - origin.y)))
+    
     def get_station_types(self) -> Set[StationType]:
         """Get all unique station types on this line."""
         return {station.station_type for station in self.stations}
@@ -51,13 +108,14 @@ class Line:
         # Check if connecting to first station (circular line)
         if len(self.stations) > 2 and station.id == self.stations[0].id:
             self.circular = True
-            print(f"Line {self.id} is now circular")
+            self._rebuild_geometry()
+            logger.log(LogEvent.LineCircular, line=self.id)
             return True
         
         # Prevent adding station that's already in the middle of the line
         for i, existing_station in enumerate(self.stations[:-1]):
             if station.id == existing_station.id:
-                print(f"Cannot add station - would create cycle in middle of line")
+                logger.log(LogEvent.LineCycleRejected)
                 return False
         
         # Allow re-adding the last station (extending from endpoint)
@@ -65,12 +123,14 @@ class Line:
             return False
         
         self.stations.append(station)
+        self._rebuild_geometry()
         return True
     
     def make_circular(self) -> None:
         """Make the line circular (trains loop back to start). Only works if 3+ stations."""
         if len(self.stations) >= 3:
             self.circular = True
+            self._rebuild_geometry()
     
     def render(self, screen: pygame.Surface) -> None:
         """Render the line segments connecting all stations."""
@@ -1,67 +1,108 @@
+import time
 import pygame
-import random
 
-from random import choice, randint
+from pathlib import Path
+from typing import Optional
 
 import minimetro
 
-from typeEnums import TrainType, GameSpeed
+from typeEnums import TrainType, GameSpeed, LogEvent, PlayerAction
+from eventLog import logger
+from profiler import profiler
+from replay import ReplayRecorder
+from gameRandom import GameRandom
 
 # Design constants
 START_STATIONS: int = 3
+SEED: Optional[int] = None      # Set to replay the same game
+PROFILE: bool = False           # Time subsystems from the start (F3 toggles the overlay at any time)
+PROFILE_PATH: str = "profile"   # F4 writes profile.json and profile.csv
+RECORD_DIR: Optional[str] = None    # Set to save a replay of every game played into this directory
 
-metro: minimetro.MiniMetro = minimetro.MiniMetro()
-# speed: GameSpeed = GameSpeed.Regular
 
+def start_recording(game: minimetro.MiniMetro) -> Optional[ReplayRecorder]:
+    if RECORD_DIR is None:
+        return None
+    Path(RECORD_DIR).mkdir(parents=True, exist_ok=True)
+    return ReplayRecorder(game, Path(RECORD_DIR) / f"session-{int(time.time() * 1000)}.mmr")
+
+
+# Everything that opens a window stays under the main guard: spawned child processes (the service map
+# viewer) import this module too
 if __name__ == "__main__":
+    profiler.configure(enabled=PROFILE)
+    metro: minimetro.MiniMetro = minimetro.MiniMetro(seed=SEED)
+    speed: GameSpeed = GameSpeed.Regular
+    # Random picks made on the player's behalf (train type, rider station); replays store the outcome
+    input_rng: GameRandom = metro.rng.spawn()
+    recorder: Optional[ReplayRecorder] = start_recording(metro)
     for _ in range(START_STATIONS):
-        metro.create_station()
+        metro.perform(PlayerAction.CreateStation)
     
     running: bool = True
     paused: bool = False
     
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_s:
-                    metro.create_station()
-                elif event.key == pygame.K_ESCAPE:
-                    paused = not paused
-                elif event.key == pygame.K_t:
-                    if metro.lines:
-                        if metro.train_quantity < metro.max_trains and metro.selected_line:
-                            metro.trains.append(minimetro.Train(metro.selected_line, TrainType(randint(0, len(TrainType) - 1))))
-                            metro.train_quantity += 1
-                            print(f"Created train on line (Total: {len(metro.trains)})")
-                        else:
-                            print("No trains available")
-                elif event.key == pygame.K_p:
-                    if metro.stations:
-                        choice(metro.stations).create_passenger()
-                elif event.key == pygame.K_r:
-                    metro = minimetro.MiniMetro()
-                    for _ in range(START_STATIONS):
-                        metro.create_station()
-                # elif event.key == pygame.K_SPACE:
-                #     if speed == GameSpeed.Regular:
-                #         metro.station_spawn_interval *= 0.5
-                #         speed = GameSpeed.TwoStep
-                #     elif speed == GameSpeed.TwoStep:
-                #         metro.station_spawn_interval *= 0.5
-                #         speed = GameSpeed.FourStep
-                #     elif speed == GameSpeed.FourStep:
-                #         metro.station_spawn_interval *= 4
-                #         speed = GameSpeed.Regular
+        with profiler.section("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_s:
+                        metro.perform(PlayerAction.CreateStation)
+                    elif event.key == pygame.K_ESCAPE:
+                        paused = not paused
+                    elif event.key == pygame.K_t:
+                        if metro.lines:
+                            if metro.selected_line and metro.perform(PlayerAction.AddTrain, metro.selected_line.id, input_rng.randint(0, len(TrainType) - 1)):
+                                logger.log(LogEvent.TrainCreated, count=len(metro.trains))
+                            else:
+                                logger.log(LogEvent.NoTrainsAvailable)
+                    elif event.key == pygame.K_p:
+                        if metro.stations:
+                            metro.perform(PlayerAction.SpawnRider, input_rng.choice(metro.stations).id)
+                    elif event.key == pygame.K_r:
+                        metro.grapher.close()
+                        if recorder:
+                            recorder.close()
+                        metro = minimetro.MiniMetro(seed=SEED)
+                        input_rng = metro.rng.spawn()
+                        recorder = start_recording(metro)
+                        for _ in range(START_STATIONS):
+                            metro.perform(PlayerAction.CreateStation)
+                    elif event.key == pygame.K_SPACE:
+                        if speed == GameSpeed.Regular:
+                            speed = GameSpeed.TwoStep
+                        elif speed == GameSpeed.TwoStep:
+                            speed = GameSpeed.FourStep
+                        elif speed == GameSpeed.FourStep:
+                            speed = GameSpeed.Regular
+                    elif event.key == pygame.K_g:
+                        metro.grapher.toggle_window()
+                    elif event.key == pygame.K_F3:
+                        profiler.toggle_overlay()
+                    elif event.key == pygame.K_F4:
+                        profiler.dump_json(f"{PROFILE_PATH}.json")
+                        profiler.dump_csv(f"{PROFILE_PATH}.csv")
                         
-            elif event.type == pygame.MOUSEBUTTONUP:
-                pos = pygame.mouse.get_pos()
-                metro.check_location(pos)
+                elif event.type == pygame.MOUSEBUTTONUP:
+                    x, y = pygame.mouse.get_pos()
+                    metro.perform(PlayerAction.Click, x, y)
         
         if not paused:
-            metro.update()
-            metro.render()
-            metro.clock.tick(minimetro.FPS)
+            with profiler.section("update"):
+                # Fast-forward runs extra fixed-dt simulation ticks per frame
+                for _ in range(speed.value - 1):
+                    metro.step()
+                metro.update()
+            with profiler.section("render"):
+                metro.render()
+            # Time spent waiting for the next frame, so a frame's sections add up to its wall time
+            with profiler.section("clock.tick"):
+                metro.clock.tick(minimetro.FPS)
+        profiler.end_frame()
     
+    metro.grapher.close()
+    if recorder:
+        recorder.close()
     pygame.quit()
\ No newline at end of file
@@ -1,19 +1,34 @@
 import pygame
-import time
 import math
 
+import numpy as np
+
 from pygame.math import Vector2
-from random import randint
-from typing import List, Optional, Tuple, Dict, Set
-from uuid import UUID
+from typing import List, Optional, Tuple, Dict, Set, TYPE_CHECKING
 
 from station import Station
 from line import Line
 from train import Train
+from rider import RiderPool
+from trainEngine import TrainEngine
+from router import Router
 from tracker import Tracker
 from grapher import Grapher
-from typeEnums import StationType
+from simClock import SimClock
+from idRegistry import IdRegistry
+from actionMasks import ActionMasks
+from gameRandom import GameRandom, Seed
+from spatialGrid import SpatialGrid, distance_to_segment
+from stationSpawner import StationSpawner
+from typeEnums import StationType, TrainType, LogEvent, PlayerAction
 from resourceManager import resources
+from textCache import TextCache
+from gameState import GameSnapshot, take_snapshot, restore_snapshot
+from eventLog import logger
+from profiler import profiler
+
+if TYPE_CHECKING:
+    from replay import ReplayRecorder
 
 # Fixed constants
 WIDTH: int      = 1000
@@ -29,6 +44,8 @@ CLICK_SPACING: int              = 20
 STATION_MAX: int                = 100
 UPGRADE_INTERVAL: int           = 1
 MAX_LINES: int                  = 8
+LINE_CLICK_TOLERANCE: int       = 10
+LINE_GRID_CELL: int             = 50
 
 # Visual constants
 COLORS: Dict[str, Tuple[int, int, int]] = {
@@ -46,19 +63,42 @@ LINE_COLOR_PADDING: int = 10
 
 
 class MiniMetro:
-    """Main game class for MiniMetro simulation."""
+    """Main game class for MiniMetro simulation.
+    
+    When created with headless=True no window, fonts or sprites are set up and render() is a no-op,
+    so the simulation can be advanced with step() as fast as the CPU allows.
+    """
     
-    def __init__(self):
-        pygame.init()
-        self.screen: pygame.Surface = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("MiniMetro")
-        self.clock: pygame.time.Clock = pygame.time.Clock()
-        self.font: pygame.font.Font = pygame.font.Font(None, 28)
-        self.large_font: pygame.font.Font = pygame.font.Font(None, 36)
+    def __init__(self, headless: bool = False, seed: Seed = None):
+        self.headless: bool = headless
+        # Every random draw of the game comes from here, so a seed makes a run reproducible
+        self.rng: GameRandom = GameRandom(seed)
+        self.screen: Optional[pygame.Surface] = None
+        self.clock: Optional[pygame.time.Clock] = None
+        self.font: Optional[pygame.font.Font] = None
+        self.large_font: Optional[pygame.font.Font] = None
+        self.hud_text: Optional[TextCache] = None
+        
+        # Layered rendering: cached static layer and the screen areas drawn over it last frame
+        self.static_layer: Optional[pygame.Surface] = None
+        self.static_key: Optional[Tuple] = None
+        self.dirty_rects: List[pygame.Rect] = []
+        
+        if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("MiniMetro")
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 28)
+            self.large_font = pygame.font.Font(None, 36)
+            self.hud_text = TextCache(self.font)
+        
+        self.sim_clock: SimClock = SimClock(1.0 / FPS)
         
         self.stations: List[Station] = []
-        self.start_time: float = time.time()
-        self.last_spawn_time: float = time.time()
+        self.rider_pool: RiderPool = RiderPool()
+        self.start_time: float = self.sim_clock.now()
+        self.last_spawn_time: float = self.sim_clock.now()
         
         self.selected_station: Optional[Station] = None
         self.selected_line: Optional[Line] = None
@@ -67,8 +107,29 @@ class MiniMetro:
         
         self.lines: List[Line] = []
         self.trains: List[Train] = []
+        self.router: Router = Router(self.lines)
+        self.train_engine: TrainEngine = TrainEngine(self.sim_clock, self.router)
+        
+        # Spatial indexes for placement, hit-testing and nearest-neighbour queries
+        self.station_grid: SpatialGrid = SpatialGrid(STATION_SPACING)
+        self.line_grid: SpatialGrid = SpatialGrid(LINE_GRID_CELL)
+        self.line_segment_counts: Dict[int, int] = {}
+        
+        # Dense integer ids with O(1) lookup, and the (sorted) end stations of every line
+        self.station_registry: IdRegistry[Station] = IdRegistry()
+        self.line_registry: IdRegistry[Line] = IdRegistry()
+        self.train_registry: IdRegistry[Train] = IdRegistry()
+        self.line_endpoints: Dict[int, Tuple[int, int]] = {}
+        self.endpoint_counts: Dict[Tuple[int, int], int] = {}
+        # Legal moves of the direct action API (connect, extend_line, close_loop, ...), updated with every change
+        self.action_masks: ActionMasks = ActionMasks()
+        self.spawner: StationSpawner = StationSpawner(
+            (STATION_SPACING, STATION_SPACING, WIDTH - SIDEBAR_WIDTH - STATION_SPACING, HEIGHT - UI_HEIGHT - STATION_SPACING),
+            STATION_SPACING,
+            self.rng.spawn()
+        )
         
-        self.last_upgrade_time: float = time.time()
+        self.last_upgrade_time: float = self.sim_clock.now()
 
         self.lines_available: Set[Tuple[int, int, int]]= set([
             (255, 0, 0),
@@ -81,70 +142,138 @@ class MiniMetro:
         
         self.tracker = Tracker()
         self.grapher = Grapher(self.tracker)
+        
+        # Set by a ReplayRecorder; every action passed to perform() is written to it
+        self.recorder: Optional["ReplayRecorder"] = None
+    
+    def snapshot(self, include_history: bool = False) -> GameSnapshot:
+        """Capture the game state (without the metric history unless include_history is set)."""
+        return take_snapshot(self, include_history)
+    
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """Return the game to a snapshot taken from this or any other game."""
+        restore_snapshot(self, snapshot)
+    
+    def fork(self, include_history: bool = False) -> "MiniMetro":
+        """Get an independent headless copy of this game, e.g. for a search rollout."""
+        metro = MiniMetro(headless=True)
+        restore_snapshot(metro, self.snapshot(include_history), consume=True)
+        return metro
     
     def get_elapsed_time(self) -> float:
         """Get time elapsed since game start in seconds."""
-        return time.time() - self.start_time
+        return self.sim_clock.now() - self.start_time
     
     def should_auto_spawn(self) -> bool:
         """Check if enough time has passed for automatic station spawn."""
-        return time.time() - self.last_spawn_time >= self.station_spawn_interval
+        return self.sim_clock.now() - self.last_spawn_time >= self.station_spawn_interval
     
     def render(self) -> None:
-        """Render all game elements to screen."""
+        """Render all game elements to screen.
+        
+        Background, lines, station shapes, the sidebar and the UI bar live on a cached static layer that is
+        only redrawn when _static_key() changes. Trains, riders and HUD text are drawn on top each frame, and
+        only the areas they cover this frame and covered last frame are pushed to the display.
+        """
+        if self.headless:
+            return
+        
+        key = self._static_key()
+        full_redraw = key != self.static_key
+        if full_redraw:
+            with profiler.section("render.static"):
+                self._render_static_layer()
+            self.static_key = key
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            # Wipe last frame's moving parts by restoring the static layer underneath them
+            for rect in self.dirty_rects:
+                self.screen.blit(self.static_layer, rect, rect)
+        
+        with profiler.section("render.dynamic"):
+            rects = self._render_dynamic_layer()
+        overlay = profiler.render_overlay(self.screen)
+        if overlay:
+            rects.append(overlay)
+        with profiler.section("render.display"):
+            if full_redraw:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
+    
+    def _static_key(self) -> Tuple:
+        """Get a key that changes whenever something drawn on the static layer changes.
+        
+        Station service colors only change when lines are created, extended or deleted, which the line part covers.
+        """
+        selected_station = self.selected_station.id if self.selected_station else None
+        lines = tuple((line.id, line.version, line.selected) for line in self.lines)
+        return (len(self.stations), selected_station, lines, len(self.lines_available))
+    
+    def _render_static_layer(self) -> None:
+        """Redraw everything that does not move into the static layer."""
+        if self.static_layer is None:
+            self.static_layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        layer = self.static_layer
+        
         # Render background if available, otherwise fill with color
         background = resources.get_background((WIDTH, HEIGHT))
         if background:
-            self.screen.blit(background, (0, 0))
+            layer.blit(background, (0, 0))
         else:
-            self.screen.fill(COLORS["BG_COLOR"])
+            layer.fill(COLORS["BG_COLOR"])
         
         # In order of background-to-foreground
         for line in self.lines:
-            line.render(self.screen)
+            line.render(layer)
         for station in self.stations:
-            station.render(self.screen, station == self.selected_station)
-        for train in self.trains:
-            train.render(self.screen)
+            station.render_shape(layer, station == self.selected_station)
         
         # Render sidebar
-        self._render_sidebar()
+        self._render_sidebar(layer)
         
         # Render UI bar
         ui_rect = pygame.Rect(0, HEIGHT - UI_HEIGHT, WIDTH, UI_HEIGHT)
-        pygame.draw.rect(self.screen, COLORS["UI_COLOR"], ui_rect)
-        pygame.draw.line(self.screen, COLORS["UI_LINE_COLOR"], (0, HEIGHT - UI_HEIGHT), (WIDTH, HEIGHT - UI_HEIGHT), 2)
+        pygame.draw.rect(layer, COLORS["UI_COLOR"], ui_rect)
+        pygame.draw.line(layer, COLORS["UI_LINE_COLOR"], (0, HEIGHT - UI_HEIGHT), (WIDTH, HEIGHT - UI_HEIGHT), 2)
+    
+    def _render_dynamic_layer(self) -> List[pygame.Rect]:
+        """Draw riders, trains and HUD text onto the screen and return the areas drawn."""
+        rects = []
+        for station in self.stations:
+            rect = station.render_riders(self.screen)
+            if rect:
+                rects.append(rect)
+        for train in self.trains:
+            rects.append(train.render(self.screen))
         
         elapsed = int(self.get_elapsed_time())
-        info_text_time = self.font.render(
+        info_text_time = self.hud_text.render(
             f"Time: {elapsed}s  |  Stations: {len(self.stations)}",
-            True,
             COLORS["UI_TEXT_COLOR"]
         )
-        self.screen.blit(info_text_time, (20, HEIGHT - UI_HEIGHT + 18))
+        rects.append(self.screen.blit(info_text_time, (20, HEIGHT - UI_HEIGHT + 18)))
         
-        info_text_passengers = self.font.render(
+        info_text_passengers = self.hud_text.render(
             f"Passengers: {self.tracker.total_passengers}  |  Arrived: {self.tracker.passengers_arrived} | Lost: {self.tracker.passengers_lost}",
-            True,
             COLORS["UI_TEXT_COLOR"]
         )
-        self.screen.blit(info_text_passengers, (250, HEIGHT - UI_HEIGHT + 18))
+        rects.append(self.screen.blit(info_text_passengers, (250, HEIGHT - UI_HEIGHT + 18)))
         
-        info_text_trains = self.font.render(
+        info_text_trains = self.hud_text.render(
             f"Trains: {self.train_quantity} | Available: {self.max_trains - self.train_quantity}",
-            True,
             COLORS["UI_TEXT_COLOR"]
         )
-        self.screen.blit(info_text_trains, (700, HEIGHT - UI_HEIGHT + 18))
-        
-        pygame.display.flip()
+        rects.append(self.screen.blit(info_text_trains, (700, HEIGHT - UI_HEIGHT + 18)))
+        return rects
     
-    def _render_sidebar(self) -> None:
+    def _render_sidebar(self, surface: pygame.Surface) -> None:
         """Render the sidebar with line colors."""
         # Draw sidebar background
         sidebar_rect = pygame.Rect(WIDTH - SIDEBAR_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT - UI_HEIGHT)
-        pygame.draw.rect(self.screen, COLORS["SIDEBAR_BG"], sidebar_rect)
-        pygame.draw.line(self.screen, COLORS["UI_LINE_COLOR"], (WIDTH - SIDEBAR_WIDTH, 0), (WIDTH - SIDEBAR_WIDTH, HEIGHT - UI_HEIGHT), 2)
+        pygame.draw.rect(surface, COLORS["SIDEBAR_BG"], sidebar_rect)
+        pygame.draw.line(surface, COLORS["UI_LINE_COLOR"], (WIDTH - SIDEBAR_WIDTH, 0), (WIDTH - SIDEBAR_WIDTH, HEIGHT - UI_HEIGHT), 2)
         
         line_colors = [x.color for x in self.lines]
         unused_colors = [x for x in self.lines_available if x not in line_colors]
@@ -157,11 +286,11 @@ class MiniMetro:
             y_center = y_offset + size // 2
             
             # Draw circle for line color
-            pygame.draw.circle(self.screen, line.color, (x_center, y_center), size // 2)
+            pygame.draw.circle(surface, line.color, (x_center, y_center), size // 2)
             
             # Draw border if selected
             if line.selected:
-                pygame.draw.circle(self.screen,  (255, 255, 255), (x_center, y_center), size // 2, 3)
+                pygame.draw.circle(surface,  (255, 255, 255), (x_center, y_center), size // 2, 3)
             
             y_offset += size + LINE_COLOR_PADDING
             
@@ -170,83 +299,126 @@ class MiniMetro:
             x_center = WIDTH - SIDEBAR_WIDTH // 2
             y_center = y_offset + size // 2
             
-            pygame.draw.circle(self.screen, line_color, (x_center, y_center), size // 2, 3)
+            pygame.draw.circle(surface, line_color, (x_center, y_center), size // 2, 3)
 
             y_offset += size + LINE_COLOR_PADDING
             
     
     def is_valid_location(self, x: int, y: int) -> bool:
         """Check if location is valid (not too close to existing stations)."""
-        for station in self.stations:
+        for station in self.station_grid.query(x, y, STATION_SPACING):
             distance = ((station.x - x) ** 2 + (station.y - y) ** 2) ** 0.5
             if distance < STATION_SPACING:
                 return False
         return True
     
-    def create_location(self) -> Tuple[int, int]:
-        """Generate a valid random location for a new station."""
-        max_attempts = 100
-        attempt = 0
-        
-        while attempt < max_attempts:
-            x = randint(STATION_SPACING, WIDTH - SIDEBAR_WIDTH - STATION_SPACING)
-            y = randint(STATION_SPACING, HEIGHT - UI_HEIGHT - STATION_SPACING)
-            
-            if self.is_valid_location(x, y):
-                return (x, y)
-            
-            attempt += 1
-        
-        return (WIDTH // 2, HEIGHT // 2)
+    def get_nearest_station(self, location: Tuple[int, int], max_distance: float = WIDTH + HEIGHT) -> Optional[Station]:
+        """Get the station closest to a location, or None if there is none within max_distance."""
+        x, y = location
+        return self.station_grid.nearest(x, y, lambda station: (station.x, station.y), max_distance)
+    
+    def _index_line(self, line: Line) -> None:
+        """(Re)insert a line's segments into the line grid after it was created, extended or closed."""
+        self._unindex_line(line)
+        points = [(station.x, station.y) for station in line.stations]
+        for i in range(len(line.segment_lengths)):
+            self.line_grid.insert_segment((line.id, i), (line, i), points[i], points[(i + 1) % len(points)], LINE_CLICK_TOLERANCE)
+        self.line_segment_counts[line.id] = len(line.segment_lengths)
+        self._index_endpoints(line)
+        self.action_masks.update_line(line)
+    
+    def _index_endpoints(self, line: Line) -> None:
+        """Record the end stations of a line for check_line()."""
+        endpoints = tuple(sorted((line.origin.id, line.destination.id)))
+        self.line_endpoints[line.id] = endpoints
+        self.endpoint_counts[endpoints] = self.endpoint_counts.get(endpoints, 0) + 1
+        self.action_masks.set_endpoints(endpoints, False)
+    
+    def _unindex_line(self, line: Line) -> None:
+        """Remove a line's segments from the line grid and its end stations from the endpoint index."""
+        for i in range(self.line_segment_counts.pop(line.id, 0)):
+            self.line_grid.remove((line.id, i))
+        
+        endpoints = self.line_endpoints.pop(line.id, None)
+        if endpoints is not None:
+            self.endpoint_counts[endpoints] -= 1
+            if not self.endpoint_counts[endpoints]:
+                del self.endpoint_counts[endpoints]
+                self.action_masks.set_endpoints(endpoints, True)
+    
+    def create_location(self) -> Optional[Tuple[int, int]]:
+        """Get a valid location for a new station, or None if the map is saturated."""
+        return self.spawner.next_location(self.is_valid_location)
     
-    def create_station(self) -> None:
-        """Create a new station at a valid location."""
-        x, y = self.create_location()
-        type: StationType = StationType(randint(0, len(StationType) - 1))
-        station = Station(x, y, type, self.tracker)
+    def create_station(self, location: Optional[Tuple[int, int]] = None) -> Optional[Station]:
+        """Create a new station at the given location, or at a valid one if none is given. Returns None if there is no room left on the map."""
+        if location is None:
+            location = self.create_location()
+        if location is None:
+            logger.log(LogEvent.MapSaturated)
+            return None
+        
+        x, y = location
+        type: StationType = StationType(self.rng.randint(0, len(StationType) - 1))
+        station = Station(x, y, type, self.sim_clock, self.rider_pool, self.tracker, self.rng)
+        self.station_registry.add(station)
         self.tracker.station_types.add(type)
         self.tracker.serviced_stations[station.id] = 0
         self.tracker.station_service_dict[station.id] = set()
+        self.tracker.mark_changed()
         self.stations.append(station)
+        self.station_grid.insert_point(station.id, station, x, y)
+        self.action_masks.add_station()
         
-        self.last_spawn_time = time.time()
-        print(f"Created ({len(self.stations)}): {station.describe()}")
+        self.last_spawn_time = self.sim_clock.now()
+        logger.log(LogEvent.StationCreated, count=len(self.stations), station_type=type.name, x=x, y=y)
+        return station
     
     def update(self) -> None:
-        """Update game state (auto-spawn stations)."""
-        if self.should_auto_spawn() and len(self.stations) < STATION_MAX:
-            self.create_station()
-        for station in self.stations:
-            station.update()
-        for train in self.trains:
-            train.update()
+        """Update game state and the service graph window (interactive loop)."""
+        self.step()
+        with profiler.section("grapher"):
+            self.grapher.render_mermaid_window()
+    
+    def step(self) -> None:
+        """Advance the simulation by one tick (auto-spawn stations, riders and trains) without any rendering."""
+        self.sim_clock.tick()
+        
+        if self.should_auto_spawn() and len(self.stations) < STATION_MAX and not self.spawner.saturated:
+            with profiler.section("step.spawn"):
+                self.create_station()
+        with profiler.section("step.stations"):
+            for station in self.stations:
+                station.update()
+        with profiler.section("step.trains"):
+            self.train_engine.update()
             
-        if len(self.lines_available) < MAX_LINES and int(time.time() - self.last_upgrade_time) == UPGRADE_INTERVAL:
-            new_line_color = (randint(100, 255), randint(100, 255), randint(100, 255))
-            while new_line_color in self.lines_available:
-                new_line_color = (randint(0, 255), randint(0, 255), randint(0, 255))
-                
-            self.lines_available.add(new_line_color)
-            self.max_trains += 1
-            self.last_upgrade_time = time.time()
+        if len(self.lines_available) < MAX_LINES and self.sim_clock.now() - self.last_upgrade_time >= UPGRADE_INTERVAL:
+            self._upgrade_lines()
+        
+        with profiler.section("step.tracker"):
+            self.tracker.sample(self.sim_clock.now())
+        if self.grapher.exporter:
+            with profiler.section("step.export"):
+                self.grapher.exporter.update(self.sim_clock.now())
+    
+    def _upgrade_lines(self) -> None:
+        """Unlock a new line color and one more train."""
+        new_line_color = (self.rng.randint(100, 255), self.rng.randint(100, 255), self.rng.randint(100, 255))
+        while new_line_color in self.lines_available:
+            new_line_color = (self.rng.randint(0, 255), self.rng.randint(0, 255), self.rng.randint(0, 255))
             
-        self.grapher.render_mermaid_window()
-        # print(self.grapher.tracker_to_mermaid())
+        self.lines_available.add(new_line_color)
+        self.max_trains += 1
+        self.last_upgrade_time = self.sim_clock.now()
     
     def check_line(self, origin: Station, destination: Station) -> bool:
-        """Check if a line between origin and destination already exists."""
-        for line in self.lines:
-            if (origin.id == line.origin.id and destination.id == line.destination.id) or (origin.id == line.destination.id and destination.id == line.origin.id):
-                return False
-        return True
+        """Check that no line already runs between origin and destination (in either direction)."""
+        return tuple(sorted((origin.id, destination.id))) not in self.endpoint_counts
     
-    def delete_line(self, line_id: UUID) -> bool:
+    def delete_line(self, line_id: int) -> bool:
         """Delete a line and all trains on that line."""
-        line_to_remove = None
-        for line in self.lines:
-            if line.id == line_id:
-                line_to_remove = line
-                break
+        line_to_remove = self.line_registry.get(line_id)
         
         if line_to_remove:
             for station in line_to_remove.stations:
@@ -256,29 +428,144 @@ class MiniMetro:
                 self.tracker.serviced_stations[line_to_remove.stations[0].id] -= 1
                 
             self.lines.remove(line_to_remove)
+            self.action_masks.remove_line(line_to_remove)
+            if self.selected_line is line_to_remove:
+                self.selected_line = None
+            self.router.invalidate()
+            self._unindex_line(line_to_remove)
+            self.train_engine.remove_line(line_to_remove)
+            self.tracker.record_line_removed(line_id)
+            self.tracker.line_service_dict.pop(line_id, None)
+            self.tracker.mark_changed()
+            self.line_registry.remove(line_id)
+            for train in self.trains:
+                if train.line.id == line_id:
+                    self.train_registry.remove(train.id)
             self.trains = [train for train in self.trains if train.line.id != line_id]
             self.train_quantity = len(self.trains)
                 
-            self.lines_available.add(line.color)
-            print(f"Deleted line {line_id}")
+            self.lines_available.add(line_to_remove.color)
+            logger.log(LogEvent.LineDeleted, line=line_id)
             return True
         return False
     
-    def delete_train(self, train_id: UUID) -> bool:
+    def add_train(self, line: Line, type: TrainType = TrainType.Regular) -> Optional[Train]:
+        """Put a new train on a line if one is available. Returns the train, or None if the limit is reached."""
+        if self.train_quantity >= self.max_trains:
+            return None
+        
+        train = Train(line=line, engine=self.train_engine, rider_pool=self.rider_pool, type=type, tracker=self.tracker)
+        self.train_registry.add(train)
+        self.trains.append(train)
+        self.train_quantity += 1
+        self.action_masks.train_added(line, type)
+        return train
+    
+    def delete_train(self, train_id: int) -> bool:
         """Delete a specific train."""
-        train_to_remove = None
-        for train in self.trains:
-            if train.id == train_id:
-                train_to_remove = train
-                break
+        train_to_remove = self.train_registry.get(train_id)
             
         if train_to_remove:
+            self.train_registry.remove(train_id)
             self.train_quantity -= 1
             self.trains.remove(train_to_remove)
-            print(f"Deleted train {train_id}")
+            self.train_engine.remove(train_to_remove)
+            self.action_masks.train_removed(train_to_remove.line, train_to_remove.type)
+            self.tracker.record_train_removed(train_to_remove.line.id, train_to_remove.capacity, len(train_to_remove.riders))
+            logger.log(LogEvent.TrainDeleted, train=train_id)
             return True
         return False
     
+    def perform(self, action: PlayerAction, a: int = 0, b: int = 0) -> bool:
+        """Apply a player action (arguments as documented on PlayerAction), recording it first if a recorder is attached.
+        
+        Returns False if the action referred to something that does not exist or had no effect.
+        """
+        if self.recorder:
+            self.recorder.record(self.sim_clock.ticks, action, a, b)
+        
+        if action == PlayerAction.Click:
+            self.check_location((a, b))
+            return True
+        if action == PlayerAction.CreateStation:
+            return self.create_station() is not None
+        if action == PlayerAction.AddTrain:
+            line = self.line_registry.get(a)
+            return line is not None and self.add_train(line, TrainType(b)) is not None
+        if action == PlayerAction.SpawnRider:
+            station = self.station_registry.get(a)
+            if station is None:
+                return False
+            station.create_passenger()
+            return True
+        if action == PlayerAction.DeleteLine:
+            return self.delete_line(a)
+        if action == PlayerAction.DeleteTrain:
+            return self.delete_train(a)
+        if action == PlayerAction.Connect:
+            return self.connect(a, b) is not None
+        if action == PlayerAction.ExtendLine:
+            return self.extend_line(a, b)
+        if action == PlayerAction.CloseLoop:
+            return self.close_loop(a)
+        if action == PlayerAction.RemoveLine:
+            return self.remove_line(a)
+        if action == PlayerAction.PlaceTrain:
+            return self.place_train(a, TrainType(b)) is not None
+        if action == PlayerAction.RemoveTrain:
+            return self.remove_train(a, TrainType(b))
+        return False
+    
+    def legal_actions(self) -> Dict[str, np.ndarray]:
+        """Masks of the moves the direct action API accepts right now, by station and line index (see ActionMasks).
+        
+        connect (stations x stations), extend (lines x stations), close_loop and remove_line (lines),
+        add_train and remove_train (lines x TrainType).
+        """
+        return self.action_masks.masks(bool(self.lines_available), self.train_quantity < self.max_trains)
+    
+    def connect(self, origin: int, destination: int) -> Optional[Line]:
+        """Open a new line from one station to another (by index). Returns None if the move is not legal."""
+        count = len(self.stations)
+        if not (0 <= origin < count and 0 <= destination < count) or not self.lines_available or not self.action_masks.connect[origin, destination]:
+            return None
+        return self._create_line(self.stations[origin], self.stations[destination])
+    
+    def extend_line(self, line_index: int, station: int) -> bool:
+        """Add a station (by index) to the end of a line (by index). Returns False if the move is not legal."""
+        if not (0 <= line_index < len(self.lines) and 0 <= station < len(self.stations)) or not self.action_masks.extend[line_index, station]:
+            return False
+        return self._extend_line(self.lines[line_index], self.stations[station])
+    
+    def close_loop(self, line_index: int) -> bool:
+        """Join the end of a line (by index) back to its first station. Returns False if the move is not legal."""
+        if not (0 <= line_index < len(self.lines)) or not self.action_masks.close_loop[line_index]:
+            return False
+        line = self.lines[line_index]
+        return self._extend_line(line, line.origin)
+    
+    def remove_line(self, line_index: int) -> bool:
+        """Delete a line (by index) and its trains."""
+        if not (0 <= line_index < len(self.lines)):
+            return False
+        return self.delete_line(self.lines[line_index].id)
+    
+    def place_train(self, line_index: int, type: TrainType = TrainType.Regular) -> Optional[Train]:
+        """Put a new train of a type on a line (by index). Returns None if the move is not legal."""
+        if not (0 <= line_index < len(self.lines)):
+            return None
+        return self.add_train(self.lines[line_index], type)
+    
+    def remove_train(self, line_index: int, type: TrainType = TrainType.Regular) -> bool:
+        """Delete the newest train of a type on a line (by index). Returns False if there is none."""
+        if not (0 <= line_index < len(self.lines)) or not self.action_masks.has_train[line_index, type.value]:
+            return False
+        line = self.lines[line_index]
+        for train in reversed(self.trains):
+            if train.line is line and train.type == type:
+                return self.delete_train(train.id)
+        return False
+    
     def check_location(self, location: Tuple[int, int]) -> None:
         """Check if a location has been clicked and handle station/line/sidebar interactions."""
         x, y = location
@@ -309,7 +596,7 @@ class MiniMetro:
     def _get_station_at_position(self, location: Tuple[int, int]) -> Optional[Station]:
         """Get station at the given position, or None if no station there."""
         x, y = location
-        for station in self.stations:
+        for station in self.station_grid.query(x, y, CLICK_SPACING):
             if (x + CLICK_SPACING >= station.x and x - CLICK_SPACING <= station.x and
                 y + CLICK_SPACING >= station.y and y - CLICK_SPACING <= station.y):
                 return station
@@ -317,50 +604,22 @@ class MiniMetro:
     
     def _get_line_at_position(self, location: Tuple[int, int]) -> Optional[Line]:
         """Get line at the given position using line segment distance check."""
-        for line in self.lines:
-            for i in range(len(line.stations) - 1):
-                origin = (line.stations[i].x, line.stations[i].y)
-                destination = (line.stations[i + 1].x, line.stations[i + 1].y)
-                
-                if self._point_near_line_segment(location, origin, destination, tolerance=10):
-                    return line
-            
-            # Check circular closing segment
-            if line.circular and len(line.stations) > 2:
-                origin = (line.stations[-1].x, line.stations[-1].y)
-                destination = (line.stations[0].x, line.stations[0].y)
-                
-                if self._point_near_line_segment(location, origin, destination, tolerance=10):
-                    return line
-        
-        return None
+        x, y = location
+        line_rows = self.action_masks.line_rows
+        best: Optional[Line] = None
+        for line, i in self.line_grid.query(x, y, 0):
+            # Several lines can overlap here; keep the first one in line order like the full scan did
+            if best is not None and line_rows[line.id] >= line_rows[best.id]:
+                continue
+            origin = line.stations[i]
+            destination = line.stations[(i + 1) % len(line.stations)]
+            if self._point_near_line_segment(location, (origin.x, origin.y), (destination.x, destination.y)):
+                best = line
+        return best
     
-    def _point_near_line_segment(self, point: Tuple[int, int], p1: Tuple[int, int], p2: Tuple[int, int], tolerance: int = 10) -> bool:
+    def _point_near_line_segment(self, point: Tuple[int, int], p1: Tuple[int, int], p2: Tuple[int, int], tolerance: int = LINE_CLICK_TOLERANCE) -> bool:
         """Check if a point is within tolerance distance of a line segment."""
-        px, py = point
-        x1, y1 = p1
-        x2, y2 = p2
-        
-        # Vector from p1 to p2
-        dx = x2 - x1
-        dy = y2 - y1
-        
-        # Handle zero-length segment
-        length_squared = dx * dx + dy * dy
-        if length_squared == 0:
-            dist = math.sqrt((px - x1) ** 2 + (py - y1) ** 2)
-            return dist <= tolerance
-        
-        # Project point onto line, clamped to segment
-        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_squared))
-        
-        # Find closest point on segment
-        closest_x = x1 + t * dx
-        closest_y = y1 + t * dy
-        
-        # Check distance
-        dist = math.sqrt((px - closest_x) ** 2 + (py - closest_y) ** 2)
-        return dist <= tolerance
+        return distance_to_segment(point, p1, p2) <= tolerance
     
     def _handle_station_click(self, station: Station) -> None:
         """Handle clicking on a station."""
@@ -373,7 +632,7 @@ class MiniMetro:
                 self._connect_stations(self.selected_station, station)
         else:
             # Select this station
-            print(f"Station clicked: {station.describe()}")
+            logger.log(LogEvent.StationClicked, station_type=station.station_type.name, x=station.x, y=station.y)
             self.selected_station = station
     
     def _connect_stations(self, origin: Station, destination: Station) -> None:
@@ -387,49 +646,63 @@ class MiniMetro:
         
         if line_to_extend:
             # Extend the existing line
-            if line_to_extend.add_station(destination):
-                # Recalculate distances for trains on this line
-                for train in self.trains:
-                    if train.line.id == line_to_extend.id:
-                        train.segment_distances = train._calculate_all_segment_distances()
-                        train.total_line_distance = sum(train.segment_distances)
-                        
-                print(f"Extended line to {destination.type()}")
+            if self._extend_line(line_to_extend, destination):
                 self.selected_station = destination
-                self.tracker.serviced_stations[destination.id] += 1
-                
-                self.tracker.station_service_dict[destination.id].add(origin.type)
-                self.tracker.station_service_dict[origin.id].add(destination.type)
-                self.tracker.line_service_dict[line_to_extend.id].add(destination.type)
             else:
-                print("Cannot extend line here")
                 self.selected_station = None
                 
         elif self.check_line(origin, destination):
             # Create new line
             if len(self.lines_available) == 0:
                 return
-            new_line_color = self.lines_available.pop()
-            new_line = Line([origin, destination], new_line_color)
-            self.tracker.serviced_stations[origin.id] += 1
-            self.tracker.serviced_stations[destination.id] += 1
-            
-            self.tracker.station_service_dict[destination.id].add(origin.type)
-            self.tracker.station_service_dict[origin.id].add(destination.type)
-            
-            self.tracker.line_service_dict[new_line.id] = set()
-            self.tracker.line_service_dict[new_line.id].add(origin.type)
-            self.tracker.line_service_dict[new_line.id].add(destination.type)
-            
-            self.lines.append(new_line)
-            if self.train_quantity < self.max_trains:
-                self.trains.append(Train(line=new_line, tracker=self.tracker))
-                self.train_quantity += 1
-            print(f"Created line and train between {origin.type()} and {destination.type()}")
+            self._create_line(origin, destination)
             self.selected_station = destination
         else:
             self.selected_station = None
     
+    def _extend_line(self, line: Line, destination: Station) -> bool:
+        """Add a station to the end of a line (closing the loop if it is the first station). Returns False if the line rejected it."""
+        origin = line.destination
+        if not line.add_station(destination):
+            logger.log(LogEvent.LineExtendFailed)
+            return False
+        
+        self.router.invalidate()
+        self._index_line(line)
+        logger.log(LogEvent.LineExtended, destination=destination.type())
+        self.tracker.serviced_stations[destination.id] += 1
+        
+        self.tracker.station_service_dict[destination.id].add(origin.station_type)
+        self.tracker.station_service_dict[origin.id].add(destination.station_type)
+        self.tracker.line_service_dict[line.id].add(destination.station_type)
+        self.tracker.mark_changed()
+        return True
+    
+    def _create_line(self, origin: Station, destination: Station) -> Line:
+        """Open a new line between two stations in the next free color and put a train on it if one is available."""
+        # Take the smallest colour rather than set.pop(), whose pick depends on the set's history
+        new_line_color = min(self.lines_available)
+        self.lines_available.remove(new_line_color)
+        new_line = Line([origin, destination], new_line_color)
+        self.line_registry.add(new_line)
+        self.tracker.serviced_stations[origin.id] += 1
+        self.tracker.serviced_stations[destination.id] += 1
+        
+        self.tracker.station_service_dict[destination.id].add(origin.station_type)
+        self.tracker.station_service_dict[origin.id].add(destination.station_type)
+        
+        self.tracker.line_service_dict[new_line.id] = set()
+        self.tracker.line_service_dict[new_line.id].add(origin.station_type)
+        self.tracker.line_service_dict[new_line.id].add(destination.station_type)
+        self.tracker.mark_changed()
+        
+        self.lines.append(new_line)
+        self.router.invalidate()
+        self._index_line(new_line)
+        self.add_train(new_line)
+        logger.log(LogEvent.LineCreated, origin=origin.type(), destination=destination.type())
+        return new_line
+    
     def _handle_line_click(self, line: Line) -> None:
         """Handle clicking on a line."""
         # Deselect previous line
@@ -442,7 +715,7 @@ class MiniMetro:
         else:
             line.selected = True
             self.selected_line = line
-            print(f"Line selected: {line.id}")
+            logger.log(LogEvent.LineSelected, line=line.id)
     
     def _check_sidebar_click(self, location: Tuple[int, int]) -> None:
         """Check if a line color in the sidebar was clicked."""
@@ -460,7 +733,6 @@ class MiniMetro:
                 if line.selected:
                     # Line was selected - delete it
                     self.delete_line(line.id)
-                    print(f"Deleted line {line.id}")
                 else:
                     # Deselect previous line
                     if self.selected_line:
@@ -469,7 +741,7 @@ class MiniMetro:
                     # Select this line
                     line.selected = True
                     self.selected_line = line
-                    print(f"Line selected from sidebar: {line.id}")
+                    logger.log(LogEvent.LineSelected, line=line.id)
                 return
             
             y_offset += size + LINE_COLOR_PADDING
\ No newline at end of file
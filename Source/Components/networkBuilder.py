@@ -0,0 +1,35 @@
+import math
+
+from minimetro import MiniMetro, STATION_SPACING, MAX_LINES
+
+
+def build_network(stations: int, lines: int = MAX_LINES, trains_per_line: int = 1, seed: int = 0, loaded_ticks: int = 0) -> MiniMetro:
+    """Build a headless game through the player API: stations on a grid, lines snaking through consecutive stations.
+
+    Each line opens with one train and gets trains_per_line in total (the train limit is raised to fit), then the
+    game runs loaded_ticks so riders build up. Used by the tests and the benchmark suite.
+    """
+    metro = MiniMetro(headless=True, seed=seed)
+    columns = max(math.ceil(stations ** 0.5), 1)
+    step = STATION_SPACING + 5
+    for i in range(stations):
+        metro.create_station((STATION_SPACING + (i % columns) * step, STATION_SPACING + (i // columns) * step))
+
+    # Line colours unlock over time; stations the game spawns meanwhile go after the grid
+    lines = min(lines, MAX_LINES, stations // 2)
+    while len(metro.lines_available) < lines:
+        metro.step()
+
+    metro.max_trains = max(metro.max_trains, lines * max(trains_per_line, 1))
+    per_line = stations // lines if lines else 0
+    for line_index in range(lines):
+        start = line_index * per_line
+        metro.connect(start, start + 1)
+        for station in range(start + 2, start + per_line):
+            metro.extend_line(line_index, station)
+        for _ in range(trains_per_line - 1):
+            metro.place_train(line_index)
+
+    for _ in range(loaded_ticks):
+        metro.step()
+    return metro
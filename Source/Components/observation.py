@@ -0,0 +1,281 @@
+import numpy as np
+
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+from minimetro import WIDTH, HEIGHT, STATION_MAX, MAX_LINES
+from station import Station
+from trainEngine import LINE_STRIDE
+from typeEnums import StationType, TrainType
+
+if TYPE_CHECKING:
+    from minimetro import MiniMetro
+
+# Design constants
+STATION_SLOTS: int      = STATION_MAX
+LINE_SLOTS: int         = 2 * MAX_LINES
+TRAIN_SLOTS: int        = 64
+
+STATION_TYPE_COUNT: int = len(StationType)
+TRAIN_TYPE_COUNT: int   = len(TrainType)
+
+# Raster channels: one per station type, then queue fill, lines and trains
+RASTER_QUEUE: int       = STATION_TYPE_COUNT
+RASTER_LINES: int       = STATION_TYPE_COUNT + 1
+RASTER_TRAINS: int      = STATION_TYPE_COUNT + 2
+RASTER_CHANNELS: int    = STATION_TYPE_COUNT + 3
+
+
+class ObservationEncoder:
+    """Fixed-shape float32 arrays describing a game, kept in preallocated buffers and updated incrementally.
+
+    Station rows are written once when the station appears, and each station's rider queue counts
+    straight into its row of `queue`. Line buffers are rewritten only when a line is created, extended,
+    closed or deleted. Trains move every tick, so their positions are recomputed each update, but with
+    a handful of array operations over the train engine's columns. Restoring a snapshot into the game
+    is detected and triggers one full rebuild.
+
+    Stations, lines and trains beyond the slot counts are left out (how many is in globals); lines are in
+    MiniMetro.lines order and trains in train engine slot order. With raster_size set, a
+    (RASTER_CHANNELS, size, size) map is also drawn with NumPy (no pygame).
+
+    Only one encoder can follow a game's rider queues at a time: a second one raises RuntimeError until
+    the first is closed.
+    """
+
+    def __init__(self, metro: "MiniMetro", station_slots: int = STATION_SLOTS, line_slots: int = LINE_SLOTS, train_slots: int = TRAIN_SLOTS, raster_size: Optional[int] = None):
+        self.metro: "MiniMetro" = metro
+        self.station_slots: int = station_slots
+        self.line_slots: int = line_slots
+        self.train_slots: int = train_slots
+        self.raster_size: Optional[int] = raster_size
+
+        S, L, T, K = station_slots, line_slots, train_slots, STATION_TYPE_COUNT
+        self.buffers: Dict[str, np.ndarray] = {
+            "station_xy":       np.zeros((S, 2), dtype=np.float32),     # Divided by the screen size
+            "station_type":     np.zeros((S, K), dtype=np.float32),     # One-hot
+            "station_mask":     np.zeros(S, dtype=np.float32),
+            "queue":            np.zeros((S, K), dtype=np.float32),     # Riders waiting, per destination type
+            "adjacency":        np.zeros((S, S), dtype=np.float32),     # Stations next to each other on some line
+            "line_stations":    np.zeros((L, S), dtype=np.float32),
+            "line_circular":    np.zeros(L, dtype=np.float32),
+            "line_mask":        np.zeros(L, dtype=np.float32),
+            "train_xy":         np.zeros((T, 2), dtype=np.float32),
+            "train_load":       np.zeros(T, dtype=np.float32),          # Riders aboard over capacity
+            "train_line":       np.zeros((T, L), dtype=np.float32),     # One-hot line index
+            "train_type":       np.zeros((T, TRAIN_TYPE_COUNT), dtype=np.float32),
+            "train_mask":       np.zeros(T, dtype=np.float32),
+            # Elapsed seconds, free line colors, free trains, riders waiting, aboard, arrived and lost,
+            # then the stations, lines and trains left out for lack of slots
+            "globals":          np.zeros(10, dtype=np.float32),
+        }
+        if raster_size:
+            self.buffers["raster"] = np.zeros((RASTER_CHANNELS, raster_size, raster_size), dtype=np.float32)
+
+        # Fixed-size copies of MiniMetro.legal_actions(), filled by legal_actions()
+        self.legal: Dict[str, np.ndarray] = {
+            "connect":      np.zeros((S, S), dtype=np.bool_),
+            "extend":       np.zeros((L, S), dtype=np.bool_),
+            "close_loop":   np.zeros(L, dtype=np.bool_),
+            "remove_line":  np.zeros(L, dtype=np.bool_),
+            "add_train":    np.zeros((L, TRAIN_TYPE_COUNT), dtype=np.bool_),
+            "remove_train": np.zeros((L, TRAIN_TYPE_COUNT), dtype=np.bool_),
+        }
+
+        self.stations: Optional[List[Station]] = None
+        self.station_count: int = 0
+        self.station_pixels: np.ndarray = np.zeros((S, 2), dtype=np.int64)     # (row, column) in the raster
+        self.station_limits: np.ndarray = np.ones(S, dtype=np.float32)
+        self.lines_key: Optional[Tuple] = None
+        self.line_rows: Dict[int, int] = {}
+        self.train_count: int = 0
+        self.trains_key: Optional[Tuple] = None
+        self.train_pixels: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        # Station coordinates laid out like the train engine's flat offsets, rebuilt when those are
+        self.engine_offsets: Optional[np.ndarray] = None
+        self.flat_points: np.ndarray = np.zeros((0, 2))
+
+    def update(self) -> Dict[str, np.ndarray]:
+        """Bring the buffers up to date with the game and return them.
+
+        The arrays are the encoder's own buffers and change on the next update; copy them to keep them.
+        """
+        metro = self.metro
+        if metro.stations is not self.stations:
+            # First update, or a snapshot was restored into the game
+            self._reset()
+        for station in metro.stations[self.station_count:self.station_slots]:
+            self._add_station(station)
+
+        lines_key = tuple((line.id, line.version) for line in metro.lines)
+        if lines_key != self.lines_key:
+            self._encode_lines()
+            self.lines_key = lines_key
+
+        self._encode_trains()
+
+        tracker = metro.tracker
+        self.buffers["globals"][:] = (
+            metro.get_elapsed_time(),
+            len(metro.lines_available),
+            metro.max_trains - metro.train_quantity,
+            tracker.waiting,
+            tracker.aboard,
+            tracker.passengers_arrived,
+            tracker.passengers_lost,
+            max(len(metro.stations) - self.station_slots, 0),
+            max(len(metro.lines) - self.line_slots, 0),
+            max(metro.train_engine.count - self.train_slots, 0),
+        )
+
+        if self.raster_size:
+            rows, columns = self.station_pixels[:self.station_count].T
+            self.buffers["raster"][RASTER_QUEUE, rows, columns] = self.buffers["queue"][:self.station_count].sum(axis=1) / self.station_limits[:self.station_count]
+        return self.buffers
+
+    def legal_actions(self) -> Dict[str, np.ndarray]:
+        """Get the game's legal-action masks padded (or cut) to the slot counts, in buffers reused between calls."""
+        for name, mask in self.metro.legal_actions().items():
+            buffer = self.legal[name]
+            buffer[:] = False
+            region = tuple(slice(0, min(size, limit)) for size, limit in zip(mask.shape, buffer.shape))
+            buffer[region] = mask[region]
+        return self.legal
+
+    def close(self) -> None:
+        """Hand the game's rider queues back, so another encoder can follow the game."""
+        for station in (self.stations or [])[:self.station_count]:
+            station.riders.unbind()
+        self.stations = None
+        self.station_count = 0
+
+    def _reset(self) -> None:
+        for buffer in self.buffers.values():
+            buffer[:] = 0
+        self.stations = self.metro.stations
+        self.station_count = 0
+        self.lines_key = None
+        self.train_count = 0
+        self.trains_key = None
+        self.train_pixels = None
+        self.engine_offsets = None
+
+    def _pixel(self, x: float, y: float) -> Tuple[int, int]:
+        size = self.raster_size
+        return (min(max(int(y / HEIGHT * size), 0), size - 1), min(max(int(x / WIDTH * size), 0), size - 1))
+
+    def _add_station(self, station: Station) -> None:
+        index = self.station_count
+        self.station_count += 1
+        buffers = self.buffers
+        buffers["station_xy"][index] = (station.x / WIDTH, station.y / HEIGHT)
+        buffers["station_type"][index, station.station_type.value] = 1.0
+        buffers["station_mask"][index] = 1.0
+        # From here on the station's queue keeps this row current
+        station.riders.bind(buffers["queue"][index])
+        self.station_limits[index] = station.limit
+
+        if self.raster_size:
+            row, column = self.station_pixels[index] = self._pixel(station.x, station.y)
+            buffers["raster"][station.station_type.value, row, column] = 1.0
+
+    def _encode_lines(self) -> None:
+        """Rewrite the line buffers, adjacency and the line raster channel from the current lines."""
+        buffers = self.buffers
+        line_stations = buffers["line_stations"]
+        adjacency = buffers["adjacency"]
+        for name in ("line_stations", "line_circular", "line_mask", "adjacency"):
+            buffers[name][:] = 0
+        if self.raster_size:
+            buffers["raster"][RASTER_LINES] = 0
+
+        self.line_rows = {}
+        for row, line in enumerate(self.metro.lines):
+            ids = [station.id for station in line.stations]
+            if row < self.line_slots:
+                self.line_rows[line.id] = row
+                line_stations[row, [id for id in ids if id < self.station_slots]] = 1.0
+                buffers["line_circular"][row] = float(line.circular)
+                buffers["line_mask"][row] = 1.0
+
+            stations = line.stations + line.stations[:1] if line.circular and len(line.stations) > 2 else line.stations
+            for origin, destination in zip(stations, stations[1:]):
+                if origin.id < self.station_slots and destination.id < self.station_slots:
+                    adjacency[origin.id, destination.id] = adjacency[destination.id, origin.id] = 1.0
+                if self.raster_size:
+                    self._draw_segment((origin.x, origin.y), (destination.x, destination.y))
+
+    def _draw_segment(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> None:
+        """Mark every raster cell the segment p1-p2 passes through on the line channel."""
+        (row1, column1), (row2, column2) = self._pixel(*p1), self._pixel(*p2)
+        samples = max(abs(row2 - row1), abs(column2 - column1)) + 1
+        rows = np.rint(np.linspace(row1, row2, samples)).astype(np.int64)
+        columns = np.rint(np.linspace(column1, column2, samples)).astype(np.int64)
+        self.buffers["raster"][RASTER_LINES, rows, columns] = 1.0
+
+    def _rebuild_points(self) -> None:
+        """Lay out station coordinates to match the engine's flat offsets: each line's stations, plus the first again on loops."""
+        engine = self.metro.train_engine
+        blocks = []
+        for slot, line in enumerate(engine.lines):
+            if line is None:
+                continue
+            points = [(station.x, station.y) for station in line.stations]
+            if engine.circular[slot]:
+                points.append(points[0])
+            blocks.append(np.array(points, dtype=np.float64))
+        self.flat_points = np.concatenate(blocks) if blocks else np.zeros((0, 2))
+        self.engine_offsets = engine.flat_offsets
+
+    def _encode_trains(self) -> None:
+        buffers = self.buffers
+        engine = self.metro.train_engine
+        count = min(engine.count, self.train_slots)
+        for name in ("train_xy", "train_load", "train_line", "train_type", "train_mask"):
+            buffers[name][count:self.train_count] = 0
+        self.train_count = count
+
+        if count:
+            # Interpolate between the stations around each train's distance along its line, as Line.position_at does
+            engine.sync_geometry()
+            if engine.flat_offsets is not self.engine_offsets:
+                self._rebuild_points()
+            distance = engine.distance[:count]
+            slots = engine.line_slot[:count]
+            start = engine.line_start[slots]
+            segment = np.minimum(np.maximum(np.searchsorted(engine.shifted_offsets, distance + slots * LINE_STRIDE, side="right") - 1, start), start + engine.segment_count[slots] - 1)
+            offsets = engine.flat_offsets
+            length = offsets[segment + 1] - offsets[segment]
+            t = np.minimum(np.maximum(np.divide(distance - offsets[segment], length, out=np.zeros(count), where=length > 0), 0.0), 1.0)
+            points = self.flat_points
+            position = points[segment] + t[:, None] * (points[segment + 1] - points[segment])
+            buffers["train_xy"][:count] = position / (WIDTH, HEIGHT)
+
+            trains = engine.trains[:count]
+            buffers["train_load"][:count] = [len(train.riders) / train.capacity for train in trains]
+
+            # Line and type only change when trains are added or removed (or lines move up after a deletion)
+            trains_key = (self.lines_key, tuple(map(id, trains)))
+            if trains_key != self.trains_key:
+                self.trains_key = trains_key
+                train_line = buffers["train_line"]
+                train_type = buffers["train_type"]
+                train_line[:count] = 0
+                train_type[:count] = 0
+                for i, train in enumerate(trains):
+                    row = self.line_rows.get(train.line.id)
+                    if row is not None:
+                        train_line[i, row] = 1.0
+                    train_type[i, train.type.value] = 1.0
+                buffers["train_mask"][:count] = 1.0
+
+        if self.raster_size:
+            raster = buffers["raster"]
+            if self.train_pixels is not None:
+                raster[RASTER_TRAINS][self.train_pixels] = 0.0
+            size = self.raster_size
+            xy = buffers["train_xy"][:count]
+            rows = np.minimum(np.maximum((xy[:, 1] * size).astype(np.int64), 0), size - 1)
+            columns = np.minimum(np.maximum((xy[:, 0] * size).astype(np.int64), 0), size - 1)
+            raster[RASTER_TRAINS][rows, columns] = 1.0
+            self.train_pixels = (rows, columns)
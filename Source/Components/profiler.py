@@ -0,0 +1,234 @@
+import csv
+import json
+import math
+import time
+
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Any, Optional, Union, Deque, ContextManager
+
+import numpy as np
+import pygame
+
+from textCache import TextCache
+
+# Design constants
+HISTOGRAM_MIN: float        = 1e-6      # Seconds at the top of the first bucket
+HISTOGRAM_BUCKETS: int      = 88        # Four buckets per doubling, up to about 4 seconds
+HISTOGRAM_RATIO: float      = 2 ** 0.25
+FRAME_HISTORY: int          = 600       # Ten seconds of per-frame section times at 60 FPS
+SPIKE_THRESHOLD: float      = 2 / 60    # A frame slower than two 60 FPS frames is a spike
+SPIKE_HISTORY: int          = 100
+FRAME_SECTION: str          = "frame"
+
+# Visual constants
+OVERLAY_FONT_SIZE: int      = 20
+OVERLAY_PADDING: int        = 6
+OVERLAY_LINE_HEIGHT: int    = 16
+OVERLAY_BG_COLOR: tuple     = (20, 20, 20)
+OVERLAY_TEXT_COLOR: tuple   = (230, 230, 230)
+OVERLAY_SPIKE_COLOR: tuple  = (255, 120, 90)
+
+# Upper edge of every histogram bucket; the last bucket also takes anything slower
+HISTOGRAM_EDGES: np.ndarray = HISTOGRAM_MIN * HISTOGRAM_RATIO ** np.arange(1, HISTOGRAM_BUCKETS + 1)
+
+# Shared do-nothing context returned while the profiler is off, so a disabled section costs one call
+NULL_SECTION: ContextManager = nullcontext()
+
+
+class SectionStats:
+    """Running totals, a log-spaced histogram and the per-frame history of one named section."""
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.histogram: np.ndarray = np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)
+        # Time spent in the section during the current frame, and during each recent frame
+        self.frame_total: float = 0.0
+        self.frames: Deque[float] = deque(maxlen=FRAME_HISTORY)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.frame_total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = math.ceil(math.log(seconds / HISTOGRAM_MIN, HISTOGRAM_RATIO)) - 1 if seconds > HISTOGRAM_MIN else 0
+        self.histogram[min(max(bucket, 0), HISTOGRAM_BUCKETS - 1)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the histogram bucket holding the given fraction of samples (an upper bound, in seconds)."""
+        if not self.count:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.histogram), fraction * self.count))
+        return min(float(HISTOGRAM_EDGES[min(bucket, HISTOGRAM_BUCKETS - 1)]), self.max)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count":    self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms":  self.mean * 1000,
+            "max_ms":   self.max * 1000,
+            "p50_ms":   self.percentile(0.50) * 1000,
+            "p95_ms":   self.percentile(0.95) * 1000,
+            "p99_ms":   self.percentile(0.99) * 1000,
+            "histogram": self.histogram.tolist(),
+        }
+
+
+class Section:
+    """Reusable timer context for one section name; sections of different names can nest."""
+
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats: SectionStats):
+        self.stats: SectionStats = stats
+        self.start: float = 0.0
+
+    def __enter__(self) -> "Section":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stats.add(time.perf_counter() - self.start)
+
+
+class Profiler:
+    """Scoped wall-clock timers for the game loop, with per-section histograms and frame-spike attribution.
+
+    Code wraps work in `with profiler.section("name"):`. While the profiler is disabled that returns a shared
+    null context, so instrumentation left in hot paths costs about one method call. end_frame() closes a frame:
+    each section's time in that frame goes into its history, and frames slower than SPIKE_THRESHOLD are kept
+    with their per-section breakdown so a slow frame can be traced to what caused it.
+    """
+
+    def __init__(self, enabled: bool = False, overlay: bool = False):
+        self.enabled: bool = enabled
+        self.overlay: bool = overlay
+        self.stats: Dict[str, SectionStats] = {}
+        self.sections: Dict[str, Section] = {}
+        self.frame_count: int = 0
+        self.frame_start: Optional[float] = None
+        self.spikes: Deque[Dict[str, Any]] = deque(maxlen=SPIKE_HISTORY)
+        self.overlay_text: Optional[TextCache] = None
+
+    def configure(self, enabled: Optional[bool] = None, overlay: Optional[bool] = None) -> None:
+        """Turn timing and the on-screen overlay on or off. The overlay needs timing, so showing it enables it."""
+        if enabled is not None:
+            self.enabled = enabled
+        if overlay is not None:
+            self.overlay = overlay
+            if overlay:
+                self.enabled = True
+        if not self.enabled:
+            self.overlay = False
+            self.frame_start = None
+
+    def toggle_overlay(self) -> None:
+        self.configure(overlay=not self.overlay)
+
+    def section(self, name: str) -> ContextManager:
+        """Get a timer context for a section (a no-op while disabled)."""
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self._stats(name))
+        return section
+
+    def _stats(self, name: str) -> SectionStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = SectionStats(name)
+        return stats
+
+    def end_frame(self) -> None:
+        """Close the current frame: record its wall time and every section's share of it."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self._stats(FRAME_SECTION).add(now - self.frame_start)
+        self.frame_start = now
+
+        frame = self.stats.get(FRAME_SECTION)
+        frame_time = frame.frame_total if frame else 0.0
+        if frame_time > SPIKE_THRESHOLD:
+            self.spikes.append({
+                "frame": self.frame_count,
+                "frame_ms": frame_time * 1000,
+                "sections_ms": {name: stats.frame_total * 1000 for name, stats in self.stats.items() if name != FRAME_SECTION and stats.frame_total > 0},
+            })
+
+        for stats in self.stats.values():
+            stats.frames.append(stats.frame_total)
+            stats.frame_total = 0.0
+        self.frame_count += 1
+
+    def reset(self) -> None:
+        """Drop every statistic collected so far."""
+        self.stats.clear()
+        self.sections.clear()
+        self.spikes.clear()
+        self.frame_count = 0
+        self.frame_start = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-section statistics and the recorded spikes, ready for JSON."""
+        return {
+            "frames": self.frame_count,
+            "histogram_edges_ms": (HISTOGRAM_EDGES * 1000).tolist(),
+            "sections": {name: stats.summary() for name, stats in self.stats.items()},
+            "spikes": list(self.spikes),
+        }
+
+    def dump_json(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self.summary(), indent=2))
+
+    def dump_csv(self, path: Union[str, Path]) -> None:
+        """Write the recent per-frame history: one row per frame, one column (in ms) per section."""
+        names = sorted(self.stats)
+        frames = min((len(self.stats[name].frames) for name in names), default=0)
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame"] + [f"{name}_ms" for name in names])
+            # Sections first seen later have shorter histories, so rows are aligned from the most recent frame
+            first = self.frame_count - frames
+            for row in range(frames):
+                writer.writerow([first + row] + [f"{self.stats[name].frames[len(self.stats[name].frames) - frames + row] * 1000:.4f}" for name in names])
+
+    def render_overlay(self, surface: pygame.Surface) -> Optional[pygame.Rect]:
+        """Draw a table of last-frame, mean and p95 times per section in the top-left corner and return its area."""
+        if not self.overlay or not self.stats:
+            return None
+        if self.overlay_text is None:
+            self.overlay_text = TextCache(pygame.font.Font(None, OVERLAY_FONT_SIZE))
+
+        rows = [("section", "last", "mean", "p95", OVERLAY_TEXT_COLOR)]
+        for name in sorted(self.stats, key=lambda name: (name != FRAME_SECTION, name)):
+            stats = self.stats[name]
+            last = stats.frames[-1] if stats.frames else 0.0
+            color = OVERLAY_SPIKE_COLOR if name == FRAME_SECTION and last > SPIKE_THRESHOLD else OVERLAY_TEXT_COLOR
+            rows.append((name, f"{last * 1000:.2f}", f"{stats.mean * 1000:.2f}", f"{stats.percentile(0.95) * 1000:.2f}", color))
+        rows.append((f"spikes: {len(self.spikes)}", "", "", "", OVERLAY_TEXT_COLOR))
+
+        columns = [0, 130, 185, 240]
+        area = pygame.Rect(0, 0, 290 + 2 * OVERLAY_PADDING, len(rows) * OVERLAY_LINE_HEIGHT + 2 * OVERLAY_PADDING)
+        pygame.draw.rect(surface, OVERLAY_BG_COLOR, area)
+        for i, (*cells, color) in enumerate(rows):
+            y = OVERLAY_PADDING + i * OVERLAY_LINE_HEIGHT
+            for x, text in zip(columns, cells):
+                if text:
+                    surface.blit(self.overlay_text.render(text, color), (OVERLAY_PADDING + x, y))
+        return area
+
+
+# Global profiler instance, disabled until configured
+profiler = Profiler()
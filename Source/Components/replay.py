@@ -0,0 +1,194 @@
+import argparse
+import struct
+import sys
+import time
+
+import numpy as np
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Tuple, Dict, Optional, Union, BinaryIO
+
+from minimetro import MiniMetro, FPS
+from gameState import GameSnapshot
+from typeEnums import PlayerAction
+from eventLog import logger
+
+# Design constants
+REPLAY_MAGIC: bytes         = b"MMRP"
+REPLAY_VERSION: int         = 1
+KEYFRAME_INTERVAL: int      = 10 * FPS      # Ticks between playback keyframes
+
+# Little-endian layouts: header (magic, version, FPS, entropy bytes, spawn key length) and one action record
+HEADER: struct.Struct       = struct.Struct("<4sHHHH")
+RECORD: struct.Struct       = struct.Struct("<IBii")
+
+
+@dataclass
+class ReplayAction:
+    tick: int
+    action: PlayerAction
+    a: int = 0
+    b: int = 0
+
+
+@dataclass
+class Replay:
+    """A recorded session: the game seed and every player action with the tick it was applied at.
+
+    end holds the final tick and the passengers arrived and lost when the recording was closed, or None
+    if the recording was cut short.
+    """
+    seed: np.random.SeedSequence
+    actions: List[ReplayAction] = field(default_factory=list)
+    end: Optional[ReplayAction] = None
+
+    @property
+    def end_tick(self) -> int:
+        if self.end:
+            return self.end.tick
+        return self.actions[-1].tick if self.actions else 0
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "Replay":
+        """Read a replay file."""
+        data = Path(path).read_bytes()
+        magic, version, fps, entropy_size, key_size = HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        if fps != FPS:
+            raise ValueError(f"{path} was recorded at {fps} ticks per second, the game runs at {FPS}")
+
+        offset = HEADER.size
+        entropy = int.from_bytes(data[offset:offset + entropy_size], "little")
+        offset += entropy_size
+        spawn_key = struct.unpack_from(f"<{key_size}I", data, offset)
+        offset += 4 * key_size
+        replay = Replay(np.random.SeedSequence(entropy, spawn_key=spawn_key))
+
+        # A truncated trailing record (the game was killed mid-write) is ignored
+        for tick, action, a, b in RECORD.iter_unpack(data[offset:offset + (len(data) - offset) // RECORD.size * RECORD.size]):
+            if action == PlayerAction.End:
+                replay.end = ReplayAction(tick, PlayerAction.End, a, b)
+                break
+            replay.actions.append(ReplayAction(tick, PlayerAction(action), a, b))
+        return replay
+
+
+class ReplayRecorder:
+    """Writes the seed of a new game and every action later passed to its perform() into a replay file."""
+
+    def __init__(self, metro: MiniMetro, path: Union[str, Path]):
+        if metro.sim_clock.ticks != 0:
+            raise ValueError("Replays must be recorded from the start of a game")
+        self.metro: MiniMetro = metro
+        self.path: Path = Path(path)
+        self.file: Optional[BinaryIO] = open(self.path, "wb")
+
+        seed = metro.rng.seed_sequence
+        entropy = seed.entropy
+        if not isinstance(entropy, int):
+            raise ValueError("Only games seeded with an int (or unseeded) can be recorded")
+        entropy_bytes = entropy.to_bytes((entropy.bit_length() + 7) // 8, "little")
+        spawn_key = tuple(seed.spawn_key)
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, FPS, len(entropy_bytes), len(spawn_key)))
+        self.file.write(entropy_bytes)
+        self.file.write(struct.pack(f"<{len(spawn_key)}I", *spawn_key))
+        metro.recorder = self
+
+    def record(self, tick: int, action: PlayerAction, a: int = 0, b: int = 0) -> None:
+        if self.file:
+            self.file.write(RECORD.pack(tick, action, a, b))
+
+    def close(self) -> None:
+        """Write the end record (final tick and score, which playback can verify against) and close the file."""
+        if self.file is None:
+            return
+        tracker = self.metro.tracker
+        self.file.write(RECORD.pack(self.metro.sim_clock.ticks, PlayerAction.End, tracker.passengers_arrived, tracker.passengers_lost))
+        self.file.close()
+        self.file = None
+        self.metro.recorder = None
+
+
+class ReplayPlayer:
+    """Re-simulates a replay on a headless game as fast as the CPU allows.
+
+    The state at tick t is the game after t ticks with every action recorded at or before t applied. A snapshot
+    is kept every keyframe_interval ticks as playback passes it, so seek() to any tick restores the nearest
+    earlier keyframe and only replays the ticks after it. Keyframes leave out the metric history.
+    """
+
+    def __init__(self, replay: Replay, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.replay: Replay = replay
+        self.keyframe_interval: int = keyframe_interval
+        # SeedSequence counts the children spawned from it, so every player starts from a fresh copy of the seed
+        seed = np.random.SeedSequence(replay.seed.entropy, spawn_key=replay.seed.spawn_key)
+        self.metro: MiniMetro = MiniMetro(headless=True, seed=seed)
+        self.next_action: int = 0
+        self._apply_actions()
+        self.keyframes: Dict[int, Tuple[GameSnapshot, int]] = {0: (self.metro.snapshot(), self.next_action)}
+
+    @property
+    def tick(self) -> int:
+        return self.metro.sim_clock.ticks
+
+    def _apply_actions(self) -> None:
+        """Apply every action recorded up to the current tick."""
+        actions = self.replay.actions
+        while self.next_action < len(actions) and actions[self.next_action].tick <= self.tick:
+            action = actions[self.next_action]
+            self.metro.perform(action.action, action.a, action.b)
+            self.next_action += 1
+
+    def advance_to(self, tick: int) -> MiniMetro:
+        """Play forward to a tick (no-op if already past it) and return the game."""
+        while self.tick < tick:
+            self.metro.step()
+            self._apply_actions()
+            if self.tick % self.keyframe_interval == 0 and self.tick not in self.keyframes:
+                self.keyframes[self.tick] = (self.metro.snapshot(), self.next_action)
+        return self.metro
+
+    def seek(self, tick: int) -> MiniMetro:
+        """Jump to any tick, backwards or forwards, through the nearest keyframe at or before it."""
+        keyframe = max(key for key in self.keyframes if key <= tick)
+        # Stepping on is cheaper than restoring when the game is already between the keyframe and the target
+        if not keyframe <= self.tick <= tick:
+            snapshot, next_action = self.keyframes[keyframe]
+            self.metro.restore(snapshot)
+            self.next_action = next_action
+        return self.advance_to(tick)
+
+    def play(self) -> MiniMetro:
+        """Play to the end of the recording."""
+        return self.advance_to(self.replay.end_tick)
+
+    def verify(self) -> bool:
+        """Play to the end and check the score matches the one recorded (always True for a cut-short recording)."""
+        metro = self.play()
+        end = self.replay.end
+        return end is None or (metro.tracker.passengers_arrived, metro.tracker.passengers_lost) == (end.a, end.b)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-simulate a MiniMetro replay headlessly")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--tick", type=int, help="stop at this tick instead of the end of the recording")
+    args = parser.parse_args()
+    
+    logger.configure(console=False)
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    metro = player.advance_to(args.tick) if args.tick is not None else player.play()
+    elapsed = time.perf_counter() - start
+    
+    tracker = metro.tracker
+    print(f"{len(replay.actions)} actions, {player.tick} ticks in {elapsed:.2f}s ({player.tick / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"Stations: {len(metro.stations)}  Lines: {len(metro.lines)}  Trains: {len(metro.trains)}")
+    print(f"Passengers: {tracker.total_passengers}  Arrived: {tracker.passengers_arrived}  Lost: {tracker.passengers_lost}")
+    if args.tick is None and replay.end:
+        matches = (tracker.passengers_arrived, tracker.passengers_lost) == (replay.end.a, replay.end.b)
+        print("Matches the recorded score" if matches else f"DIVERGED: recorded {replay.end.a} arrived, {replay.end.b} lost")
+        sys.exit(0 if matches else 1)
@@ -1,16 +1,23 @@
 import pygame
 import os
 
-from typing import Dict, Tuple, Optional
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, Tuple, Optional, List
 from pathlib import Path
 
-from typeEnums import StationType, TrainType
+from typeEnums import StationType, TrainType, LogEvent
+from eventLog import logger
 
 # Resource paths
 ASSETS_DIR: Path = Path("Source/Assets/Images")
 SPRITES_DIR: Path = ASSETS_DIR / "Sprites"
 BACKGROUNDS_DIR: Path = ASSETS_DIR / "Backgrounds"
 
+# Cache constants
+ROTATION_STEPS: int     = 72    # 5 degree buckets for rotated sprites
+TINT_CACHE_SIZE: int    = 256   # Tinted sprites kept in the LRU
+
 # Station sprite paths
 STATION_SPRITES: Dict[StationType, str] = {
     StationType.Circle: "circle.png",
@@ -46,9 +53,16 @@ class ResourceManager:
         self.station_sprites: Dict[StationType, pygame.Surface] = {}
         self.train_sprites: Dict[TrainType, pygame.Surface] = {}
         self.rider_sprites: Dict[StationType, pygame.Surface] = {}
-        self.background: Optional[pygame.Surface] = self.load_background()
+        self.background: Optional[pygame.Surface] = None
         self.use_sprites: bool = False
         self._sprites_loaded: bool = False
+        self._background_loaded: bool = False
+        
+        # Transformed sprites, so nothing is scaled, tinted or rotated more than once per variant
+        self._scaled: Dict[Tuple[str, Enum, int], pygame.Surface] = {}
+        self._rotations: Dict[Tuple[TrainType, int], List[pygame.Surface]] = {}
+        self._scaled_backgrounds: Dict[Tuple[int, int], pygame.Surface] = {}
+        self._tinted: "OrderedDict[Tuple[Enum, int, Tuple[int, int, int]], pygame.Surface]" = OrderedDict()
         
         self._ensure_directories()
     
@@ -89,58 +103,82 @@ class ResourceManager:
             self._sprites_loaded = True
             
             if self.use_sprites:
-                print(f"Loaded {len(self.station_sprites)} station sprites, {len(self.train_sprites)} train sprites, {len(self.rider_sprites)} rider sprites")
+                logger.log(LogEvent.SpritesLoaded, stations=len(self.station_sprites), trains=len(self.train_sprites), riders=len(self.rider_sprites))
         except Exception as e:
-            print(f"Error loading sprites: {e}")
+            logger.log(LogEvent.ResourceError, resource="sprites", error=e)
             self.use_sprites = False
     
     def load_background(self) -> bool:
-        """Load a background image."""
+        """Load a background image. Called lazily after pygame init."""
+        self._background_loaded = True
         filename = "back.png"
         path = BACKGROUNDS_DIR / filename
         if path.exists():
             try:
                 self.background = pygame.image.load(str(path)).convert()
-                print(f"Loaded background: {filename}")
+                self._scaled_backgrounds.clear()
+                logger.log(LogEvent.BackgroundLoaded, filename=filename)
                 return True
             except Exception as e:
-                print(f"Error loading background: {e}")
+                logger.log(LogEvent.ResourceError, resource="background", error=e)
         return False
     
-    def get_station_sprite(self, station_type: StationType, size: int) -> Optional[pygame.Surface]:
-        """Get scaled station sprite for given type."""
+    def _get_scaled(self, kind: str, sprites: Dict, sprite_type: Enum, size: int) -> Optional[pygame.Surface]:
+        """Get a sprite scaled to (size * 2, size * 2), scaling it only the first time."""
         if not self._sprites_loaded:
             self._load_sprites()
         
-        if station_type in self.station_sprites:
-            sprite = self.station_sprites[station_type]
-            return pygame.transform.scale(sprite, (size * 2, size * 2))
-        return None
+        key = (kind, sprite_type, size)
+        if key not in self._scaled:
+            if sprite_type not in sprites:
+                return None
+            self._scaled[key] = pygame.transform.scale(sprites[sprite_type], (size * 2, size * 2))
+        return self._scaled[key]
     
-    def get_train_sprite(self, train_type: TrainType, size: int) -> Optional[pygame.Surface]:
-        """Get scaled train sprite for given type."""
-        if not self._sprites_loaded:
-            self._load_sprites()
+    def get_station_sprite(self, station_type: StationType, size: int, tint: Optional[Tuple[int, int, int]] = None) -> Optional[pygame.Surface]:
+        """Get scaled station sprite for given type, optionally multiplied by a tint color."""
+        sprite = self._get_scaled("station", self.station_sprites, station_type, size)
+        if sprite is None or tint is None:
+            return sprite
         
-        if train_type in self.train_sprites:
-            sprite = self.train_sprites[train_type]
-            return pygame.transform.scale(sprite, (size * 2, size * 2))
-        return None
+        key = (station_type, size, tint)
+        tinted = self._tinted.get(key)
+        if tinted is None:
+            tinted = sprite.copy()
+            tinted.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+            self._tinted[key] = tinted
+            if len(self._tinted) > TINT_CACHE_SIZE:
+                self._tinted.popitem(last=False)
+        else:
+            self._tinted.move_to_end(key)
+        return tinted
+    
+    def get_train_sprite(self, train_type: TrainType, size: int, angle: Optional[float] = None) -> Optional[pygame.Surface]:
+        """Get scaled train sprite for given type, optionally rotated counter-clockwise by angle degrees (quantized)."""
+        sprite = self._get_scaled("train", self.train_sprites, train_type, size)
+        if sprite is None or angle is None:
+            return sprite
+        
+        key = (train_type, size)
+        if key not in self._rotations:
+            # Build every rotation bucket for this sprite at once
+            step = 360 / ROTATION_STEPS
+            self._rotations[key] = [pygame.transform.rotate(sprite, i * step) for i in range(ROTATION_STEPS)]
+        return self._rotations[key][round(angle * ROTATION_STEPS / 360) % ROTATION_STEPS]
     
     def get_rider_sprite(self, destination_type: StationType, size: int) -> Optional[pygame.Surface]:
         """Get scaled rider sprite for given destination type."""
-        if not self._sprites_loaded:
-            self._load_sprites()
-        
-        if destination_type in self.rider_sprites:
-            sprite = self.rider_sprites[destination_type]
-            return pygame.transform.scale(sprite, (size * 2, size * 2))
-        return None
+        return self._get_scaled("rider", self.rider_sprites, destination_type, size)
     
     def get_background(self, screen_size: Tuple[int, int]) -> Optional[pygame.Surface]:
         """Get background scaled to screen size."""
+        if not self._background_loaded:
+            self.load_background()
+        
         if self.background:
-            return pygame.transform.scale(self.background, screen_size)
+            if screen_size not in self._scaled_backgrounds:
+                self._scaled_backgrounds[screen_size] = pygame.transform.scale(self.background, screen_size)
+            return self._scaled_backgrounds[screen_size]
         return None
 
 
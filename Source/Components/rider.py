@@ -1,40 +1,50 @@
 import pygame
 
-from time import time
-from uuid import uuid1, UUID
-from typing import Tuple
+import numpy as np
+
+from collections import deque
+from typing import Tuple, List, Deque, Iterator, Optional
 
 import shapes
 from resourceManager import resources
 
 from typeEnums import StationType
-from tracker import Tracker
 
 # Design constants
 RIDER_PATIENCE: float = 30.0
 RIDER_SIZE: int = 5
 RIDER_COLOR: Tuple[int, int, int] = (200, 100, 100)
+RIDER_POOL_SIZE: int = 4096
 
 class Rider:
-    """Represents a passenger waiting at a station."""
+    """Represents a passenger waiting at a station or riding a train.
+    
+    Riders are small slotted records handed out by their game's RiderPool; patience is tracked by the
+    RiderQueue of the station they wait at rather than by each rider.
+    """
+    
+    __slots__ = ("id", "origin_id", "destination_type", "spawn_time")
+    
+    patience: float = RIDER_PATIENCE
     
-    def __init__(self, origin: UUID, destination: StationType, tracker: Tracker = None):
-        self.origin_id: UUID = origin
+    def __init__(self, id: int, origin: int, destination: StationType, spawn_time: float):
+        self.id: int = id
+        self.origin_id: int = origin
         self.destination_type: StationType = destination
-        self.patience: float = RIDER_PATIENCE
-        self.spawn_time = time()
-        self.id: UUID = uuid1()
-        
-        self.abandon: bool = False    
+        self.spawn_time: float = spawn_time
     
-        self.tracker = tracker
+    @property
+    def expiry(self) -> float:
+        """Time after which the rider gives up waiting."""
+        return self.spawn_time + self.patience
     
-    def render(self, screen: pygame.Surface, x, y):
+    def render(self, screen: pygame.Surface, x, y) -> pygame.Rect:
+        """Render the rider at (x, y) and return the area drawn."""
         # Try to render sprite first
         sprite = resources.get_rider_sprite(self.destination_type, RIDER_SIZE)
         if sprite and resources.use_sprites:
             rect = sprite.get_rect(center=(x, y))
-            screen.blit(sprite, rect)
+            return screen.blit(sprite, rect)
         else:
             # Fallback to geometric shapes
             shapes.CustomShape.render_shape(
@@ -46,9 +56,110 @@ class Rider:
                 width=2,
                 color=RIDER_COLOR
             )
+            return pygame.Rect(x - RIDER_SIZE, y - RIDER_SIZE, RIDER_SIZE * 2, RIDER_SIZE * 2)
+
+
+class RiderPool:
+    """Free list of Rider records so delivered and lost riders are reused instead of reallocated.
+    
+    Each game owns one pool, which also hands out its rider ids, so ids depend only on that game.
+    """
+    
+    def __init__(self, max_free: int = RIDER_POOL_SIZE):
+        self.free: List[Rider] = []
+        self.max_free: int = max_free
+        self.next_id: int = 0
+    
+    def acquire(self, origin: int, destination: StationType, spawn_time: float) -> Rider:
+        """Get a rider record, reusing a released one when available."""
+        id = self.next_id
+        self.next_id += 1
+        if self.free:
+            rider = self.free.pop()
+            rider.id = id
+            rider.origin_id = origin
+            rider.destination_type = destination
+            rider.spawn_time = spawn_time
+            return rider
+        return Rider(id, origin, destination, spawn_time)
+    
+    def release(self, rider: Rider) -> None:
+        """Return a rider that left the game (delivered or lost) to the pool."""
+        if len(self.free) < self.max_free:
+            self.free.append(rider)
+
+
+class RiderQueue:
+    """Riders waiting at a station, kept in spawn order so expiry only ever looks at the front.
+    
+    counts holds how many riders wait for each StationType (by value). One ObservationEncoder at a time can
+    bind it to a row of its own buffer, so the observation is updated as riders come and go.
+    """
     
-    def update(self):
-        if time() > self.spawn_time + self.patience and not self.abandon:
-            self.abandon = True
-            if self.tracker:
-                self.tracker.passengers_lost += 1
\ No newline at end of file
+    def __init__(self, pool: RiderPool):
+        self.pool: RiderPool = pool
+        self.riders: Deque[Rider] = deque()
+        self.counts: np.ndarray = np.zeros(len(StationType), dtype=np.float32)
+        self.bound: bool = False
+    
+    def __len__(self) -> int:
+        return len(self.riders)
+    
+    def __iter__(self) -> Iterator[Rider]:
+        return iter(self.riders)
+    
+    def __getitem__(self, index: int) -> Rider:
+        return self.riders[index]
+    
+    def append(self, rider: Rider) -> None:
+        """Add a rider, keeping spawn order (transferring riders can be older than the newest one waiting)."""
+        index = len(self.riders)
+        while index > 0 and self.riders[index - 1].spawn_time > rider.spawn_time:
+            index -= 1
+        if index == len(self.riders):
+            self.riders.append(rider)
+        else:
+            self.riders.insert(index, rider)
+        self.counts[rider.destination_type.value] += 1
+    
+    def pop(self, index: int) -> Rider:
+        """Remove and return the rider at a position (used when boarding)."""
+        rider = self.riders[index]
+        del self.riders[index]
+        self.counts[rider.destination_type.value] -= 1
+        return rider
+    
+    def next_expiry(self) -> Optional[float]:
+        """Time after which the longest-waiting rider gives up, or None if nobody is waiting."""
+        return self.riders[0].expiry if self.riders else None
+    
+    def expire(self, now: float) -> int:
+        """Drop riders that ran out of patience and return how many gave up."""
+        lost = 0
+        while self.riders and now > self.riders[0].expiry:
+            rider = self.riders.popleft()
+            self.counts[rider.destination_type.value] -= 1
+            self.pool.release(rider)
+            lost += 1
+        return lost
+    
+    def recount(self) -> None:
+        """Recompute counts after riders were put in the deque directly (e.g. when restoring a snapshot)."""
+        self.counts[:] = 0
+        for rider in self.riders:
+            self.counts[rider.destination_type.value] += 1
+    
+    def bind(self, counts: np.ndarray) -> None:
+        """Keep the per-type counts in an outside buffer from now on."""
+        if self.bound:
+            raise RuntimeError("Rider queue counts are already bound to another buffer; unbind() them first")
+        counts[:] = self.counts
+        self.counts = counts
+        self.bound = True
+    
+    def unbind(self) -> None:
+        """Go back to counting in the queue's own array; the outside buffer stops updating."""
+        if self.bound:
+            self.counts = self.counts.copy()
+            self.bound = False
+
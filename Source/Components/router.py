@@ -0,0 +1,117 @@
+import heapq
+import math
+
+from typing import List, Dict, Tuple, Set
+
+from line import Line
+from station import Station
+from typeEnums import StationType
+
+# Design constants
+TRANSFER_PENALTY: float = 2.0   # Cost of changing lines, in stops
+
+Node = Tuple[int, int]          # (station id, line id)
+
+
+class Router:
+    """Transfer-aware routing tables from every served station to every StationType.
+
+    For each destination type the router runs a multi-source Dijkstra over (station, line) nodes,
+    where riding to a neighbouring station costs one stop and changing lines costs TRANSFER_PENALTY.
+    Tables are rebuilt lazily, only after invalidate() has been called for a network change, and
+    board/alight decisions are then plain dictionary lookups.
+    """
+
+    def __init__(self, lines: List[Line]):
+        self.lines: List[Line] = lines
+        self.dirty: bool = True
+        self.version: int = 0
+
+        # Cost to reach each type when riding a given line from a station, and the best cost over all lines
+        self.costs: Dict[Node, Dict[StationType, float]] = {}
+        self.best: Dict[int, Dict[StationType, float]] = {}
+
+    def invalidate(self) -> None:
+        """Mark the tables stale after lines were created, extended, closed or deleted."""
+        self.dirty = True
+
+    def _ensure_built(self) -> None:
+        if self.dirty:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Rebuild the routing tables from the current lines."""
+        neighbours: Dict[Node, List[Tuple[Node, float]]] = {}
+        station_lines: Dict[int, List[int]] = {}
+        stations: Dict[int, Station] = {}
+
+        for line in self.lines:
+            count = len(line.stations)
+            loop = line.circular and count > 2
+            for i, station in enumerate(line.stations):
+                stations[station.id] = station
+                station_lines.setdefault(station.id, []).append(line.id)
+                adjacent = neighbours.setdefault((station.id, line.id), [])
+                if i > 0 or loop:
+                    adjacent.append(((line.stations[i - 1].id, line.id), 1.0))
+                if i < count - 1 or loop:
+                    adjacent.append(((line.stations[(i + 1) % count].id, line.id), 1.0))
+
+        # Changing lines at a shared station
+        for station_id, line_ids in station_lines.items():
+            for line_id in line_ids:
+                for other_id in line_ids:
+                    if other_id != line_id:
+                        neighbours[(station_id, line_id)].append(((station_id, other_id), TRANSFER_PENALTY))
+
+        self.costs = {node: {} for node in neighbours}
+        self.best = {station_id: {} for station_id in station_lines}
+        destination_types: Set[StationType] = {station.station_type for station in stations.values()}
+
+        for destination_type in destination_types:
+            # Every node at a station of the destination type is a source with zero cost
+            distances: Dict[Node, float] = {}
+            queue: List[Tuple[float, int, Node]] = []
+            for order, node in enumerate(neighbours):
+                if stations[node[0]].station_type == destination_type:
+                    distances[node] = 0.0
+                    queue.append((0.0, order, node))
+            heapq.heapify(queue)
+
+            order = len(queue)
+            while queue:
+                cost, _, node = heapq.heappop(queue)
+                if cost > distances[node]:
+                    continue
+                for adjacent, weight in neighbours[node]:
+                    candidate = cost + weight
+                    if candidate < distances.get(adjacent, math.inf):
+                        distances[adjacent] = candidate
+                        order += 1
+                        heapq.heappush(queue, (candidate, order, adjacent))
+
+            for node, cost in distances.items():
+                self.costs[node][destination_type] = cost
+                best = self.best[node[0]]
+                if cost < best.get(destination_type, math.inf):
+                    best[destination_type] = cost
+
+        self.dirty = False
+        self.version += 1
+
+    def should_board(self, station: Station, line: Line, destination_type: StationType) -> bool:
+        """Whether a rider waiting at station should board a train of line: it is on a best route to the destination."""
+        self._ensure_built()
+        cost = self.costs.get((station.id, line.id), {}).get(destination_type, math.inf)
+        return cost < math.inf and cost <= self.best[station.id][destination_type]
+
+    def should_alight(self, station: Station, line: Line, destination_type: StationType) -> bool:
+        """Whether a rider on a train of line should get off at station, either arriving or transferring."""
+        if station.station_type == destination_type:
+            return True
+        self._ensure_built()
+        cost = self.costs.get((station.id, line.id), {}).get(destination_type, math.inf)
+        best = self.best.get(station.id, {}).get(destination_type, math.inf)
+        # The cost aboard already includes switching here; it only reaches best + penalty when switching is the way to go.
+        # An unreachable destination (both infinite) is no reason to get off.
+        return cost < math.inf and best + TRANSFER_PENALTY <= cost
@@ -0,0 +1,52 @@
+import math
+
+# Design constants
+DEFAULT_TICK: float = 1.0 / 60
+
+
+class SimClock:
+    """Deterministic simulation clock that advances by a fixed dt on every tick."""
+    
+    def __init__(self, dt: float = DEFAULT_TICK, start: float = 0.0):
+        self.dt: float = dt
+        self.start: float = start
+        self.ticks: int = 0
+        self.time: float = start
+    
+    def now(self) -> float:
+        """Get the current simulation time in seconds."""
+        return self.time
+    
+    def tick(self) -> float:
+        """Advance the clock by one tick and return the new simulation time."""
+        self.ticks += 1
+        # Derived from the tick count rather than accumulated so long runs do not drift
+        self.time = self.time_of(self.ticks)
+        return self.time
+    
+    def time_of(self, ticks: int) -> float:
+        """Get the simulation time at a given tick count."""
+        return self.start + ticks * self.dt
+    
+    def tick_at(self, time: float) -> int:
+        """Get the first tick whose time is at or after the given time."""
+        ticks = max(math.ceil((time - self.start) / self.dt), 0)
+        # Correct for rounding so the result agrees with the comparisons made in fixed-tick mode
+        while ticks > 0 and self.time_of(ticks - 1) >= time:
+            ticks -= 1
+        while self.time_of(ticks) < time:
+            ticks += 1
+        return ticks
+    
+    def tick_after(self, time: float) -> int:
+        """Get the first tick whose time is strictly after the given time."""
+        ticks = self.tick_at(time)
+        while self.time_of(ticks) <= time:
+            ticks += 1
+        return ticks
+    
+    def jump(self, ticks: int) -> float:
+        """Move the clock straight to a tick count, as the event-driven core does between events."""
+        self.ticks = ticks
+        self.time = self.time_of(ticks)
+        return self.time
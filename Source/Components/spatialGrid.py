@@ -0,0 +1,118 @@
+import math
+
+from typing import Dict, List, Tuple, Hashable, Any, Optional, Iterator, Callable
+
+Cell = Tuple[int, int]
+
+
+class SpatialGrid:
+    """Uniform grid that buckets items by cell so neighbourhood queries only touch nearby cells."""
+
+    def __init__(self, cell_size: int):
+        self.cell_size: int = cell_size
+        self.cells: Dict[Cell, Dict[Hashable, Any]] = {}
+        self.item_cells: Dict[Hashable, List[Cell]] = {}
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def _cells_in_box(self, x1: float, y1: float, x2: float, y2: float) -> Iterator[Cell]:
+        cx1, cy1 = self._cell(x1, y1)
+        cx2, cy2 = self._cell(x2, y2)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                yield (cx, cy)
+
+    def _add(self, key: Hashable, item: Any, cells: List[Cell]) -> None:
+        if key in self.item_cells:
+            self.remove(key)
+        self.item_cells[key] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, {})[key] = item
+
+    def insert_point(self, key: Hashable, item: Any, x: float, y: float) -> None:
+        """Insert an item at a single point."""
+        self._add(key, item, [self._cell(x, y)])
+
+    def insert_segment(self, key: Hashable, item: Any, p1: Tuple[float, float], p2: Tuple[float, float], padding: float = 0) -> None:
+        """Insert an item into every cell that comes within padding of the segment p1-p2."""
+        (x1, y1), (x2, y2) = p1, p2
+        # A cell is touched if the segment passes within padding of its square, i.e. of its centre plus half a diagonal
+        reach = padding + self.cell_size * math.sqrt(2) / 2
+        cells = []
+        for cell in self._cells_in_box(min(x1, x2) - padding, min(y1, y2) - padding, max(x1, x2) + padding, max(y1, y2) + padding):
+            centre = ((cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size)
+            if distance_to_segment(centre, p1, p2) <= reach:
+                cells.append(cell)
+        self._add(key, item, cells)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove an item from every cell it occupies."""
+        for cell in self.item_cells.pop(key, []):
+            bucket = self.cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self.cells[cell]
+
+    def query(self, x: float, y: float, radius: float) -> List[Any]:
+        """Get every item stored in cells overlapping the square of the given radius around (x, y).
+
+        Results are candidates: callers still apply their exact distance test.
+        """
+        found: Dict[Hashable, Any] = {}
+        for cell in self._cells_in_box(x - radius, y - radius, x + radius, y + radius):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return list(found.values())
+
+    def nearest(self, x: float, y: float, position_of: Callable[[Any], Tuple[float, float]], max_distance: float) -> Optional[Any]:
+        """Get the item closest to (x, y) within max_distance by searching outward ring by ring. position_of maps an item to its (x, y)."""
+        cx, cy = self._cell(x, y)
+        best, best_distance = None, math.inf
+        for ring in range(int(max_distance // self.cell_size) + 2):
+            for cell in self._ring(cx, cy, ring):
+                for item in self.cells.get(cell, {}).values():
+                    ix, iy = position_of(item)
+                    distance = math.hypot(ix - x, iy - y)
+                    if distance < best_distance:
+                        best, best_distance = item, distance
+            # Anything in the next ring is at least ring * cell_size away
+            if best is not None and best_distance <= ring * self.cell_size:
+                break
+
+        if best_distance > max_distance:
+            return None
+        return best
+
+    def _ring(self, cx: int, cy: int, ring: int) -> Iterator[Cell]:
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
+
+
+def distance_to_segment(point: Tuple[float, float], p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
+    """Get the distance from a point to the segment p1-p2."""
+    px, py = point
+    x1, y1 = p1
+    x2, y2 = p2
+
+    dx = x2 - x1
+    dy = y2 - y1
+
+    # Handle zero-length segment
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.sqrt((px - x1) ** 2 + (py - y1) ** 2)
+
+    # Project point onto line, clamped to segment
+    t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_squared))
+    closest_x = x1 + t * dx
+    closest_y = y1 + t * dy
+    return math.sqrt((px - closest_x) ** 2 + (py - closest_y) ** 2)
@@ -1,17 +1,16 @@
 import pygame
-import time
 
-from random import randint
-from uuid import uuid1, UUID
-from typing import List, Tuple
-from random import choice
+from typing import Tuple, Optional
 
 import shapes
 from resourceManager import resources
 
-from typeEnums import StationType
-from rider import Rider
+from typeEnums import StationType, LogEvent
+from rider import RiderQueue, RiderPool
 from tracker import Tracker
+from simClock import SimClock
+from gameRandom import GameRandom, default_random
+from eventLog import logger
 
 # Design constants
 STATION_LIMIT: int = 20
@@ -27,16 +26,19 @@ SELECTED_COLOR: Tuple[int, int, int] = (255, 255, 255)
 class Station:
     """Represents a metro station with a shape and position."""
     
-    def __init__(self, x: int, y: int, type: StationType, tracker: Tracker = None):
+    def __init__(self, x: int, y: int, type: StationType, clock: SimClock, rider_pool: RiderPool, tracker: Tracker = None, rng: Optional[GameRandom] = None):
         self.x: int = x
         self.y: int = y
         self.station_type: StationType = type
-        self.id: UUID = uuid1()
+        self.id: int = -1    # Assigned by the game's station registry
         self.limit: int = STATION_LIMIT
-        self.last_spawn_time: float = time.time()
-        self.riders: List[Rider] = []
+        self.clock: SimClock = clock
+        self.last_spawn_time: float = clock.now()
+        self.rider_pool: RiderPool = rider_pool
+        self.riders: RiderQueue = RiderQueue(rider_pool)
         
         self.tracker = tracker
+        self.rng: GameRandom = rng if rng else default_random
     
     def type(self) -> str:
         """Get the station type name."""
@@ -47,14 +49,16 @@ class Station:
         return f"{self.station_type.name} at ({self.x}, {self.y})"
     
     def render(self, screen: pygame.Surface, selected: bool = False) -> None:
-        """Render the station shape on the given surface."""        
+        """Render the station shape and its waiting riders on the given surface."""
+        self.render_shape(screen, selected)
+        self.render_riders(screen)
+    
+    def render_shape(self, screen: pygame.Surface, selected: bool = False) -> None:
+        """Render the station shape on the given surface."""
         # Try to render sprite first
         color = SELECTED_COLOR if selected else (UNSERVICED_COLOR if self.tracker.serviced_stations[self.id] == 0 else SERVICED_COLOR)
-        sprite = resources.get_station_sprite(self.station_type, STATION_SIZE)
-        if sprite and resources.use_sprites:
-            # Tint the sprite with the color
-            tinted_sprite = sprite.copy()
-            tinted_sprite.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+        tinted_sprite = resources.get_station_sprite(self.station_type, STATION_SIZE, tint=color)
+        if tinted_sprite and resources.use_sprites:
             rect = tinted_sprite.get_rect(center=(self.x, self.y))
             screen.blit(tinted_sprite, rect)
         else:
@@ -69,16 +73,20 @@ class Station:
                 color=color
             )
     
+    def render_riders(self, screen: pygame.Surface) -> Optional[pygame.Rect]:
+        """Render the waiting riders next to the station and return the area drawn, if any."""
         rider_y: int = self.y - 20
         rider_x: int = self.x + 30
+        rects = []
         for rider in self.riders:
-            rider.render(screen, rider_x, rider_y)
+            rects.append(rider.render(screen, rider_x, rider_y))
             rider_x += 15
+        return rects[0].unionall(rects[1:]) if rects else None
 
     def should_create_rider(self) -> bool:
         """Check if enough time has passed to spawn a new rider."""
-        if time.time() - self.last_spawn_time >= RIDER_SPAWN_INTERVAL:
-            self.last_spawn_time = time.time()
+        if self.clock.now() - self.last_spawn_time >= RIDER_SPAWN_INTERVAL:
+            self.last_spawn_time = self.clock.now()
             return True
         return False
 
@@ -86,20 +94,25 @@ class Station:
         """Update station state (spawn riders)."""
         if self.should_create_rider() and len(self.riders) < self.limit:
             self.create_passenger()
-        for rider in self.riders:
-            rider.update()
-        
-        self.riders = [rider for rider in self.riders if not rider.abandon]
+        self.expire_riders()
+    
+    def expire_riders(self) -> None:
+        """Drop riders that ran out of patience."""
+        lost = self.riders.expire(self.clock.now())
+        if self.tracker and lost > 0:
+            self.tracker.record_lost(self.id, lost)
         
     def create_passenger(self) -> None:
-        destination_type: StationType = choice(list(self.tracker.station_types))
+        # Sorted so the pick depends only on the RNG, not on set iteration order (which differs between copies of a game)
+        destination_type: StationType = self.rng.choice(sorted(self.tracker.station_types, key=lambda type: type.value))
             
         # Does not add the rider to the station if it's destination is already this station. This adds a little variability and randomness to the time in which drivers are created
         if destination_type == self.station_type:
             return
         
-        new_rider = Rider(self.id, destination_type, tracker=self.tracker)
+        new_rider = self.rider_pool.acquire(self.id, destination_type, self.clock.now())
         self.riders.append(new_rider)
-        print(f"New rider at {self.describe()}: wants {destination_type.name} ({len(self.riders)} waiting)")
+        if logger.enabled(LogEvent.RiderSpawned):
+            logger.log(LogEvent.RiderSpawned, station_type=self.station_type.name, x=self.x, y=self.y, destination=destination_type.name, waiting=len(self.riders))
         if self.tracker:
-            self.tracker.total_passengers += 1
\ No newline at end of file
+            self.tracker.record_spawn(self.id)
\ No newline at end of file
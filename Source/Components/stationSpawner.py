@@ -0,0 +1,102 @@
+import math
+
+from typing import List, Tuple, Optional, Callable
+
+from gameRandom import GameRandom
+
+# Design constants
+SAMPLE_ATTEMPTS: int = 30
+
+
+class StationSpawner:
+    """Seedable Poisson-disk (Bridson) candidate set for station locations.
+
+    The whole blue-noise set is generated on first use and shuffled, so every candidate is at least
+    `spacing` away from every other one and handing out a location never needs rejection sampling.
+    Once the candidates run out the map is saturated.
+    """
+
+    def __init__(self, bounds: Tuple[int, int, int, int], spacing: int, rng: Optional[GameRandom] = None, attempts: int = SAMPLE_ATTEMPTS):
+        self.bounds: Tuple[int, int, int, int] = bounds
+        self.spacing: int = spacing
+        self.attempts: int = attempts
+        self.rng: GameRandom = rng if rng else GameRandom()
+
+        self._candidates: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def candidates(self) -> List[Tuple[int, int]]:
+        """Locations not handed out yet, sampled the first time they are needed."""
+        if self._candidates is None:
+            self._candidates = self._sample()
+            self.rng.shuffle(self._candidates)
+        return self._candidates
+
+    @candidates.setter
+    def candidates(self, value: List[Tuple[int, int]]) -> None:
+        self._candidates = value
+
+    @property
+    def saturated(self) -> bool:
+        """True once every candidate location has been handed out."""
+        return not self.candidates
+
+    def next_location(self, is_valid: Callable[[int, int], bool]) -> Optional[Tuple[int, int]]:
+        """Get the next candidate accepted by is_valid, or None if the map is saturated."""
+        while self.candidates:
+            x, y = self.candidates.pop()
+            if is_valid(x, y):
+                return (x, y)
+        return None
+
+    def _sample(self) -> List[Tuple[int, int]]:
+        """Generate a Poisson-disk point set over the bounds with Bridson's active-list algorithm."""
+        min_x, min_y, max_x, max_y = self.bounds
+        # Sample slightly further apart so rounding to whole pixels never breaks the spacing
+        radius = self.spacing + math.sqrt(2)
+        cell_size = radius / math.sqrt(2)
+        columns = int((max_x - min_x) / cell_size) + 1
+        rows = int((max_y - min_y) / cell_size) + 1
+        grid: List[Optional[Tuple[float, float]]] = [None] * (columns * rows)
+
+        def cell_of(x: float, y: float) -> Tuple[int, int]:
+            return (int((x - min_x) / cell_size), int((y - min_y) / cell_size))
+
+        def fits(x: float, y: float) -> bool:
+            if not (min_x <= x <= max_x and min_y <= y <= max_y):
+                return False
+            cx, cy = cell_of(x, y)
+            for gx in range(max(cx - 2, 0), min(cx + 3, columns)):
+                for gy in range(max(cy - 2, 0), min(cy + 3, rows)):
+                    point = grid[gy * columns + gx]
+                    if point and (point[0] - x) ** 2 + (point[1] - y) ** 2 < radius * radius:
+                        return False
+            return True
+
+        def add(x: float, y: float) -> None:
+            cx, cy = cell_of(x, y)
+            grid[cy * columns + cx] = (x, y)
+            points.append((x, y))
+            active.append((x, y))
+
+        points: List[Tuple[float, float]] = []
+        active: List[Tuple[float, float]] = []
+        add(self.rng.uniform(min_x, max_x), self.rng.uniform(min_y, max_y))
+
+        while active:
+            index = self.rng.randrange(len(active))
+            x, y = active[index]
+            for _ in range(self.attempts):
+                angle = self.rng.uniform(0, 2 * math.pi)
+                distance = self.rng.uniform(radius, 2 * radius)
+                nx = x + math.cos(angle) * distance
+                ny = y + math.sin(angle) * distance
+                if fits(nx, ny):
+                    add(nx, ny)
+                    break
+            else:
+                # No room left around this point
+                active[index] = active[-1]
+                active.pop()
+
+        return [(round(x), round(y)) for x, y in points]
@@ -0,0 +1,67 @@
+import numpy as np
+
+from actionMasks import ActionMasks
+from minimetro import MiniMetro, WIDTH, HEIGHT
+from typeEnums import PlayerAction
+
+MASK_ACTIONS = {
+    "connect":      PlayerAction.Connect,
+    "extend":       PlayerAction.ExtendLine,
+    "close_loop":   PlayerAction.CloseLoop,
+    "remove_line":  PlayerAction.RemoveLine,
+    "add_train":    PlayerAction.PlaceTrain,
+    "remove_train": PlayerAction.RemoveTrain,
+}
+
+
+def assert_masks_match_a_rebuild(metro: MiniMetro) -> None:
+    rebuilt = ActionMasks()
+    rebuilt.rebuild(metro)
+    expected = rebuilt.masks(bool(metro.lines_available), metro.train_quantity < metro.max_trains)
+    for name, mask in metro.legal_actions().items():
+        assert np.array_equal(mask, expected[name]), name
+
+
+def random_action(metro: MiniMetro, rng: np.random.Generator) -> tuple:
+    """A move allowed by the masks most of the time, otherwise anything (clicks and stale indices included)."""
+    if rng.random() < 0.7:
+        legal = [(name, index) for name, mask in metro.legal_actions().items() for index in np.argwhere(mask)]
+        if legal:
+            name, index = legal[rng.integers(len(legal))]
+            return (MASK_ACTIONS[name], *(int(i) for i in index), 0)[:3]
+    kind = rng.choice([PlayerAction.Click, PlayerAction.CreateStation, PlayerAction.DeleteTrain, PlayerAction.Connect, PlayerAction.ExtendLine, PlayerAction.RemoveLine])
+    if kind == PlayerAction.Click:
+        return kind, int(rng.integers(WIDTH)), int(rng.integers(HEIGHT))
+    return kind, int(rng.integers(-1, 20)), int(rng.integers(-1, 20))
+
+
+def test_masks_stay_in_sync_under_random_actions_and_restores():
+    rng = np.random.default_rng(0)
+    metro = MiniMetro(headless=True, seed=4)
+    for _ in range(6):
+        metro.create_station()
+    snapshots = []
+    for step in range(3000):
+        metro.perform(*random_action(metro, rng))
+        metro.step()
+        if step % 10 == 0:
+            assert_masks_match_a_rebuild(metro)
+        if step % 250 == 0:
+            snapshots.append(metro.snapshot())
+        if step % 400 == 399:
+            metro.restore(snapshots[int(rng.integers(len(snapshots)))])
+            assert_masks_match_a_rebuild(metro)
+
+
+def test_every_move_the_masks_allow_is_accepted():
+    rng = np.random.default_rng(1)
+    metro = MiniMetro(headless=True, seed=5)
+    for _ in range(8):
+        metro.create_station()
+    for _ in range(300):
+        legal = [(name, index) for name, mask in metro.legal_actions().items() for index in np.argwhere(mask)]
+        name, index = legal[rng.integers(len(legal))]
+        arguments = [int(i) for i in index] + [0]
+        assert metro.perform(MASK_ACTIONS[name], *arguments[:2]), (name, arguments)
+        for _ in range(20):
+            metro.step()
@@ -0,0 +1,69 @@
+from networkBuilder import build_network
+from eventSim import EventSimulation, travel, ticks_to_cover
+from typeEnums import StationType
+
+
+def test_ticks_to_cover_matches_the_tick_by_tick_arrival_rule():
+    acceleration, max_speed = 0.05, 2.0
+    for distance in [0.01, 0.5, 3.0, 17.5, 40.0, 41.0, 120.0, 999.0]:
+        # Arrived once the distance left is within half a tick of travel
+        ticks = 1
+        while True:
+            covered, speed = travel(ticks, acceleration, max_speed)
+            if covered + speed / 2 >= distance:
+                break
+            ticks += 1
+        assert ticks_to_cover(distance, acceleration, max_speed) == ticks, distance
+
+
+def test_event_simulation_tracks_the_fixed_tick_game():
+    # Single games drift apart (same-tick events draw random numbers in a different order), so compare totals over seeds
+    names = ("total_passengers", "passengers_arrived", "passengers_lost")
+    ticked_totals = dict.fromkeys(names, 0)
+    jumped_totals = dict.fromkeys(names, 0)
+    for seed in range(6):
+        ticked = build_network(20, lines=2, trains_per_line=2, seed=seed)
+        jumped = ticked.fork()
+        for _ in range(180 * 60):
+            ticked.step()
+        EventSimulation(jumped).advance(180)
+
+        assert jumped.sim_clock.ticks == ticked.sim_clock.ticks
+        assert len(jumped.stations) == len(ticked.stations)
+        for name in names:
+            ticked_totals[name] += getattr(ticked.tracker, name)
+            jumped_totals[name] += getattr(jumped.tracker, name)
+
+    for name in names:
+        assert abs(jumped_totals[name] - ticked_totals[name]) <= 0.05 * ticked_totals[name], name
+
+
+def test_riders_spawning_during_a_dwell_can_board():
+    metro = build_network(2, lines=1, seed=0)
+    origin, destination = metro.stations
+    if destination.station_type == origin.station_type:
+        destination.station_type = next(type for type in StationType if type != origin.station_type)
+        metro.router.invalidate()
+    # Every new rider wants the other end of the line
+    metro.tracker.station_types = {destination.station_type}
+
+    simulation = EventSimulation(metro)
+    simulation.run_until(metro.sim_clock.ticks + 1)
+    train = metro.trains[0]
+    assert train.at_station and train.station_parked is origin
+    # Keep the train dwelling well past the spawn
+    simulation._schedule_dwell(train, metro.sim_clock.ticks + 600)
+
+    simulation._on_rider_spawn(origin)
+    simulation.run_until(metro.sim_clock.ticks + 1)
+    assert len(train.riders) == 1 and not origin.riders
+
+
+def test_events_are_far_fewer_than_ticks():
+    metro = build_network(4, lines=1, seed=0)
+    simulation = EventSimulation(metro)
+    ticks = metro.sim_clock.ticks
+    simulation.run_until(ticks + 600)
+    # Ten seconds of a four-station network: a few dozen events, not one per tick
+    assert simulation.events_processed < 60
+    assert metro.sim_clock.ticks == ticks + 600
@@ -0,0 +1,51 @@
+from environment import VectorEnv
+from gameRandom import GameRandom
+from minimetro import MiniMetro
+
+
+def draws(rng: GameRandom, count: int = 50) -> list:
+    return [rng.randint(0, 1000) for _ in range(count)]
+
+
+def test_same_seed_same_stream_and_children_differ():
+    assert draws(GameRandom(7)) == draws(GameRandom(7))
+    assert draws(GameRandom(7)) != draws(GameRandom(8))
+    parent = GameRandom(7)
+    assert draws(parent.spawn()) != draws(parent.spawn())
+
+
+def test_state_continues_the_stream():
+    rng = GameRandom(3)
+    draws(rng, 10)
+    state = rng.get_state()
+    expected = draws(rng)
+    rng.set_state(state)
+    assert draws(rng) == expected
+
+
+def test_seeded_games_are_reproducible():
+    def play(seed: int) -> tuple:
+        metro = MiniMetro(headless=True, seed=seed)
+        for _ in range(3):
+            metro.create_station()
+        metro.connect(0, 1)
+        for _ in range(3600):
+            metro.step()
+        return [(station.x, station.y, station.station_type) for station in metro.stations], metro.tracker.total_passengers
+
+    assert play(11) == play(11)
+    assert play(11) != play(12)
+
+
+def test_vector_env_results_do_not_depend_on_worker_processes():
+    def rollout(processes: int) -> list:
+        env = VectorEnv(2, processes=processes, seed=5, episode_seconds=30, ticks_per_step=60)
+        env.reset()
+        try:
+            for _ in range(20):
+                observations, _, _, _ = env.step([None, None])
+            return [(observation["station_xy"].tolist(), observation["queue"].tolist()) for observation in observations]
+        finally:
+            env.close()
+
+    assert rollout(0) == rollout(2)
@@ -0,0 +1,50 @@
+from networkBuilder import build_network
+from minimetro import MiniMetro
+
+
+def state(metro: MiniMetro) -> tuple:
+    """Everything a diverging game would differ in: clock, score, stations, riders, lines and train positions."""
+    tracker = metro.tracker
+    return (
+        metro.sim_clock.ticks,
+        (tracker.total_passengers, tracker.passengers_arrived, tracker.passengers_lost),
+        [(station.id, station.x, station.y, station.station_type, [rider.id for rider in station.riders]) for station in metro.stations],
+        [(line.id, [station.id for station in line.stations], line.circular) for line in metro.lines],
+        [(train.id, train.line.id, round(train.distance_traveled, 6), [rider.id for rider in train.riders]) for train in metro.trains],
+    )
+
+
+def run(metro: MiniMetro, ticks: int) -> MiniMetro:
+    for _ in range(ticks):
+        metro.step()
+    return metro
+
+
+def test_fork_plays_on_exactly_like_the_original():
+    metro = build_network(30, lines=3, trains_per_line=2, seed=1, loaded_ticks=600)
+    fork = metro.fork()
+    assert state(fork) == state(metro)
+    assert state(run(fork, 1800)) == state(run(metro, 1800))
+
+
+def test_restore_rewinds_and_a_snapshot_can_be_restored_again():
+    metro = build_network(30, lines=3, trains_per_line=2, seed=2, loaded_ticks=600)
+    snapshot = metro.snapshot()
+    first = state(run(metro, 1200))
+
+    metro.restore(snapshot)
+    # The restored game can change without touching the snapshot
+    metro.connect(0, len(metro.stations) - 1)
+    run(metro, 300)
+
+    metro.restore(snapshot)
+    assert state(run(metro, 1200)) == first
+
+
+def test_fork_is_independent_of_the_original():
+    metro = build_network(20, lines=2, trains_per_line=1, seed=3, loaded_ticks=300)
+    before = state(metro)
+    fork = metro.fork()
+    fork.remove_line(0)
+    run(fork, 600)
+    assert state(metro) == before
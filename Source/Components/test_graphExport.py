@@ -0,0 +1,27 @@
+import shutil
+
+from graphExport import GraphExporter, EXPORT_QUEUE_SIZE
+from tracker import Tracker
+
+
+def test_failed_writes_are_counted_and_the_worker_keeps_going(tmp_path):
+    directory = tmp_path / "graphs"
+    tracker = Tracker()
+    exporter = GraphExporter(tracker, directory, interval=0, formats=("json",), prefix="test")
+    shutil.rmtree(directory)
+
+    # More exports than the queue holds: a dead worker would leave them queued and make close() hang
+    for i in range(EXPORT_QUEUE_SIZE * 2):
+        tracker.mark_changed()
+        exporter.update(float(i))
+    exporter.close()
+    assert not exporter.thread.is_alive()
+    assert exporter.failed == exporter.exports > 0
+
+    directory.mkdir()
+    exporter = GraphExporter(tracker, directory, interval=0, formats=("json",), prefix="test")
+    tracker.mark_changed()
+    exporter.update(0.0)
+    exporter.close()
+    assert exporter.failed == 0
+    assert len(list(directory.iterdir())) == 1
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from networkBuilder import build_network
+from idRegistry import IdRegistry
+
+
+def test_ids_are_dense_and_never_reused():
+    registry = IdRegistry()
+    items = [SimpleNamespace() for _ in range(3)]
+    assert [registry.add(item) for item in items] == [0, 1, 2]
+
+    registry.remove(1)
+    assert registry.get(1) is None
+    assert registry.add(SimpleNamespace()) == 3
+    assert [item.id for item in registry] == [0, 2, 3]
+    assert len(registry) == 4
+
+
+def test_insert_and_reset_keep_numbering():
+    registry = IdRegistry()
+    registry.reset(5)
+    item = SimpleNamespace()
+    registry.insert(item, 2)
+    assert registry.get(2) is item
+    assert registry.add(SimpleNamespace()) == 5
+
+
+def test_game_ids_survive_deletion_and_restore():
+    metro = build_network(20, lines=2, trains_per_line=1, seed=0)
+    assert [station.id for station in metro.stations] == list(range(len(metro.stations)))
+
+    deleted = metro.lines[1]
+    metro.remove_line(1)
+    assert metro.line_registry.get(deleted.id) is None
+    line = metro.connect(0, len(metro.stations) - 1)
+    assert line.id == len(metro.line_registry) - 1 > deleted.id
+
+    snapshot = metro.snapshot()
+    metro.restore(snapshot)
+    assert all(metro.line_registry.get(restored.id) is restored for restored in metro.lines)
+    assert all(metro.train_registry.get(train.id) is train for train in metro.trains)
+    assert metro.connect(1, len(metro.stations) - 2).id == line.id + 1
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from minimetro import MiniMetro, WIDTH, HEIGHT
+from observation import ObservationEncoder
+from typeEnums import PlayerAction, StationType
+
+
+def recompute(metro: MiniMetro, encoder: ObservationEncoder) -> dict:
+    """The same features as the encoder, rebuilt from scratch from the game objects."""
+    S = encoder.station_slots
+    queue = np.zeros((S, len(StationType)), dtype=np.float32)
+    for i, station in enumerate(metro.stations[:S]):
+        for rider in station.riders:
+            queue[i, rider.destination_type.value] += 1
+    adjacency = np.zeros((S, S), dtype=np.float32)
+    for line in metro.lines:
+        stations = line.stations + line.stations[:1] if line.circular and len(line.stations) > 2 else line.stations
+        for origin, destination in zip(stations, stations[1:]):
+            if origin.id < S and destination.id < S:
+                adjacency[origin.id, destination.id] = adjacency[destination.id, origin.id] = 1.0
+    trains = metro.train_engine.trains[:metro.train_engine.count][:encoder.train_slots]
+    return {
+        "queue": queue,
+        "adjacency": adjacency,
+        "train_xy": np.array([train.get_position() for train in trains], dtype=np.float32).reshape(-1, 2) / (WIDTH, HEIGHT),
+        "train_load": np.array([len(train.riders) / train.capacity for train in trains], dtype=np.float32),
+    }
+
+
+def test_incremental_encoding_matches_a_full_recompute():
+    rng = np.random.default_rng(0)
+    metro = MiniMetro(headless=True, seed=2)
+    for _ in range(4):
+        metro.create_station()
+    encoder = ObservationEncoder(metro, raster_size=32)
+    snapshot = None
+    for step in range(6000):
+        metro.step()
+        if step % 7 == 0:
+            stations, lines = len(metro.stations), len(metro.lines)
+            kind = rng.random()
+            if kind < 0.3:
+                metro.connect(int(rng.integers(stations)), int(rng.integers(stations)))
+            elif lines and kind < 0.6:
+                metro.extend_line(int(rng.integers(lines)), int(rng.integers(stations)))
+            elif lines and kind < 0.65:
+                metro.close_loop(int(rng.integers(lines)))
+            elif lines and kind < 0.68:
+                metro.remove_line(int(rng.integers(lines)))
+            elif lines and kind < 0.8:
+                metro.perform(PlayerAction.PlaceTrain, int(rng.integers(lines)), int(rng.integers(3)))
+        if step == 2000:
+            snapshot = metro.snapshot()
+        if step == 4000:
+            metro.restore(snapshot)
+        if step % 5 == 0:
+            observation = encoder.update()
+            expected = recompute(metro, encoder)
+            trains = len(expected["train_load"])
+            assert np.array_equal(observation["queue"], expected["queue"]), step
+            assert np.array_equal(observation["adjacency"], expected["adjacency"]), step
+            # Positions are interpolated in float64 and stored in float32; allow a fraction of a pixel
+            assert np.abs(observation["train_xy"][:trains] - expected["train_xy"]).max(initial=0) <= 1.5 / WIDTH, step
+            assert np.allclose(observation["train_load"][:trains], expected["train_load"]), step
+            assert observation["train_mask"].sum() == trains
+            assert observation["station_mask"].sum() == min(len(metro.stations), encoder.station_slots)
+
+
+def test_entities_beyond_the_slots_are_counted_in_globals():
+    metro = MiniMetro(headless=True, seed=3)
+    for _ in range(6):
+        metro.create_station()
+    metro.connect(0, 1)
+    metro.connect(2, 3)
+    metro.max_trains = 10
+    for _ in range(3):
+        metro.place_train(0)
+    observation = ObservationEncoder(metro, station_slots=4, line_slots=1, train_slots=2).update()
+    assert observation["station_mask"].sum() == 4
+    assert observation["train_mask"].sum() == 2
+    assert observation["globals"][-3:].tolist() == [2, 1, len(metro.trains) - 2]
+
+
+def test_a_second_encoder_needs_the_first_closed():
+    metro = MiniMetro(headless=True, seed=4)
+    for _ in range(3):
+        metro.create_station()
+    first = ObservationEncoder(metro)
+    first.update()
+    with pytest.raises(RuntimeError):
+        ObservationEncoder(metro).update()
+
+    first.close()
+    second = ObservationEncoder(metro)
+    second.update()
+    metro.stations[0].create_passenger()
+    for _ in range(30):
+        metro.stations[1].create_passenger()
+    assert second.update()["queue"][:3].sum() == sum(len(station.riders) for station in metro.stations)
@@ -0,0 +1,47 @@
+from minimetro import MiniMetro
+from typeEnums import StationType
+
+
+def make_game(*types: StationType) -> MiniMetro:
+    """A headless game with one station of each given type, spaced out along a row."""
+    metro = MiniMetro(headless=True, seed=0)
+    for i, type in enumerate(types):
+        station = metro.create_station((100 + 150 * i, 300))
+        station.station_type = type
+    return metro
+
+
+def test_riders_alight_at_their_destination_type():
+    metro = make_game(StationType.Circle, StationType.Triangle, StationType.Square)
+    line = metro.connect(0, 1)
+    metro.extend_line(0, 2)
+    circle, triangle, square = metro.stations
+
+    assert metro.router.should_board(circle, line, StationType.Square)
+    assert not metro.router.should_alight(triangle, line, StationType.Square)
+    assert metro.router.should_alight(square, line, StationType.Square)
+
+
+def test_riders_change_lines_where_the_other_line_is_shorter():
+    metro = make_game(StationType.Circle, StationType.Triangle, StationType.Square, StationType.Cross, StationType.Pentagon)
+    # Circle-Triangle-Square-Cross on one line, Triangle-Pentagon on another
+    first = metro.connect(0, 1)
+    metro.extend_line(0, 2)
+    metro.extend_line(0, 3)
+    second = metro.connect(1, 4)
+    triangle = metro.stations[1]
+
+    assert metro.router.should_alight(triangle, first, StationType.Pentagon)
+    assert metro.router.should_board(triangle, second, StationType.Pentagon)
+    assert not metro.router.should_board(triangle, second, StationType.Cross)
+
+
+def test_riders_stay_aboard_when_their_destination_type_has_no_route():
+    metro = make_game(StationType.Circle, StationType.Triangle, StationType.Square)
+    line = metro.connect(0, 1)
+    circle, triangle, _ = metro.stations
+
+    # No line reaches the square, so there is no reason to get off (or on) anywhere
+    assert not metro.router.should_alight(circle, line, StationType.Square)
+    assert not metro.router.should_alight(triangle, line, StationType.Square)
+    assert not metro.router.should_board(circle, line, StationType.Square)
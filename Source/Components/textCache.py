@@ -0,0 +1,46 @@
+import pygame
+
+from collections import OrderedDict
+from typing import Tuple
+
+# Design constants
+TEXT_CACHE_SIZE: int = 128
+
+
+class TextCache:
+    """Bounded LRU of rendered text surfaces for one font, so unchanged strings are never re-rendered."""
+    
+    def __init__(self, font: pygame.font.Font, max_size: int = TEXT_CACHE_SIZE):
+        self.font: pygame.font.Font = font
+        self.max_size: int = max_size
+        self.surfaces: "OrderedDict[Tuple[str, Tuple[int, int, int], bool], pygame.Surface]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of render() calls served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def render(self, text: str, color: Tuple[int, int, int], antialias: bool = True) -> pygame.Surface:
+        """Get the surface for a string, rendering it only if it is not cached."""
+        key = (text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        surface = self.font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def clear(self) -> None:
+        """Drop every cached surface and reset the statistics."""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
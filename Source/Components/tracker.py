@@ -1,38 +1,177 @@
+import numpy as np
+
 from dataclasses import dataclass, field
-from typing import Set, Dict
-from uuid import UUID
+from typing import Set, Dict, List
 
 from typeEnums import StationType
 
+# Design constants
+METRIC_HISTORY: int = 36000     # Samples kept per series, ten minutes of ticks at 60 FPS
+
+# Columns of the metrics time series, one row per sample
+METRIC_COLUMNS: List[str] = [
+    "time",
+    "spawned",          # Riders created since the previous sample
+    "arrived",          # Riders delivered since the previous sample
+    "lost",             # Riders that gave up since the previous sample
+    "waiting",          # Riders waiting at stations
+    "aboard",           # Riders on trains
+    "average_wait",     # Mean time from spawning to first boarding so far
+    "load_factor",      # Riders aboard over total train capacity
+]
+
+
+class MetricSeries:
+    """Fixed-size ring buffer of metric rows that can be exported as a NumPy array in time order."""
+    
+    def __init__(self, columns: List[str], size: int = METRIC_HISTORY):
+        self.columns: List[str] = columns
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(columns)}
+        self.buffer: np.ndarray = np.zeros((size, len(columns)))
+        self.head: int = 0
+        self.count: int = 0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def append(self, row: tuple) -> None:
+        """Write a row over the oldest one once the buffer is full."""
+        self.buffer[self.head] = row
+        self.head = (self.head + 1) % len(self.buffer)
+        self.count = min(self.count + 1, len(self.buffer))
+    
+    def to_array(self) -> np.ndarray:
+        """Get every stored row, oldest first."""
+        if self.count < len(self.buffer):
+            return self.buffer[:self.count].copy()
+        return np.concatenate([self.buffer[self.head:], self.buffer[:self.head]])
+    
+    def column(self, name: str) -> np.ndarray:
+        """Get one column of the stored rows, oldest first."""
+        return self.to_array()[:, self.index[name]]
+
+
 @dataclass
 class Tracker:
-    """Tracks game-wide statistics for passengers."""
+    """Tracks game-wide statistics for passengers.
+    
+    Counters are updated incrementally by the record_* methods at the event sites, so reading any metric
+    (and sampling the time series once per tick) never scans stations or trains.
+    """
     total_passengers: int   = 0
     passengers_arrived: int = 0
     passengers_lost: int    = 0
     station_types: Set[StationType]     = field(default_factory=set)
-    serviced_stations: Dict[UUID, int]  = field(default_factory=dict)
-    station_service_dict: Dict[UUID, Set[StationType]] = field(default_factory=dict)
-    line_service_dict: Dict[UUID, Set[StationType]] = field(default_factory=dict)
+    serviced_stations: Dict[int, int]  = field(default_factory=dict)
+    station_service_dict: Dict[int, Set[StationType]] = field(default_factory=dict)
+    line_service_dict: Dict[int, Set[StationType]] = field(default_factory=dict)
+    version: int            = 0     # Bumped whenever the service dicts change
     
-def generate_mermaid_graph(tracker: Tracker) -> str:
-    """
-    Generate a mermaid graph showing lines and stations connected by serviced types.
-    """
-    mermaid_lines = ["graph TD"]
-
-    # Connect lines to service types
-    for line_id, service_types in tracker.line_service_dict.items():
-        line_node = f"Line_{str(line_id).replace('-', '')}"
-        for stype in service_types:
-            service_node = f"Type_{stype}"
-            mermaid_lines.append(f"{line_node} --> {service_node}")
-
-    # Connect stations to service types
-    for station_id, service_types in tracker.station_service_dict.items():
-        station_node = f"Station_{str(station_id).replace('-', '')}"
-        for stype in service_types:
-            service_node = f"Type_{stype}"
-            mermaid_lines.append(f"{station_node} --> {service_node}")
-
-    return "\n".join(mermaid_lines)
\ No newline at end of file
+    # Live state
+    waiting: int            = 0
+    aboard: int             = 0
+    station_queue: Dict[int, int]  = field(default_factory=dict)
+    line_load: Dict[int, int]      = field(default_factory=dict)
+    line_capacity: Dict[int, int]  = field(default_factory=dict)
+    total_capacity: int     = 0
+    
+    # Wait times (spawn to first boarding) and trip times (spawn to arrival)
+    total_wait_time: float  = 0.0
+    first_boardings: int    = 0
+    total_trip_time: float  = 0.0
+    
+    series: MetricSeries = field(default_factory=lambda: MetricSeries(METRIC_COLUMNS))
+    _last_sample: tuple = (0, 0, 0)
+    
+    @property
+    def average_wait(self) -> float:
+        """Mean time riders waited at their origin before boarding."""
+        return self.total_wait_time / self.first_boardings if self.first_boardings else 0.0
+    
+    @property
+    def average_trip(self) -> float:
+        """Mean time from spawning to arriving for delivered riders."""
+        return self.total_trip_time / self.passengers_arrived if self.passengers_arrived else 0.0
+    
+    @property
+    def load_factor(self) -> float:
+        """Riders aboard over the capacity of every train in the game."""
+        return self.aboard / self.total_capacity if self.total_capacity else 0.0
+    
+    def line_load_factor(self, line_id: int) -> float:
+        """Riders aboard over train capacity on one line."""
+        capacity = self.line_capacity.get(line_id, 0)
+        return self.line_load.get(line_id, 0) / capacity if capacity else 0.0
+    
+    def mark_changed(self) -> None:
+        """Note a change to the service graph (stations, lines or the types they serve)."""
+        self.version += 1
+    
+    def record_spawn(self, station_id: int) -> None:
+        """A rider appeared at a station."""
+        self.total_passengers += 1
+        self.waiting += 1
+        self.station_queue[station_id] = self.station_queue.get(station_id, 0) + 1
+    
+    def record_lost(self, station_id: int, count: int) -> None:
+        """Riders gave up waiting at a station."""
+        self.passengers_lost += count
+        self.waiting -= count
+        self.station_queue[station_id] -= count
+    
+    def record_boarding(self, station_id: int, line_id: int, wait_time: float, first: bool) -> None:
+        """A rider boarded a train of a line; first is True when boarding at the rider's origin."""
+        self.waiting -= 1
+        self.aboard += 1
+        self.station_queue[station_id] -= 1
+        self.line_load[line_id] = self.line_load.get(line_id, 0) + 1
+        if first:
+            self.total_wait_time += wait_time
+            self.first_boardings += 1
+    
+    def record_transfer(self, station_id: int, line_id: int) -> None:
+        """A rider got off a train to wait for another line."""
+        self.waiting += 1
+        self.aboard -= 1
+        self.station_queue[station_id] = self.station_queue.get(station_id, 0) + 1
+        self.line_load[line_id] -= 1
+    
+    def record_arrival(self, line_id: int, trip_time: float) -> None:
+        """A rider reached its destination."""
+        self.passengers_arrived += 1
+        self.aboard -= 1
+        self.line_load[line_id] -= 1
+        self.total_trip_time += trip_time
+    
+    def record_train_added(self, line_id: int, capacity: int) -> None:
+        """A train with some capacity was put on a line."""
+        self.line_capacity[line_id] = self.line_capacity.get(line_id, 0) + capacity
+        self.total_capacity += capacity
+        self.line_load.setdefault(line_id, 0)
+    
+    def record_train_removed(self, line_id: int, capacity: int, riders: int) -> None:
+        """A train was taken off a line, together with the riders it carried."""
+        self.line_capacity[line_id] -= capacity
+        self.total_capacity -= capacity
+        self.line_load[line_id] -= riders
+        self.aboard -= riders
+    
+    def record_line_removed(self, line_id: int) -> None:
+        """A line and every train on it were deleted."""
+        self.aboard -= self.line_load.pop(line_id, 0)
+        self.total_capacity -= self.line_capacity.pop(line_id, 0)
+    
+    def sample(self, time: float) -> None:
+        """Append one row to the time series; called once per simulation tick."""
+        spawned, arrived, lost = self._last_sample
+        self.series.append((
+            time,
+            self.total_passengers - spawned,
+            self.passengers_arrived - arrived,
+            self.passengers_lost - lost,
+            self.waiting,
+            self.aboard,
+            self.average_wait,
+            self.load_factor,
+        ))
+        self._last_sample = (self.total_passengers, self.passengers_arrived, self.passengers_lost)
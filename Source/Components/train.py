@@ -1,17 +1,17 @@
 import pygame
-import time
-import math
 
 from typing import List, Tuple, Dict
-from uuid import uuid1, UUID
-from random import randint
 
 from line import Line
-from rider import Rider
+from rider import Rider, RiderPool
 from station import Station
-from typeEnums import TrainType
+from typeEnums import TrainType, LogEvent
 from tracker import Tracker
+from simClock import SimClock
+from trainEngine import TrainEngine
+from router import Router
 from resourceManager import resources
+from eventLog import logger
 
 # Design constants
 TRAIN_DWELL_TIME: float = 0.5
@@ -25,225 +25,165 @@ TRAIN_COLOR: Dict[TrainType, Tuple[int, int, int]] = {
 }
 
 class Train:
-    """Represents a train traveling along a line between stations."""
+    """Represents a train traveling along a line between stations.
     
-    def __init__(self, line: Line, type: TrainType = TrainType.Regular, tracker: Tracker = None):
+    Kinematic state lives in the game's TrainEngine; the attributes below are views into its arrays.
+    """
+    
+    def __init__(self, line: Line, engine: TrainEngine, rider_pool: RiderPool, type: TrainType = TrainType.Regular, tracker: Tracker = None):
         self.line: Line = line
+        self.engine: TrainEngine = engine
+        self.clock: SimClock = engine.clock
+        self.router: Router = engine.router
+        self.rider_pool: RiderPool = rider_pool
         self.riders: List[Rider] = []
         self.type: TrainType = type
         self.capacity: int = type.capacity
-        self.speed: float = 0
         self.max_speed: float = type.speed
         self.acceleration: float = type.acceleration
-
-        self.current_station_index: int = 0
-        self.distance_traveled: float = 0.0
-        self.segment_distances: List[float] = self._calculate_all_segment_distances()
-        self.total_line_distance: float = sum(self.segment_distances)
-        
-        self.id: UUID = uuid1()
-        self.forward: bool = True
-        self.at_station: bool = True
-        self.station_arrival_time: float = time.time()
-        self.station_parked: Station = self.line.stations[0]
         
+        self.id: int = -1    # Assigned by the game's train registry
         self.tracker = tracker
-    
-    def _calculate_all_segment_distances(self) -> List[float]:
-        """Calculate distances for all segments in the line."""
-        distances = []
-        for i in range(len(self.line.stations) - 1):
-            origin = self.line.stations[i]
-            destination = self.line.stations[i + 1]
-            dx = destination.x - origin.x
-            dy = destination.y - origin.y
-            distances.append(math.sqrt(dx * dx + dy * dy))
-        
-        # Add closing segment for circular lines
-        if self.line.circular and len(self.line.stations) > 2:
-            origin = self.line.stations[-1]
-            destination = self.line.stations[0]
-            dx = destination.x - origin.x
-            dy = destination.y - origin.y
-            distances.append(math.sqrt(dx * dx + dy * dy))
         
-        return distances
+        self.slot: int = engine.add(self)
+        if self.tracker:
+            self.tracker.record_train_added(line.id, self.capacity)
+    
+    @property
+    def distance_traveled(self) -> float:
+        return float(self.engine.distance[self.slot])
+    
+    @distance_traveled.setter
+    def distance_traveled(self, value: float) -> None:
+        self.engine.distance[self.slot] = value
+    
+    @property
+    def speed(self) -> float:
+        return float(self.engine.speed[self.slot])
+    
+    @speed.setter
+    def speed(self, value: float) -> None:
+        self.engine.speed[self.slot] = value
+    
+    @property
+    def forward(self) -> bool:
+        return bool(self.engine.forward[self.slot])
+    
+    @forward.setter
+    def forward(self, value: bool) -> None:
+        self.engine.forward[self.slot] = value
+    
+    @property
+    def at_station(self) -> bool:
+        return bool(self.engine.at_station[self.slot])
+    
+    @at_station.setter
+    def at_station(self, value: bool) -> None:
+        self.engine.at_station[self.slot] = value
+    
+    @property
+    def current_station_index(self) -> int:
+        return int(self.engine.station_index[self.slot])
+    
+    @current_station_index.setter
+    def current_station_index(self, value: int) -> None:
+        self.engine.station_index[self.slot] = value
+    
+    @property
+    def station_arrival_time(self) -> float:
+        return float(self.engine.arrival_time[self.slot])
+    
+    @property
+    def station_parked(self) -> Station:
+        return self.line.stations[self.engine.parked_index[self.slot]]
+    
+    @property
+    def segment_distances(self) -> List[float]:
+        """Lengths of every segment in the line, including the closing segment of circular lines."""
+        return self.line.segment_lengths
+    
+    @property
+    def total_line_distance(self) -> float:
+        return self.line.total_length
     
     def _get_current_segment_index(self) -> int:
         """Get which segment the train is currently on based on distance traveled."""
-        cumulative = 0.0
-        for i, segment_dist in enumerate(self.segment_distances):
-            cumulative += segment_dist
-            if self.distance_traveled < cumulative:
-                return i
-        return len(self.segment_distances) - 1
+        return self.line.segment_at(self.distance_traveled)
     
-    def _get_station_at_distance(self, distance: float) -> Tuple[int, bool]:
-        """Check if train is at a station at the given distance. Returns (station_index, at_station)."""
-        cumulative = 0.0
-        tolerance = self.speed * 0.5
-        
-        for i, segment_dist in enumerate(self.segment_distances):
-            # Check if at station i (start of segment)
-            if abs(distance - cumulative) < tolerance:
-                return (i, True)
-            cumulative += segment_dist
-        
-        # Check if at final station
-        if abs(distance - cumulative) < tolerance:
-            if self.line.circular:
-                return (0, True)
-            else:
-                return (len(self.line.stations) - 1, True)
-        
-        return (-1, False)
+    def dwell(self, now: float) -> None:
+        """Exchange riders while parked at a station, or depart once the dwell time has passed."""
+        if self.ready_to_depart(now):
+            self.at_station = False
+            self.speed = 0
+            return
+        
+        self.exchange_riders()
     
-    def update(self) -> None:
-        """Update train position along the line."""
-        if self.at_station:
-            if time.time() - self.station_arrival_time - (min(len(self.station_parked.riders), self.capacity) * 0.5) >= TRAIN_DWELL_TIME:
-                self.at_station = False
-                self.speed = 0
+    def departure_time(self) -> float:
+        """Time at which the train may leave, given the riders currently waiting at the station."""
+        return self.station_arrival_time + min(len(self.station_parked.riders), self.capacity) * 0.5 + TRAIN_DWELL_TIME
+    
+    def ready_to_depart(self, now: float) -> bool:
+        """Check if the dwell time (longer with more riders waiting) has passed."""
+        return now - self.station_arrival_time - (min(len(self.station_parked.riders), self.capacity) * 0.5) >= TRAIN_DWELL_TIME
+    
+    def exchange_riders(self) -> None:
+        """Unload and transfer riders at the parked station, then load waiting riders up to capacity."""
+        station = self.station_parked
+        tracker = self.tracker
+        now = self.clock.now()
+        
+        # Unload passengers at their destination, and transfer those whose best route continues on another line
+        remaining_riders = []
+        for rider in self.riders:
+            if rider.destination_type == station.station_type:
+                if tracker:
+                    tracker.record_arrival(self.line.id, now - rider.spawn_time)
+                self.rider_pool.release(rider)
+            elif self.router.should_alight(station, self.line, rider.destination_type):
+                station.riders.append(rider)
+                if tracker:
+                    tracker.record_transfer(station.id, self.line.id)
             else:
-                # Unload passengers at their destination
-                remaining_riders = [rider for rider in self.riders if rider.destination_type != self.station_parked.station_type]
-                unloaded_count = len(self.riders) - len(remaining_riders)
-                self.riders = remaining_riders
-                
-                if self.tracker and unloaded_count > 0:
-                    self.tracker.passengers_arrived += unloaded_count
-                
-                # Load new passengers up to capacity (only those we can deliver)
-                riders_checked = 0
-                while len(self.riders) < self.capacity and riders_checked < len(self.station_parked.riders):
-                    rider: Rider = self.station_parked.riders[riders_checked]
-                    
-                    if rider.destination_type in self.line.get_station_types():
-                        # Take this rider
-                        self.riders.append(self.station_parked.riders.pop(riders_checked))
-                        print(f"{len(self.riders)} aboard train")
-                    else:
-                        # Skip this rider, check next one
-                        riders_checked += 1
-                return
+                remaining_riders.append(rider)
+        self.riders = remaining_riders
         
-        # Move the train
-        if self.forward:
-            self.speed = min(self.speed + self.acceleration, self.max_speed)
-
-            self.distance_traveled += self.speed
-            
-            # Check for arrival at station
-            station_index, arrived = self._get_station_at_distance(self.distance_traveled)
-            if arrived and station_index != self.current_station_index:
-                self.current_station_index = station_index
-                self._arrive_at_station(self.line.stations[station_index])
+        # Load new passengers up to capacity (only those this line is a best route for)
+        riders_checked = 0
+        while len(self.riders) < self.capacity and riders_checked < len(station.riders):
+            rider: Rider = station.riders[riders_checked]
             
-            # Check if reached end of line
-            if self.distance_traveled >= self.total_line_distance:
-                if self.line.circular:
-                    # Loop back to start for circular lines
-                    self.distance_traveled = 0.0
-                    self.current_station_index = 0
-                    self._arrive_at_station(self.line.stations[0])
-                else:
-                    # Reverse direction for non-circular lines
-                    self.distance_traveled = self.total_line_distance
-                    self.forward = False
-                    self.current_station_index = len(self.line.stations) - 1
-                    if not self.at_station:
-                        self._arrive_at_station(self.line.stations[-1])
-                self.speed = 0
-        else:
-            self.speed = min(self.speed + self.acceleration, self.max_speed)
-            self.distance_traveled -= self.speed
-            
-            # Check for arrival at station
-            station_index, arrived = self._get_station_at_distance(self.distance_traveled)
-            if arrived and station_index != self.current_station_index:
-                self.current_station_index = station_index
-                self._arrive_at_station(self.line.stations[station_index])
-            
-            # Check if reached start of line
-            if self.distance_traveled <= 0.0:
-                self.distance_traveled = 0.0
-                self.forward = True
-                self.speed = 0
-                self.current_station_index = 0
-                if not self.at_station:
-                    self._arrive_at_station(self.line.stations[0])
+            if self.router.should_board(station, self.line, rider.destination_type):
+                # Take this rider
+                self.riders.append(station.riders.pop(riders_checked))
+                if tracker:
+                    tracker.record_boarding(station.id, self.line.id, now - rider.spawn_time, rider.origin_id == station.id)
+                if logger.enabled(LogEvent.RidersBoarded):
+                    logger.log(LogEvent.RidersBoarded, aboard=len(self.riders))
+            else:
+                # Skip this rider, check next one
+                riders_checked += 1
     
-    def _arrive_at_station(self, station) -> None:
+    def _arrive_at_station(self, station_index: int) -> None:
         """Handle train arriving at a station (unload/load passengers)."""
         self.at_station = True
-        self.station_parked = station
-        self.station_arrival_time = time.time()
-        print(f"Train arrived at {station.describe()}")
+        self.engine.parked_index[self.slot] = station_index
+        self.engine.arrival_time[self.slot] = self.clock.now()
+        if logger.enabled(LogEvent.TrainArrived):
+            station = self.station_parked
+            logger.log(LogEvent.TrainArrived, station_type=station.station_type.name, x=station.x, y=station.y)
     
     def get_position(self) -> Tuple[int, int]:
         """Calculate current position based on distance traveled along the entire line."""
-        if self.total_line_distance == 0:
-            return (self.line.stations[0].x, self.line.stations[0].y)
-        
-        # Find which segment we're on
-        current_segment = self._get_current_segment_index()
-        
-        # Calculate distance from start of current segment
-        distance_before_segment = sum(self.segment_distances[:current_segment])
-        distance_in_segment = self.distance_traveled - distance_before_segment
-        
-        # Get origin and destination of current segment
-        if current_segment >= len(self.line.stations) - 1 and self.line.circular:
-            origin = self.line.stations[-1]
-            destination = self.line.stations[0]
-        else:
-            origin = self.line.stations[current_segment]
-            if current_segment + 1 < len(self.line.stations):
-                destination = self.line.stations[current_segment + 1]
-            else:
-                return (origin.x, origin.y)
-        
-        # Interpolate position within segment
-        segment_length = self.segment_distances[current_segment]
-        if segment_length == 0:
-            return (origin.x, origin.y)
-        
-        t = distance_in_segment / segment_length
-        x = int(origin.x + t * (destination.x - origin.x))
-        y = int(origin.y + t * (destination.y - origin.y))
-        return (x, y)
+        return self.line.position_at(self.distance_traveled)
     
     def get_direction_angle(self) -> float:
         """Calculate the angle the train is pointing (in degrees)."""
         if self.total_line_distance == 0:
             return 0.0
         
-        # Find which segment we're on
-        current_segment = self._get_current_segment_index()
-        
-        # Get origin and destination of current segment
-        if current_segment >= len(self.line.stations) - 1 and self.line.circular:
-            origin = self.line.stations[-1]
-            destination = self.line.stations[0]
-        else:
-            origin = self.line.stations[current_segment]
-            if current_segment + 1 < len(self.line.stations):
-                destination = self.line.stations[current_segment + 1]
-            else:
-                # At the end, use previous segment direction
-                if current_segment > 0:
-                    origin = self.line.stations[current_segment - 1]
-                    destination = self.line.stations[current_segment]
-                else:
-                    return 0.0
-        
-        # Calculate angle from origin to destination
-        dx = destination.x - origin.x
-        dy = destination.y - origin.y
-        
-        # atan2 returns angle in radians, convert to degrees
         # Note: pygame uses (0, 0) at top-left, so y increases downward
-        angle = math.degrees(math.atan2(dy, dx))
+        angle = self.line.angles[self._get_current_segment_index()]
         
         # If going backward, flip the angle 180 degrees
         if not self.forward:
@@ -253,25 +193,21 @@ class Train:
         
         return angle
     
-    def render(self, screen: pygame.Surface) -> None:
-        """Render the train at its current position."""
+    def render(self, screen: pygame.Surface) -> pygame.Rect:
+        """Render the train and its riders at the current position and return the area drawn."""
         x, y = self.get_position()
         
         # Try to render sprite first
-        sprite = resources.get_train_sprite(self.type, TRAIN_SIZE)
-        if sprite and resources.use_sprites:
-            # Get direction angle and rotate sprite
-            angle = self.get_direction_angle()
-            # Negative angle because pygame rotates counter-clockwise but our angle is clockwise
-            rotated_sprite = pygame.transform.rotate(sprite, -angle)
-            rect = rotated_sprite.get_rect(center=(x, y))
-            screen.blit(rotated_sprite, rect)
+        # Negative angle because pygame rotates counter-clockwise but our angle is clockwise
+        rotated_sprite = resources.get_train_sprite(self.type, TRAIN_SIZE, angle=-self.get_direction_angle())
+        if rotated_sprite and resources.use_sprites:
+            rect = screen.blit(rotated_sprite, rotated_sprite.get_rect(center=(x, y)))
         else:
             # Fallback to colored rectangle (doesn't rotate)
-            rect = pygame.Rect(x - TRAIN_SIZE, y - TRAIN_SIZE, TRAIN_SIZE * 2, TRAIN_SIZE * 2)
-            pygame.draw.rect(screen, TRAIN_COLOR[self.type], rect)
+            rect = pygame.draw.rect(screen, TRAIN_COLOR[self.type], pygame.Rect(x - TRAIN_SIZE, y - TRAIN_SIZE, TRAIN_SIZE * 2, TRAIN_SIZE * 2))
          
         rider_x = x + 20
         for rider in self.riders:
-            rider.render(screen, rider_x, y - 18)
-            rider_x += 15
\ No newline at end of file
+            rect.union_ip(rider.render(screen, rider_x, y - 18))
+            rider_x += 15
+        return rect
\ No newline at end of file
@@ -0,0 +1,222 @@
+import numpy as np
+
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+from line import Line
+from simClock import SimClock
+from router import Router
+from profiler import profiler
+
+if TYPE_CHECKING:
+    from train import Train
+
+# Design constants
+INITIAL_TRAIN_CAPACITY: int = 16
+LINE_STRIDE: float          = 1e7   # Larger than any line length, keeps line blocks apart in the flat index
+
+# Per-train columns, grown together when the engine runs out of slots
+TRAIN_FIELDS: Dict[str, type] = {
+    "distance":         np.float64,
+    "speed":            np.float64,
+    "max_speed":        np.float64,
+    "acceleration":     np.float64,
+    "arrival_time":     np.float64,
+    "forward":          np.bool_,
+    "at_station":       np.bool_,
+    "station_index":    np.int64,
+    "parked_index":     np.int64,
+    "line_slot":        np.int64,
+}
+
+
+class TrainEngine:
+    """Structure-of-arrays train store that advances every train of a game in one vectorized step.
+
+    Train objects are thin views over a slot in these arrays; the engine owns the kinematics and
+    only calls back into Python for trains that are parked (rider exchange) or have just arrived.
+    """
+
+    def __init__(self, clock: SimClock, router: Router):
+        self.clock: SimClock = clock
+        self.router: Router = router
+        self.trains: List["Train"] = []
+        self.count: int = 0
+
+        self.distance: np.ndarray
+        self.speed: np.ndarray
+        self.max_speed: np.ndarray
+        self.acceleration: np.ndarray
+        self.arrival_time: np.ndarray
+        self.forward: np.ndarray
+        self.at_station: np.ndarray
+        self.station_index: np.ndarray
+        self.parked_index: np.ndarray
+        self.line_slot: np.ndarray
+        for name, dtype in TRAIN_FIELDS.items():
+            setattr(self, name, np.zeros(INITIAL_TRAIN_CAPACITY, dtype=dtype))
+
+        # Per-line geometry: every line's cumulative station offsets concatenated into one flat array,
+        # each block shifted by slot * LINE_STRIDE so a single searchsorted covers all lines
+        self.lines: List[Optional[Line]] = []
+        self.line_slots: Dict[int, int] = {}
+        self.line_versions: List[int] = []
+        self.free_line_slots: List[int] = []
+        self.flat_offsets: np.ndarray = np.empty(0)
+        self.shifted_offsets: np.ndarray = np.empty(0)
+        self.line_start: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.segment_count: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.total: np.ndarray = np.zeros(0)
+        self.circular: np.ndarray = np.zeros(0, dtype=np.bool_)
+
+    def add(self, train: "Train") -> int:
+        """Register a train parked at the first station of its line and return its slot."""
+        if self.count == len(self.distance):
+            for name in TRAIN_FIELDS:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+        slot = self.count
+        self.count += 1
+        self.trains.append(train)
+
+        self.distance[slot] = 0.0
+        self.speed[slot] = 0.0
+        self.max_speed[slot] = train.max_speed
+        self.acceleration[slot] = train.acceleration
+        self.arrival_time[slot] = self.clock.now()
+        self.forward[slot] = True
+        self.at_station[slot] = True
+        self.station_index[slot] = 0
+        self.parked_index[slot] = 0
+        self.line_slot[slot] = self._line_slot(train.line)
+        return slot
+
+    def remove(self, train: "Train") -> None:
+        """Remove a train, moving the last slot into the hole so the arrays stay dense."""
+        slot = train.slot
+        last = self.count - 1
+        if slot != last:
+            for name in TRAIN_FIELDS:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.trains[last]
+            moved.slot = slot
+            self.trains[slot] = moved
+
+        self.trains.pop()
+        self.count -= 1
+        train.slot = -1
+
+    def remove_line(self, line: Line) -> None:
+        """Remove every train on a line and release the line's geometry block."""
+        for train in [train for train in self.trains if train.line.id == line.id]:
+            self.remove(train)
+
+        slot = self.line_slots.pop(line.id, None)
+        if slot is not None:
+            self.lines[slot] = None
+            self.free_line_slots.append(slot)
+            self._rebuild_offsets()
+
+    def _line_slot(self, line: Line) -> int:
+        """Get the geometry slot of a line, registering it on first use."""
+        if line.id in self.line_slots:
+            return self.line_slots[line.id]
+
+        if self.free_line_slots:
+            slot = self.free_line_slots.pop()
+            self.lines[slot] = line
+        else:
+            slot = len(self.lines)
+            self.lines.append(line)
+            self.line_versions.append(-1)
+
+        self.line_slots[line.id] = slot
+        self._rebuild_offsets()
+        return slot
+
+    def _rebuild_offsets(self) -> None:
+        """Rebuild the flat offset index from each line's cached geometry."""
+        count = len(self.lines)
+        self.line_start = np.zeros(count, dtype=np.int64)
+        self.segment_count = np.zeros(count, dtype=np.int64)
+        self.total = np.zeros(count)
+        self.circular = np.zeros(count, dtype=np.bool_)
+
+        blocks = []
+        position = 0
+        for slot, line in enumerate(self.lines):
+            self.line_start[slot] = position
+            if line is None:
+                continue
+            self.line_versions[slot] = line.version
+            self.segment_count[slot] = len(line.segment_lengths)
+            self.total[slot] = line.total_length
+            self.circular[slot] = line.circular and len(line.stations) > 2
+            blocks.append(line.cumulative)
+            position += len(line.cumulative)
+
+        self.flat_offsets = np.concatenate(blocks) if blocks else np.empty(0)
+        slots = np.repeat(np.arange(count), np.diff(np.append(self.line_start, position)))
+        self.shifted_offsets = self.flat_offsets + slots * LINE_STRIDE
+
+    def sync_geometry(self) -> None:
+        """Rebuild the flat offset index if a line was extended or closed into a loop (lines bump their version)."""
+        if any(line is not None and line.version != version for line, version in zip(self.lines, self.line_versions)):
+            self._rebuild_offsets()
+    
+    def update(self) -> None:
+        """Advance every train by one tick."""
+        if self.count == 0:
+            return
+        now = self.clock.now()
+
+        self.sync_geometry()
+
+        # Parked trains exchange riders or depart; this needs the Python rider lists
+        with profiler.section("trains.dwell"):
+            for slot in np.flatnonzero(self.at_station[:self.count]):
+                self.trains[slot].dwell(now)
+
+        moving = np.flatnonzero(~self.at_station[:self.count])
+        if len(moving) == 0:
+            return
+
+        lines = self.line_slot[moving]
+        forward = self.forward[moving]
+        speed = np.minimum(self.speed[moving] + self.acceleration[moving], self.max_speed[moving])
+        distance = self.distance[moving] + np.where(forward, speed, -speed)
+        current = self.station_index[moving]
+
+        # Arrival at a station: the nearest station offset (binary search) within half a tick of travel
+        start = self.line_start[lines]
+        right = np.clip(np.searchsorted(self.shifted_offsets, distance + lines * LINE_STRIDE), start + 1, start + self.segment_count[lines])
+        left = right - 1
+        nearest = np.where(np.abs(self.flat_offsets[right] - distance) < np.abs(self.flat_offsets[left] - distance), right, left)
+        arrived = np.abs(self.flat_offsets[nearest] - distance) < speed * 0.5
+        station = nearest - start
+        circular = self.circular[lines]
+        station = np.where(circular & (station == self.segment_count[lines]), 0, station)
+        arrived &= station != current
+        current = np.where(arrived, station, current)
+
+        # End of the line: loop back on circular lines, otherwise reverse direction
+        total = self.total[lines]
+        at_end = forward & (distance >= total)
+        loop = at_end & circular
+        bounce = at_end & ~circular
+        at_start = ~forward & (distance <= 0.0)
+
+        distance = np.where(loop | at_start, 0.0, np.where(bounce, total, distance))
+        current = np.where(loop | at_start, 0, np.where(bounce, self.segment_count[lines], current))
+        speed = np.where(at_end | at_start, 0.0, speed)
+        forward = np.where(bounce, False, np.where(at_start, True, forward))
+        arrived |= at_end | at_start
+
+        self.distance[moving] = distance
+        self.speed[moving] = speed
+        self.forward[moving] = forward
+        self.station_index[moving] = current
+
+        for slot, station_index in zip(moving[arrived], current[arrived]):
+            self.trains[slot]._arrive_at_station(int(station_index))
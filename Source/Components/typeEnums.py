@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class StationType(Enum):
     """Types of stations with different shapes."""
@@ -41,4 +41,60 @@ class TrainType(Enum):
 class GameSpeed(Enum):
     Regular = 1
     TwoStep = 2
-    FourStep = 4
\ No newline at end of file
+    FourStep = 4
+
+class SimEvent(Enum):
+    """Kinds of events handled by the discrete-event simulation core."""
+    StationSpawn = 0
+    RiderSpawn = 1
+    RiderGiveUp = 2
+    TrainArrival = 3
+    DwellEnd = 4
+    LineUpgrade = 5
+
+class PlayerAction(IntEnum):
+    """Player inputs that change a game, as applied by MiniMetro.perform() and stored in replays."""
+    Click = 0           # a, b: screen location
+    CreateStation = 1
+    AddTrain = 2        # a: line id, b: TrainType value
+    SpawnRider = 3      # a: station id
+    DeleteLine = 4      # a: line id
+    DeleteTrain = 5     # a: train id
+    # Direct action API for agents, by station index and line index (see MiniMetro.legal_actions)
+    Connect = 6         # a, b: origin and destination station
+    ExtendLine = 7      # a: line, b: station
+    CloseLoop = 8       # a: line
+    RemoveLine = 9      # a: line
+    PlaceTrain = 10     # a: line, b: TrainType value
+    RemoveTrain = 11    # a: line, b: TrainType value
+    End = 255           # Last replay record; a, b: passengers arrived and lost
+
+class LogLevel(IntEnum):
+    """Severity levels for the event log, lowest first."""
+    Debug = 10
+    Info = 20
+    Warning = 30
+    Error = 40
+
+class LogEvent(Enum):
+    """Kinds of structured events written to the event log."""
+    StationCreated = 0
+    MapSaturated = 1
+    RiderSpawned = 2
+    RidersBoarded = 3
+    TrainArrived = 4
+    TrainCreated = 5
+    TrainDeleted = 6
+    NoTrainsAvailable = 7
+    LineCreated = 8
+    LineExtended = 9
+    LineExtendFailed = 10
+    LineCircular = 11
+    LineCycleRejected = 12
+    LineSelected = 13
+    LineDeleted = 14
+    StationClicked = 15
+    SpritesLoaded = 16
+    BackgroundLoaded = 17
+    ResourceError = 18
+    ExportError = 19